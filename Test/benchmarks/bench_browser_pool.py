@@ -0,0 +1,71 @@
+"""
+Benchmark job throughput with and without the shared browser pool.
+
+Usage:
+    python -m benchmarks.bench_browser_pool --jobs 40 --concurrency 4
+"""
+
+import asyncio
+import time
+import click
+from core.scraper import BaseScraper
+from core.browser import close_browser_pool
+from benchmarks.common import LocalSite, disable_politeness
+
+
+class BenchScraper(BaseScraper):
+    """Minimal scraper that reads product names."""
+    
+    async def scrape(self, url: str):
+        await self.navigate(url, wait_until="load")
+        return await self.get_texts('.product-name')
+
+
+async def run_jobs(urls, concurrency: int) -> float:
+    """Run one scraper per URL, like JobQueue workers do, and return jobs/sec."""
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+    
+    async def worker():
+        while not queue.empty():
+            url = queue.get_nowait()
+            async with BenchScraper() as scraper:
+                await scraper.run(url)
+    
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await close_browser_pool()
+    return len(urls) / (time.perf_counter() - start)
+
+
+async def main(jobs: int, concurrency: int):
+    settings = disable_politeness()
+    
+    async with LocalSite() as site:
+        urls = site.urls(jobs)
+        
+        settings.browser.pool.enabled = False
+        without_pool = await run_jobs(urls, concurrency)
+        
+        settings.browser.pool.enabled = True
+        with_pool = await run_jobs(urls, concurrency)
+    
+    click.echo(f"jobs={jobs} concurrency={concurrency}")
+    click.echo(f"  without pool: {without_pool:.2f} jobs/sec")
+    click.echo(f"  with pool:    {with_pool:.2f} jobs/sec")
+    click.echo(f"  speedup:      {with_pool / without_pool:.1f}x")
+
+
+@click.command()
+@click.option('--jobs', default=40, help='Number of jobs to run per mode')
+@click.option('--concurrency', default=4, help='Concurrent workers')
+def cli(jobs, concurrency):
+    """Compare jobs/sec with a browser per job versus the warm pool."""
+    asyncio.run(main(jobs, concurrency))
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,110 @@
+"""
+Benchmark per-element extraction against extract_many on a product listing.
+
+Usage:
+    python -m benchmarks.bench_extraction --products 100 --repeat 5
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+import click
+from playwright._impl._connection import Channel
+from core.scraper import BaseScraper
+from core.browser import close_browser_pool
+from benchmarks.common import LocalSite, disable_politeness
+
+
+FIELDS = {
+    'name': '.product-name',
+    'price': '.product-price',
+    'description': '.product-description',
+    'image_url': ('.product-image img', 'src')
+}
+
+
+class BenchScraper(BaseScraper):
+    """Scraper exposing both extraction strategies."""
+    
+    async def scrape(self, url: str):
+        await self.navigate(url, wait_until="load")
+    
+    async def extract_per_element(self):
+        """Extract products the way the example scrapers used to: one call per element and field."""
+        products = []
+        for element in await self.page.query_selector_all('.product-item'):
+            product = {}
+            for name, spec in FIELDS.items():
+                selector, attribute = spec if isinstance(spec, tuple) else (spec, None)
+                sub_element = await element.query_selector(selector)
+                if sub_element is None:
+                    product[name] = ''
+                elif attribute:
+                    product[name] = await sub_element.get_attribute(attribute) or ''
+                else:
+                    product[name] = (await sub_element.inner_text()).strip()
+            products.append(product)
+        return products
+    
+    async def extract_bulk(self):
+        return await self.extract_many('.product-item', FIELDS)
+
+
+@contextmanager
+def count_round_trips(counter):
+    """Count protocol messages sent to the browser driver."""
+    original = Channel.send
+    
+    async def counting_send(self, method, params=None):
+        counter['calls'] += 1
+        return await original(self, method, params)
+    
+    Channel.send = counting_send
+    try:
+        yield counter
+    finally:
+        Channel.send = original
+
+
+async def measure(extract, repeat: int):
+    """Run an extraction strategy and return (round trips per page, ms per page, items)."""
+    counter = {'calls': 0}
+    start = time.perf_counter()
+    with count_round_trips(counter):
+        for _ in range(repeat):
+            items = await extract()
+    elapsed = time.perf_counter() - start
+    return counter['calls'] / repeat, elapsed * 1000 / repeat, items
+
+
+async def main(products: int, repeat: int):
+    disable_politeness()
+    
+    try:
+        async with LocalSite(product_count=products) as site:
+            async with BenchScraper() as scraper:
+                await scraper.run(site.urls(1)[0])
+                
+                before = await measure(scraper.extract_per_element, repeat)
+                after = await measure(scraper.extract_bulk, repeat)
+    finally:
+        await close_browser_pool()
+    
+    assert before[2] == after[2], "strategies extracted different data"
+    
+    click.echo(f"products={products} repeat={repeat}")
+    click.echo(f"  per-element:  {before[0]:.0f} round trips, {before[1]:.1f} ms per page")
+    click.echo(f"  extract_many: {after[0]:.0f} round trips, {after[1]:.1f} ms per page")
+    click.echo(f"  speedup:      {before[1] / after[1]:.1f}x")
+
+
+@click.command()
+@click.option('--products', default=100, help='Products on the benchmark page')
+@click.option('--repeat', default=5, help='Extractions per strategy')
+def cli(products, repeat):
+    """Compare round trips and wall time of per-element and bulk extraction."""
+    asyncio.run(main(products, repeat))
+
+
+if __name__ == '__main__':
+    cli()
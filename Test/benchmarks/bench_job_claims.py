@@ -0,0 +1,104 @@
+"""
+Benchmark job claiming under contention: many workers draining one queue.
+
+Each worker is a thread with its own JobQueue; the shared connection pool is
+sized so every worker holds its own connection, as separate worker
+processes would.
+
+Usage:
+    python -m benchmarks.bench_job_claims --workers 64 --jobs 2000
+"""
+
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional
+import click
+from config.settings import get_settings
+from core.queue import JobQueue, JobStatus
+from storage.engine import close_engines
+
+
+def read_then_update(queue: JobQueue, worker_id: str) -> Optional[str]:
+    """The previous claim: read the top pending job, then mark it running in another session."""
+    jobs = queue.get_pending_jobs(limit=1)
+    if not jobs:
+        return None
+    queue.update_job_status(jobs[0].id, JobStatus.RUNNING)
+    return jobs[0].id
+
+
+def atomic_claim(queue: JobQueue, worker_id: str) -> Optional[str]:
+    jobs = queue.claim_jobs(worker_id)
+    return jobs[0].id if jobs else None
+
+
+def drain(worker_id: str, claim: Callable[[JobQueue, str], Optional[str]]) -> List[str]:
+    """Claim jobs until none are pending; return the ids this worker got."""
+    queue = JobQueue()
+    claimed = []
+    while True:
+        job_id = claim(queue, worker_id)
+        if job_id is None:
+            # A failed claim (e.g. a locked database) is not an empty queue
+            if not queue.get_pending_jobs(limit=1):
+                return claimed
+            continue
+        claimed.append(job_id)
+
+
+def measure(jobs: int, workers: int, claim: Callable) -> dict:
+    """Fill the queue, drain it with `workers` threads and count jobs claimed more than once."""
+    queue = JobQueue()
+    with queue.engine.begin() as connection:
+        connection.exec_driver_sql("DELETE FROM jobs")
+    queue.add_jobs([
+        {'name': f"job-{i}", 'url': f"https://site{i % 50}.example/{i}", 'scraper_class': 'example', 'priority': i % 3}
+        for i in range(jobs)
+    ])
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda i: drain(f"worker-{i}", claim), range(workers)))
+    elapsed = time.perf_counter() - start
+    close_engines()
+    
+    counts = Counter(job_id for claimed in results for job_id in claimed)
+    return {
+        'claims': sum(counts.values()),
+        'double_claims': sum(count - 1 for count in counts.values()),
+        'unclaimed': jobs - len(counts),
+        'per_second': sum(counts.values()) / elapsed
+    }
+
+
+def main(jobs: int, workers: int, database_url: Optional[str]):
+    settings = get_settings()
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.database.url = database_url or f"sqlite:///{Path(tmp) / 'jobs.db'}"
+        settings.database.echo = False
+        settings.database.pool_size = workers
+        
+        click.echo(f"jobs={jobs}, workers={workers}, database={settings.database.url.split('://')[0]}")
+        click.echo(f"  {'method':<18}{'claims':>8}{'double':>8}{'unclaimed':>11}{'claims/s':>10}")
+        for name, claim in (('read-then-update', read_then_update), ('atomic claim', atomic_claim)):
+            stats = measure(jobs, workers, claim)
+            click.echo(
+                f"  {name:<18}{stats['claims']:>8}{stats['double_claims']:>8}"
+                f"{stats['unclaimed']:>11}{stats['per_second']:>10.1f}"
+            )
+
+
+@click.command()
+@click.option('--jobs', default=2000, help='Jobs in the queue')
+@click.option('--workers', default=64, help='Concurrent workers, each with its own connection')
+@click.option('--database-url', default=None, help='Database to test, e.g. postgresql://...; a temporary SQLite file by default')
+def cli(jobs, workers, database_url):
+    """Compare read-then-update claiming with atomic claims for double-claimed jobs and throughput."""
+    main(jobs, workers, database_url)
+
+
+if __name__ == '__main__':
+    cli()
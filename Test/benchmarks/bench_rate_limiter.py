@@ -0,0 +1,84 @@
+"""
+Benchmark rate limiter throughput as the number of distinct domains grows.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter --domains 1,2,4,8,16 --requests 10
+"""
+
+import asyncio
+import time
+import click
+from config.settings import get_settings
+from core.rate_limiter import RateLimiter
+from utils.helpers import extract_domain, random_delay
+
+
+class LockedRateLimiter(RateLimiter):
+    """The previous design: one lock held across bucket waits and the human-like delay."""
+    
+    def __init__(self):
+        super().__init__()
+        self._lock = asyncio.Lock()
+    
+    async def wait_for_token(self, url: str, tokens: int = 1) -> bool:
+        async with self._lock:
+            for bucket in (self.buckets['global'], self.domain_buckets[extract_domain(url)]):
+                while not bucket.consume(tokens):
+                    await asyncio.sleep((tokens - bucket.tokens) / bucket.refill_rate)
+            await asyncio.sleep(random_delay(
+                self.settings.rate_limiting.delay.min,
+                self.settings.rate_limiting.delay.max
+            ))
+            return True
+
+
+async def measure(limiter: RateLimiter, domains: int, requests: int, workers: int) -> float:
+    """Push requests spread over `domains` through the limiter; return requests per second."""
+    urls = asyncio.Queue()
+    for page in range(requests):
+        for domain in range(domains):
+            urls.put_nowait(f"https://site{domain}.example/page/{page}")
+    
+    async def worker():
+        while not urls.empty():
+            await limiter.wait_for_token(urls.get_nowait())
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return domains * requests / (time.perf_counter() - start)
+
+
+async def main(domain_counts, requests: int, workers: int, rate: int, delay: float):
+    settings = get_settings()
+    settings.rate_limiting.enabled = True
+    settings.rate_limiting.respect_robots_txt = False
+    # Measure scheduling alone, at a fixed rate
+    settings.rate_limiting.adaptive.enabled = False
+    settings.rate_limiting.default_rate = rate
+    settings.rate_limiting.global_rate = rate * 1000
+    settings.rate_limiting.global_burst = 1000
+    settings.rate_limiting.delay.min = delay
+    settings.rate_limiting.delay.max = delay
+    
+    click.echo(f"requests={requests} per domain, workers={workers}, rate={rate}/min, delay={delay}s")
+    click.echo(f"  {'domains':>8}{'locked req/s':>15}{'reserved req/s':>17}{'speedup':>10}")
+    for domains in domain_counts:
+        locked = await measure(LockedRateLimiter(), domains, requests, workers)
+        reserved = await measure(RateLimiter(), domains, requests, workers)
+        click.echo(f"  {domains:>8}{locked:>15.1f}{reserved:>17.1f}{reserved / locked:>9.1f}x")
+
+
+@click.command()
+@click.option('--domains', 'domain_counts', default='1,2,4,8,16', help='Comma-separated domain counts')
+@click.option('--requests', default=10, help='Requests per domain')
+@click.option('--workers', default=32, help='Concurrent callers')
+@click.option('--rate', default=600, help='Per-domain limit in requests per minute')
+@click.option('--delay', default=0.05, help='Human-like delay between requests to a domain')
+def cli(domain_counts, requests, workers, rate, delay):
+    """Compare a lock-serialized limiter with reservation-based waits."""
+    counts = [int(count) for count in domain_counts.split(',')]
+    asyncio.run(main(counts, requests, workers, rate, delay))
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,60 @@
+"""
+Shared helpers for benchmarks: a local product site and settings tweaks.
+"""
+
+from typing import List, Optional
+from aiohttp import web
+from config.settings import get_settings
+
+
+def product_page(product_count: int = 100) -> str:
+    """Build a static product listing page."""
+    items = []
+    for i in range(product_count):
+        items.append(
+            f'<div class="product-item">'
+            f'<h2 class="product-name">Product {i}</h2>'
+            f'<span class="product-price">${i}.99</span>'
+            f'<p class="product-description">Description for product {i}</p>'
+            f'<div class="product-image"><img src="/img/{i}.png"></div>'
+            f'</div>'
+        )
+    return f"<html><head><title>Products</title></head><body>{''.join(items)}</body></html>"
+
+
+class LocalSite:
+    """Serve benchmark pages from localhost so results exclude network noise."""
+    
+    def __init__(self, product_count: int = 100):
+        self.html = product_page(product_count)
+        self.runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+    
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self._handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.runner.cleanup()
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.html, content_type='text/html')
+    
+    def urls(self, count: int) -> List[str]:
+        """Get distinct page URLs on the local site."""
+        return [f"{self.base_url}/products/{i}" for i in range(count)]
+
+
+def disable_politeness():
+    """Turn off rate limiting and human simulation so only engine cost is measured."""
+    settings = get_settings()
+    settings.rate_limiting.enabled = False
+    settings.browser.stealth_mode = False
+    return settings
@@ -9,13 +9,21 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
 
-from core.scraper import BaseScraper
+from core.scraper import BaseScraper, result_records
+from core.browser import close_browser_pool
+from core.http_scraper import close_http_session, make_http_scraper
+from core.rate_limiter import close_rate_limiter
+from core.robots import close_robots_cache
+from core.engine_selector import EngineSelector
 from core.queue import JobQueue
 from core.scheduler import ScrapingScheduler
 from core.pipeline import DataPipeline
 from storage.database import DatabaseManager
 from storage.exporters import DataExporter
+from storage.engine import close_engines
 from scrapers.example_scraper import ExampleScraper, NewsScraper, EcommerceScraper
+from scrapers.schema_scraper import SchemaScraper
+from core.schema import load_schemas
 from utils.logger import setup_logger, get_logger
 from config.settings import get_settings
 
@@ -28,6 +36,17 @@ SCRAPER_REGISTRY = {
 }
 
 
+def create_scraper(name: str, engine: str = 'browser') -> BaseScraper:
+    """Create a registered scraper on the browser or HTTP engine."""
+    if name not in SCRAPER_REGISTRY:
+        raise ValueError(f"Unknown scraper class: {name}")
+    
+    scraper_class = SCRAPER_REGISTRY[name]
+    if engine == 'http':
+        scraper_class = make_http_scraper(scraper_class)
+    return scraper_class()
+
+
 @click.group()
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose logging')
 @click.option('--config', '-c', help='Path to configuration file')
@@ -42,17 +61,42 @@ def cli(verbose, config):
         settings = get_settings().load_from_file(config)
     else:
         settings = get_settings()
+    
+    register_schema_scrapers(settings.scraping.schema_dir)
+
+
+def register_schema_scrapers(schema_dir: str):
+    """Add a scraper for every YAML schema in schema_dir to the registry."""
+    try:
+        for name, schema in load_schemas(schema_dir).items():
+            SCRAPER_REGISTRY.setdefault(name, SchemaScraper.for_schema(schema))
+    except Exception as e:
+        get_logger(__name__).error(f"Failed to load extraction schemas from {schema_dir}: {e}")
+
+
+def read_urls(path: str):
+    """Yield URLs from a file one line at a time, skipping blanks and comments."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
 
 
 @cli.command()
 @click.option('--scraper', '-s', required=True, help='Scraper class name')
-@click.option('--url', '-u', required=True, help='URL to scrape')
+@click.option('--url', '-u', help='URL to scrape')
+@click.option('--url-file', type=click.Path(exists=True, dir_okay=False),
+              help='File with one URL per line, scraped in one browser context')
+@click.option('--concurrency', default=4, help='Pages open in parallel with --url-file')
 @click.option('--output', '-o', help='Output file path')
 @click.option('--format', 'output_format', type=click.Choice(['json', 'csv', 'excel', 'xml']), 
               default='json', help='Output format')
 @click.option('--headless/--no-headless', default=True, help='Run browser in headless mode')
-def run(scraper, url, output, output_format, headless):
-    """Run a scraper on a single URL."""
+@click.option('--engine', type=click.Choice(['browser', 'http', 'auto']), default='browser',
+              help='Fetch engine; auto picks per domain from past results')
+def run(scraper, url, url_file, concurrency, output, output_format, headless, engine):
+    """Run a scraper on a single URL or a file of URLs."""
     logger = get_logger(__name__)
     
     try:
@@ -62,24 +106,73 @@ def run(scraper, url, output, output_format, headless):
             click.echo(f"Available scrapers: {', '.join(SCRAPER_REGISTRY.keys())}")
             return
         
-        scraper_class = SCRAPER_REGISTRY[scraper]
+        if bool(url) == bool(url_file):
+            click.echo("Provide exactly one of --url or --url-file")
+            return
+        
+        filename = output or f"scrape_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        if url_file:
+            if engine == 'auto':
+                click.echo("--engine auto needs per-URL scrapers; use add-job and start-workers for URL lists")
+                return
+            
+            async def scrape_file():
+                pipeline = DataPipeline()
+                stream = pipeline.open_stream(filename, formats=[output_format])
+                scraped, failed, records = 0, 0, 0
+                try:
+                    async with create_scraper(scraper, engine) as scraper_instance:
+                        async for page_url, result, error in scraper_instance.run_many(
+                            read_urls(url_file), concurrency=concurrency
+                        ):
+                            if error:
+                                failed += 1
+                                click.echo(f"Failed {page_url}: {error}")
+                                continue
+                            
+                            page_records = result_records(result)
+                            stream.write(page_records)
+                            scraped += 1
+                            records += len(page_records)
+                finally:
+                    for export_result in stream.close():
+                        if export_result.success:
+                            click.echo(f"Data exported to: {export_result.file_path}")
+                    await close_browser_pool()
+                    await close_http_session()
+                    close_rate_limiter()
+                    close_robots_cache()
+                    close_engines()
+                
+                click.echo(f"Scraped {records} items from {scraped} URLs ({failed} failed)")
+            
+            asyncio.run(scrape_file())
+            return
         
         # Run scraper
+        async def scrape():
+            if engine == 'auto':
+                return await EngineSelector().run(
+                    url, scraper, lambda selected: create_scraper(scraper, selected)
+                )
+            async with create_scraper(scraper, engine) as scraper_instance:
+                return await scraper_instance.run(url)
+        
         async def run_scraper():
-            async with scraper_class() as scraper_instance:
-                result = await scraper_instance.run(url)
+            try:
+                result = await scrape()
                 
                 # Export data
                 if result:
                     pipeline = DataPipeline()
-                    filename = output or f"scrape_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    
+                
                     export_results = pipeline.export_data(
                         data=result,
                         filename=filename,
                         formats=[output_format]
                     )
-                    
+                
                     for export_result in export_results:
                         if export_result.success:
                             click.echo(f"Data exported to: {export_result.file_path}")
@@ -87,6 +180,13 @@ def run(scraper, url, output, output_format, headless):
                             click.echo(f"Export failed: {export_result.error_message}")
                 
                 return result
+            finally:
+                # Shut down shared browsers and connections before the event loop closes
+                await close_browser_pool()
+                await close_http_session()
+                close_rate_limiter()
+                close_robots_cache()
+                close_engines()
         
         # Run async function
         result = asyncio.run(run_scraper())
@@ -107,7 +207,8 @@ def run(scraper, url, output, output_format, headless):
 @click.option('--url', '-u', required=True, help='URL to scrape')
 @click.option('--priority', '-p', default=0, help='Job priority')
 @click.option('--max-retries', '-r', default=3, help='Maximum retry attempts')
-def add_job(name, scraper, url, priority, max_retries):
+@click.option('--if-changed', is_flag=True, help='Skip extraction and storage if the page is unchanged since its last run')
+def add_job(name, scraper, url, priority, max_retries, if_changed):
     """Add a job to the queue."""
     logger = get_logger(__name__)
     
@@ -122,7 +223,8 @@ def add_job(name, scraper, url, priority, max_retries):
             url=url,
             scraper_class=scraper,
             priority=priority,
-            max_retries=max_retries
+            max_retries=max_retries,
+            metadata={'detect_changes': True} if if_changed else None
         )
         
         click.echo(f"Job added with ID: {job_id}")
@@ -132,6 +234,78 @@ def add_job(name, scraper, url, priority, max_retries):
         click.echo(f"Error: {e}")
 
 
+@cli.command()
+@click.option('--scraper', '-s', required=True, help='Scraper class name')
+@click.option('--seed', 'seeds', multiple=True, required=True, help='Seed URL (repeatable)')
+@click.option('--name', '-n', help='Crawl name')
+@click.option('--max-depth', type=int, help='Link depth to follow from the seeds')
+@click.option('--max-pages', type=int, help='Maximum URLs to enqueue')
+@click.option('--allow-subdomains/--no-allow-subdomains', default=None, help='Follow links to subdomains of the seed hosts')
+@click.option('--include', 'include_patterns', multiple=True, help='Regex a URL must match to be followed')
+@click.option('--exclude', 'exclude_patterns', multiple=True, help='Regex excluding URLs from the crawl')
+def crawl(scraper, seeds, name, max_depth, max_pages, allow_subdomains, include_patterns, exclude_patterns):
+    """Start a crawl; its pages are scraped by start-workers."""
+    logger = get_logger(__name__)
+    
+    try:
+        if scraper not in SCRAPER_REGISTRY:
+            click.echo(f"Unknown scraper: {scraper}")
+            return
+        
+        scope = {
+            'max_depth': max_depth,
+            'max_pages': max_pages,
+            'allow_subdomains': allow_subdomains,
+            'include_patterns': list(include_patterns) or None,
+            'exclude_patterns': list(exclude_patterns) or None,
+        }
+        
+        queue = JobQueue()
+        crawls = queue.get_crawl_manager()
+        crawl_id = crawls.start_crawl(
+            scraper,
+            list(seeds),
+            name=name,
+            **{key: value for key, value in scope.items() if value is not None}
+        )
+        crawls.close()
+        
+        click.echo(f"Crawl started with ID: {crawl_id}")
+        click.echo("Run start-workers to process it")
+        
+    except Exception as e:
+        logger.error(f"Failed to start crawl: {e}")
+        click.echo(f"Error: {e}")
+
+
+@cli.command()
+@click.option('--crawl-id', required=True, help='Crawl ID')
+def crawl_status(crawl_id):
+    """Show a crawl's scope and progress."""
+    logger = get_logger(__name__)
+    
+    try:
+        crawls = JobQueue().get_crawl_manager()
+        stats = crawls.get_crawl_stats(crawl_id)
+        crawls.close()
+        
+        if not stats:
+            click.echo(f"Crawl {crawl_id} not found")
+            return
+        
+        click.echo(f"Crawl {crawl_id}:")
+        click.echo(f"  Name: {stats['name']}")
+        click.echo(f"  Scraper: {stats['scraper_class']}")
+        click.echo(f"  Pages enqueued: {stats['pages_enqueued']}/{stats['scope']['max_pages']}")
+        click.echo(f"  Seen URLs: {stats['seen_urls']}")
+        click.echo(f"  Max depth: {stats['scope']['max_depth']}")
+        click.echo(f"  Hosts: {', '.join(stats['scope']['allowed_hosts']) or 'any'}")
+        
+    except Exception as e:
+        logger.error(f"Failed to get crawl status: {e}")
+        click.echo(f"Error: {e}")
+
+
 @cli.command()
 @click.option('--job-id', '-j', help='Specific job ID to check')
 def status(job_id):
@@ -150,6 +324,9 @@ def status(job_id):
                 click.echo(f"  Status: {job.status.value}")
                 click.echo(f"  Created: {job.created_at}")
                 click.echo(f"  Retries: {job.retry_count}/{job.max_retries}")
+                if job.metadata and 'unchanged' in job.metadata:
+                    reason = f" ({job.metadata['unchanged_reason']})" if job.metadata.get('unchanged_reason') else ""
+                    click.echo(f"  Unchanged: {'yes' if job.metadata['unchanged'] else 'no'}{reason}")
                 if job.error_message:
                     click.echo(f"  Error: {job.error_message}")
             else:
@@ -172,16 +349,12 @@ def start_workers(workers):
     logger = get_logger(__name__)
     
     try:
-        queue = JobQueue()
-        
-        def scraper_factory(scraper_class):
-            if scraper_class in SCRAPER_REGISTRY:
-                return SCRAPER_REGISTRY[scraper_class]()
-            else:
-                raise ValueError(f"Unknown scraper class: {scraper_class}")
+        settings = get_settings()
+        engine_selector = EngineSelector() if settings.engine_selection.enabled else None
+        queue = JobQueue(engine_selector=engine_selector)
         
         click.echo(f"Starting {workers} workers...")
-        asyncio.run(queue.start_workers(worker_count=workers, scraper_factory=scraper_factory))
+        asyncio.run(queue.start_workers(worker_count=workers, scraper_factory=create_scraper))
         
     except KeyboardInterrupt:
         click.echo("Workers stopped")
@@ -349,6 +522,30 @@ def stats():
         click.echo("\nJob Queue Statistics:")
         for status, count in job_stats.items():
             click.echo(f"  {status}: {count}")
+        
+        failure_stats = queue.get_failure_stats()
+        if failure_stats:
+            click.echo("\nFailed Jobs by Error Kind:")
+            for kind, count in sorted(failure_stats.items(), key=lambda item: -item[1]):
+                click.echo(f"  {kind}: {count}")
+        
+        # Change detection stats
+        change_stats = queue.get_change_detector().get_stats()
+        if change_stats.get('checks'):
+            click.echo("\nChange Detection:")
+            click.echo(f"  Tracked URLs: {change_stats['tracked_urls']}")
+            click.echo(f"  Unchanged: {change_stats['unchanged_checks']}/{change_stats['checks']} checks")
+        
+        # Per-phase latency
+        phase_stats = queue.get_phase_stats()
+        if phase_stats:
+            click.echo(f"\nJob Phases (last {phase_stats['total']['count']} jobs):")
+            click.echo(f"  {'phase':<16}{'avg':>9}{'p50':>9}{'p95':>9}{'max':>9}{'share':>8}")
+            for name, summary in phase_stats.items():
+                click.echo(
+                    f"  {name:<16}{summary['avg_seconds']:>8.3f}s{summary['p50_seconds']:>8.3f}s"
+                    f"{summary['p95_seconds']:>8.3f}s{summary['max_seconds']:>8.3f}s{summary['share']:>7.1%}"
+                )
             
     except Exception as e:
         logger.error(f"Failed to get stats: {e}")
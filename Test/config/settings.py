@@ -21,12 +21,54 @@ class ViewportConfig(BaseModel):
     height: int = 1080
 
 
+class BrowserPoolConfig(BaseModel):
+    enabled: bool = True
+    size: int = 2  # warm browsers per worker process
+    max_contexts_per_browser: int = 4
+    max_uses_per_browser: int = 100
+    max_rss_mb: int = 1024
+
+
+class InterceptionConfig(BaseModel):
+    enabled: bool = True
+    block_resource_types: List[str] = ["image", "media", "font"]
+    block_domains: List[str] = [
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "googlesyndication.com",
+        "facebook.net",
+        "hotjar.com",
+        "segment.io",
+        "mixpanel.com",
+        "newrelic.com",
+        "nr-data.net",
+        "scorecardresearch.com",
+        "criteo.com",
+        "taboola.com",
+        "outbrain.com"
+    ]
+    block_url_patterns: List[str] = []  # glob patterns, e.g. "*/analytics/*"
+    block_third_party: bool = False
+
+
 class BrowserConfig(BaseModel):
     headless: bool = True
     timeout: int = 30000
     viewport: ViewportConfig = Field(default_factory=ViewportConfig)
     user_agent_rotation: bool = True
     stealth_mode: bool = True
+    max_contexts: int = 4  # live contexts per browser
+    max_context_uses: int = 50  # leases before a context is closed and replaced
+    pool: BrowserPoolConfig = Field(default_factory=BrowserPoolConfig)
+    interception: InterceptionConfig = Field(default_factory=InterceptionConfig)
+
+
+class HttpEngineConfig(BaseModel):
+    max_connections: int = 100
+    max_connections_per_host: int = 8
+    timeout: int = 30  # seconds
+    dns_cache_ttl: int = 300
 
 
 class ProxyConfig(BaseModel):
@@ -42,12 +84,68 @@ class DelayConfig(BaseModel):
     max: float = 3.0
 
 
+class AdaptiveRateConfig(BaseModel):
+    enabled: bool = True  # adjust each domain's rate from 429/503, Retry-After and latency
+    min_rate: float = 1  # requests per minute
+    max_rate: float = 120
+    additive_increase: float = 2  # requests per minute added per minute of clean responses
+    decrease_factor: float = 0.5  # applied on 429/503
+    latency_decrease_factor: float = 0.8  # applied on timeouts and slow responses
+    latency_factor: float = 3  # responses this many times slower than the baseline count as slow
+    max_pause: float = 300  # cap in seconds on a domain-wide Retry-After pause
+    persist: bool = True  # keep learned rates in the database across restarts
+    save_interval: float = 60  # seconds between saves of rising rates
+
+
 class RateLimitingConfig(BaseModel):
     enabled: bool = True
-    default_rate: int = 10
+    default_rate: int = 10  # requests per minute per registrable domain (eTLD+1)
     burst_limit: int = 5
+    global_rate: int = 600  # requests per minute across all domains sharing the budget
+    global_burst: int = 50
+    ip_rate: int = 0  # requests per minute per resolved server IP; 0 disables the level
+    ip_burst: int = 10
+    proxy_rate: int = 300  # requests per minute through each outgoing proxy; 0 disables the level
+    proxy_burst: int = 20
+    max_buckets: int = 10000  # buckets kept per level before idle ones are evicted
+    dns_ttl: float = 300  # seconds a resolved IP is reused
     delay: DelayConfig = Field(default_factory=DelayConfig)
     respect_robots_txt: bool = True
+    # Where token budgets live: "local" (this process), "memory" (in-process stand-in
+    # for a shared server) or "database" (settings.database.url, shared by all workers and nodes)
+    backend: str = "local"
+    lease_size: int = 10  # tokens taken from a shared bucket per round trip
+    lease_ttl: float = 5  # seconds before unused leased tokens are given back
+    adaptive: AdaptiveRateConfig = Field(default_factory=AdaptiveRateConfig)
+
+    @validator('backend')
+    def validate_backend(cls, v):
+        if v not in ('local', 'memory', 'database'):
+            raise ValueError(f'Invalid rate limiter backend: {v}')
+        return v
+
+
+class RobotsConfig(BaseModel):
+    user_agent: str = "scraper"  # product token matched against User-agent groups
+    ttl: float = 86400  # seconds a fetched robots.txt is trusted
+    error_ttl: float = 600  # seconds before retrying after a 5xx or failed fetch
+    timeout: float = 10
+    max_bytes: int = 512000  # rules past this size are ignored
+    max_entries: int = 10000  # origins kept in memory
+    persist: bool = True  # share fetched robots.txt through the database
+
+
+class ConcurrencyConfig(BaseModel):
+    enabled: bool = True  # adapt how many requests run at once per registrable domain
+    initial_limit: int = 4
+    min_limit: int = 1
+    max_limit: int = 32
+    tolerance: float = 1.5  # latency growth over the baseline accepted before the limit shrinks
+    smoothing: float = 0.2  # weight of each new limit estimate
+    backoff_ratio: float = 0.9  # applied on timeouts, 429 and 503
+    baseline_window: int = 600  # samples averaged into a domain's baseline latency
+    max_domains: int = 10000  # idle domains beyond this are forgotten
+    scan_jobs: int = 20  # pending jobs a worker looks through for a domain with a free slot
 
 
 class ScrapingConfig(BaseModel):
@@ -55,6 +153,61 @@ class ScrapingConfig(BaseModel):
     retry_delay: int = 5
     timeout: int = 30
     wait_for_selector_timeout: int = 10
+    ready_timeout: int = 10  # seconds to wait for a navigation ready condition
+    networkidle_fallback_timeout: int = 5  # cap on networkidle when the condition is not met
+    schema_dir: str = "scrapers/schemas"  # YAML extraction schemas registered as scrapers
+    stream_results: bool = True  # workers persist records in batches instead of jobs.result
+    stream_batch_size: int = 100
+    pagination_max_steps: int = 50  # pagination actions after the first page
+    pagination_step_timeout: float = 10  # seconds to wait for new items after each action
+    capture_max_body_bytes: int = 5242880  # larger XHR/fetch bodies are not buffered
+    capture_max_responses: int = 100  # per capture
+    max_retry_after: float = 60  # throttled navigations asking for a longer wait fail instead
+    job_lease: float = 300  # seconds a claimed job stays with its worker; renewed while it runs
+    job_notify: str = "auto"  # wake idle workers on new jobs: auto, local, socket or postgres
+    idle_poll_interval: float = 30  # seconds an idle worker waits between checks without a wakeup
+
+
+class EngineSelectionConfig(BaseModel):
+    enabled: bool = True
+    min_samples: int = 3  # probes before HTTP can be trusted for a domain
+    match_threshold: float = 0.9  # share of probes where HTTP matched the browser
+    reprobe_every: int = 50  # jobs between re-probes of both engines
+    reprobe_interval_hours: int = 24
+
+
+class CircuitBreakerConfig(BaseModel):
+    enabled: bool = True
+    failure_threshold: int = 5  # consecutive domain-down navigations that open a domain's circuit
+    cooldown: float = 60  # seconds an open circuit fast-fails before letting a probe through
+
+
+class ChangeDetectionConfig(BaseModel):
+    enabled: bool = True  # scheduled jobs skip pages unchanged since their last run
+    conditional_requests: bool = True  # send If-None-Match / If-Modified-Since on the HTTP engine
+    ignore_patterns: List[str] = []  # regexes removed before hashing, e.g. rendered timestamps
+
+
+class CrawlConfig(BaseModel):
+    max_depth: int = 3
+    max_pages: int = 10000  # URLs enqueued per crawl, seeds included
+    same_host: bool = True  # restrict crawls to the seed hosts
+    allow_subdomains: bool = False
+    include_patterns: List[str] = []  # regexes a URL must match to be followed
+    exclude_patterns: List[str] = []
+    tracking_params: List[str] = [
+        "utm_*", "gclid", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "_ga", "_hsenc", "_hsmi"
+    ]  # query parameters stripped during canonicalization (glob patterns)
+    state_dir: str = "./data/crawls"  # per-crawl seen-sets
+    bloom_capacity: int = 1000000  # first Bloom layer; later layers double
+    bloom_error_rate: float = 0.001
+    exact_seen: bool = True  # confirm Bloom hits against an on-disk exact store
+    checkpoint_every: int = 10000  # new URLs between Bloom filter snapshots
+
+
+class TimingConfig(BaseModel):
+    enabled: bool = True  # per-phase latency breakdown stored in each job's metadata
+    stats_jobs: int = 1000  # recent jobs summarized by the stats command
 
 
 class StorageConfig(BaseModel):
@@ -62,6 +215,14 @@ class StorageConfig(BaseModel):
     export_formats: List[str] = ["json", "csv", "excel"]
     auto_export: bool = True
 
+    @validator('export_formats')
+    def validate_export_formats(cls, v):
+        valid_formats = ['json', 'csv', 'excel', 'xml']
+        for fmt in v:
+            if fmt not in valid_formats:
+                raise ValueError(f'Invalid export format: {fmt}')
+        return v
+
 
 class LoggingConfig(BaseModel):
     level: str = "INFO"
@@ -79,9 +240,17 @@ class SchedulerConfig(BaseModel):
 class Settings(BaseModel):
     database: DatabaseConfig = Field(default_factory=DatabaseConfig)
     browser: BrowserConfig = Field(default_factory=BrowserConfig)
+    http: HttpEngineConfig = Field(default_factory=HttpEngineConfig)
     proxy: ProxyConfig = Field(default_factory=ProxyConfig)
     rate_limiting: RateLimitingConfig = Field(default_factory=RateLimitingConfig)
+    robots: RobotsConfig = Field(default_factory=RobotsConfig)
+    concurrency: ConcurrencyConfig = Field(default_factory=ConcurrencyConfig)
     scraping: ScrapingConfig = Field(default_factory=ScrapingConfig)
+    engine_selection: EngineSelectionConfig = Field(default_factory=EngineSelectionConfig)
+    circuit_breaker: CircuitBreakerConfig = Field(default_factory=CircuitBreakerConfig)
+    change_detection: ChangeDetectionConfig = Field(default_factory=ChangeDetectionConfig)
+    crawl: CrawlConfig = Field(default_factory=CrawlConfig)
+    timing: TimingConfig = Field(default_factory=TimingConfig)
     storage: StorageConfig = Field(default_factory=StorageConfig)
     logging: LoggingConfig = Field(default_factory=LoggingConfig)
     scheduler: SchedulerConfig = Field(default_factory=SchedulerConfig)
@@ -92,14 +261,6 @@ class Settings(BaseModel):
             raise ValueError('Invalid database URL format')
         return v
 
-    @validator('export_formats')
-    def validate_export_formats(cls, v):
-        valid_formats = ['json', 'csv', 'excel', 'xml']
-        for fmt in v:
-            if fmt not in valid_formats:
-                raise ValueError(f'Invalid export format: {fmt}')
-        return v
-
     @classmethod
     def load_from_file(cls, config_path: str = "config/default.yaml") -> 'Settings':
         """Load configuration from YAML file."""
@@ -129,7 +290,27 @@ class Settings(BaseModel):
                     height=int(os.getenv('VIEWPORT_HEIGHT', '1080'))
                 ),
                 user_agent_rotation=os.getenv('USER_AGENT_ROTATION', 'true').lower() == 'true',
-                stealth_mode=os.getenv('STEALTH_MODE', 'true').lower() == 'true'
+                stealth_mode=os.getenv('STEALTH_MODE', 'true').lower() == 'true',
+                max_contexts=int(os.getenv('BROWSER_MAX_CONTEXTS', '4')),
+                max_context_uses=int(os.getenv('BROWSER_MAX_CONTEXT_USES', '50')),
+                pool=BrowserPoolConfig(
+                    enabled=os.getenv('BROWSER_POOL_ENABLED', 'true').lower() == 'true',
+                    size=int(os.getenv('BROWSER_POOL_SIZE', '2')),
+                    max_contexts_per_browser=int(os.getenv('BROWSER_POOL_MAX_CONTEXTS', '4')),
+                    max_uses_per_browser=int(os.getenv('BROWSER_POOL_MAX_USES', '100')),
+                    max_rss_mb=int(os.getenv('BROWSER_POOL_MAX_RSS_MB', '1024'))
+                ),
+                interception=InterceptionConfig(
+                    enabled=os.getenv('INTERCEPTION_ENABLED', 'true').lower() == 'true',
+                    block_resource_types=os.getenv('BLOCK_RESOURCE_TYPES', 'image,media,font').split(','),
+                    block_third_party=os.getenv('BLOCK_THIRD_PARTY', 'false').lower() == 'true'
+                )
+            ),
+            http=HttpEngineConfig(
+                max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '100')),
+                max_connections_per_host=int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', '8')),
+                timeout=int(os.getenv('HTTP_TIMEOUT', '30')),
+                dns_cache_ttl=int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))
             ),
             proxy=ProxyConfig(
                 enabled=os.getenv('PROXY_ENABLED', 'false').lower() == 'true',
@@ -142,17 +323,112 @@ class Settings(BaseModel):
                 enabled=os.getenv('RATE_LIMITING_ENABLED', 'true').lower() == 'true',
                 default_rate=int(os.getenv('DEFAULT_RATE_LIMIT', '10')),
                 burst_limit=int(os.getenv('BURST_LIMIT', '5')),
+                global_rate=int(os.getenv('GLOBAL_RATE_LIMIT', '600')),
+                global_burst=int(os.getenv('GLOBAL_BURST_LIMIT', '50')),
+                ip_rate=int(os.getenv('IP_RATE_LIMIT', '0')),
+                ip_burst=int(os.getenv('IP_BURST_LIMIT', '10')),
+                proxy_rate=int(os.getenv('PROXY_RATE_LIMIT', '300')),
+                proxy_burst=int(os.getenv('PROXY_BURST_LIMIT', '20')),
+                max_buckets=int(os.getenv('RATE_LIMIT_MAX_BUCKETS', '10000')),
+                dns_ttl=float(os.getenv('RATE_LIMIT_DNS_TTL', '300')),
                 delay=DelayConfig(
                     min=float(os.getenv('DELAY_MIN', '1.0')),
                     max=float(os.getenv('DELAY_MAX', '3.0'))
                 ),
-                respect_robots_txt=os.getenv('RESPECT_ROBOTS_TXT', 'true').lower() == 'true'
+                respect_robots_txt=os.getenv('RESPECT_ROBOTS_TXT', 'true').lower() == 'true',
+                backend=os.getenv('RATE_LIMIT_BACKEND', 'local'),
+                lease_size=int(os.getenv('RATE_LIMIT_LEASE_SIZE', '10')),
+                lease_ttl=float(os.getenv('RATE_LIMIT_LEASE_TTL', '5')),
+                adaptive=AdaptiveRateConfig(
+                    enabled=os.getenv('ADAPTIVE_RATE_ENABLED', 'true').lower() == 'true',
+                    min_rate=float(os.getenv('ADAPTIVE_RATE_MIN', '1')),
+                    max_rate=float(os.getenv('ADAPTIVE_RATE_MAX', '120')),
+                    additive_increase=float(os.getenv('ADAPTIVE_RATE_INCREASE', '2')),
+                    decrease_factor=float(os.getenv('ADAPTIVE_RATE_DECREASE_FACTOR', '0.5')),
+                    latency_decrease_factor=float(os.getenv('ADAPTIVE_RATE_LATENCY_DECREASE_FACTOR', '0.8')),
+                    latency_factor=float(os.getenv('ADAPTIVE_RATE_LATENCY_FACTOR', '3')),
+                    max_pause=float(os.getenv('ADAPTIVE_RATE_MAX_PAUSE', '300')),
+                    persist=os.getenv('ADAPTIVE_RATE_PERSIST', 'true').lower() == 'true',
+                    save_interval=float(os.getenv('ADAPTIVE_RATE_SAVE_INTERVAL', '60'))
+                )
+            ),
+            robots=RobotsConfig(
+                user_agent=os.getenv('ROBOTS_USER_AGENT', 'scraper'),
+                ttl=float(os.getenv('ROBOTS_TTL', '86400')),
+                error_ttl=float(os.getenv('ROBOTS_ERROR_TTL', '600')),
+                timeout=float(os.getenv('ROBOTS_TIMEOUT', '10')),
+                max_bytes=int(os.getenv('ROBOTS_MAX_BYTES', '512000')),
+                max_entries=int(os.getenv('ROBOTS_MAX_ENTRIES', '10000')),
+                persist=os.getenv('ROBOTS_PERSIST', 'true').lower() == 'true'
+            ),
+            concurrency=ConcurrencyConfig(
+                enabled=os.getenv('CONCURRENCY_ENABLED', 'true').lower() == 'true',
+                initial_limit=int(os.getenv('CONCURRENCY_INITIAL_LIMIT', '4')),
+                min_limit=int(os.getenv('CONCURRENCY_MIN_LIMIT', '1')),
+                max_limit=int(os.getenv('CONCURRENCY_MAX_LIMIT', '32')),
+                tolerance=float(os.getenv('CONCURRENCY_TOLERANCE', '1.5')),
+                smoothing=float(os.getenv('CONCURRENCY_SMOOTHING', '0.2')),
+                backoff_ratio=float(os.getenv('CONCURRENCY_BACKOFF_RATIO', '0.9')),
+                baseline_window=int(os.getenv('CONCURRENCY_BASELINE_WINDOW', '600')),
+                max_domains=int(os.getenv('CONCURRENCY_MAX_DOMAINS', '10000')),
+                scan_jobs=int(os.getenv('CONCURRENCY_SCAN_JOBS', '20'))
             ),
             scraping=ScrapingConfig(
                 max_retries=int(os.getenv('MAX_RETRIES', '3')),
                 retry_delay=int(os.getenv('RETRY_DELAY', '5')),
                 timeout=int(os.getenv('SCRAPING_TIMEOUT', '30')),
-                wait_for_selector_timeout=int(os.getenv('WAIT_FOR_SELECTOR_TIMEOUT', '10'))
+                wait_for_selector_timeout=int(os.getenv('WAIT_FOR_SELECTOR_TIMEOUT', '10')),
+                ready_timeout=int(os.getenv('READY_TIMEOUT', '10')),
+                networkidle_fallback_timeout=int(os.getenv('NETWORKIDLE_FALLBACK_TIMEOUT', '5')),
+                schema_dir=os.getenv('SCHEMA_DIR', 'scrapers/schemas'),
+                stream_results=os.getenv('STREAM_RESULTS', 'true').lower() == 'true',
+                stream_batch_size=int(os.getenv('STREAM_BATCH_SIZE', '100')),
+                pagination_max_steps=int(os.getenv('PAGINATION_MAX_STEPS', '50')),
+                pagination_step_timeout=float(os.getenv('PAGINATION_STEP_TIMEOUT', '10')),
+                capture_max_body_bytes=int(os.getenv('CAPTURE_MAX_BODY_BYTES', '5242880')),
+                capture_max_responses=int(os.getenv('CAPTURE_MAX_RESPONSES', '100')),
+                max_retry_after=float(os.getenv('MAX_RETRY_AFTER', '60')),
+                job_lease=float(os.getenv('JOB_LEASE', '300')),
+                job_notify=os.getenv('JOB_NOTIFY', 'auto'),
+                idle_poll_interval=float(os.getenv('IDLE_POLL_INTERVAL', '30'))
+            ),
+            engine_selection=EngineSelectionConfig(
+                enabled=os.getenv('ENGINE_SELECTION_ENABLED', 'true').lower() == 'true',
+                min_samples=int(os.getenv('ENGINE_SELECTION_MIN_SAMPLES', '3')),
+                match_threshold=float(os.getenv('ENGINE_SELECTION_MATCH_THRESHOLD', '0.9')),
+                reprobe_every=int(os.getenv('ENGINE_SELECTION_REPROBE_EVERY', '50')),
+                reprobe_interval_hours=int(os.getenv('ENGINE_SELECTION_REPROBE_INTERVAL_HOURS', '24'))
+            ),
+            circuit_breaker=CircuitBreakerConfig(
+                enabled=os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true',
+                failure_threshold=int(os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', '5')),
+                cooldown=float(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '60'))
+            ),
+            change_detection=ChangeDetectionConfig(
+                enabled=os.getenv('CHANGE_DETECTION_ENABLED', 'true').lower() == 'true',
+                conditional_requests=os.getenv('CHANGE_DETECTION_CONDITIONAL_REQUESTS', 'true').lower() == 'true',
+                ignore_patterns=[p for p in os.getenv('CHANGE_DETECTION_IGNORE_PATTERNS', '').split(',') if p]
+            ),
+            crawl=CrawlConfig(
+                max_depth=int(os.getenv('CRAWL_MAX_DEPTH', '3')),
+                max_pages=int(os.getenv('CRAWL_MAX_PAGES', '10000')),
+                same_host=os.getenv('CRAWL_SAME_HOST', 'true').lower() == 'true',
+                allow_subdomains=os.getenv('CRAWL_ALLOW_SUBDOMAINS', 'false').lower() == 'true',
+                include_patterns=[p for p in os.getenv('CRAWL_INCLUDE_PATTERNS', '').split(',') if p],
+                exclude_patterns=[p for p in os.getenv('CRAWL_EXCLUDE_PATTERNS', '').split(',') if p],
+                tracking_params=os.getenv(
+                    'CRAWL_TRACKING_PARAMS',
+                    'utm_*,gclid,dclid,fbclid,msclkid,yclid,mc_cid,mc_eid,_ga,_hsenc,_hsmi'
+                ).split(','),
+                state_dir=os.getenv('CRAWL_STATE_DIR', './data/crawls'),
+                bloom_capacity=int(os.getenv('CRAWL_BLOOM_CAPACITY', '1000000')),
+                bloom_error_rate=float(os.getenv('CRAWL_BLOOM_ERROR_RATE', '0.001')),
+                exact_seen=os.getenv('CRAWL_EXACT_SEEN', 'true').lower() == 'true',
+                checkpoint_every=int(os.getenv('CRAWL_CHECKPOINT_EVERY', '10000'))
+            ),
+            timing=TimingConfig(
+                enabled=os.getenv('TIMING_ENABLED', 'true').lower() == 'true',
+                stats_jobs=int(os.getenv('TIMING_STATS_JOBS', '1000'))
             ),
             storage=StorageConfig(
                 data_dir=os.getenv('DATA_DIR', './data'),
@@ -2,8 +2,11 @@
 Core scraping engine components.
 """
 
-from .browser import BrowserManager
+from .browser import BrowserManager, BrowserPool
 from .scraper import BaseScraper
+from .http_scraper import HttpScraper
+from .engine_selector import EngineSelector
+from .interception import RequestInterceptor
 from .stealth import StealthManager
 from .proxy import ProxyManager
 from .rate_limiter import RateLimiter
@@ -13,7 +16,11 @@ from .scheduler import ScrapingScheduler
 
 __all__ = [
     'BrowserManager',
+    'BrowserPool',
     'BaseScraper', 
+    'HttpScraper',
+    'EngineSelector',
+    'RequestInterceptor',
     'StealthManager',
     'ProxyManager',
     'RateLimiter',
@@ -3,9 +3,15 @@ Browser manager with Playwright and stealth features.
 """
 
 import asyncio
+import json
 import random
-from typing import Optional, Dict, Any, List
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Set, Callable
 from pathlib import Path
+from urllib.parse import urlparse
+from dataclasses import dataclass, field
+import psutil
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from fake_useragent import UserAgent
 from config.settings import get_settings
@@ -13,16 +19,38 @@ from utils.logger import get_logger
 from utils.helpers import random_delay
 
 
+@dataclass
+class ContextLease:
+    """Bookkeeping for a reusable context handed out by acquire_context."""
+    context: BrowserContext
+    options_key: str
+    uses: int = 0
+    in_use: bool = False
+    last_used: float = field(default_factory=time.monotonic)
+    origins: Set[str] = field(default_factory=set)
+    routes: List[tuple] = field(default_factory=list)
+    listeners: List[tuple] = field(default_factory=list)
+
+
 class BrowserManager:
     """Manages browser instances with stealth and anti-detection features."""
     
-    def __init__(self, proxy_manager=None):
+    def __init__(self, proxy_manager=None, playwright=None, max_contexts: Optional[int] = None):
         self.settings = get_settings()
         self.logger = get_logger(__name__)
         self.proxy_manager = proxy_manager
-        self.playwright = None
+        self.playwright = playwright
+        self._owns_playwright = playwright is None
         self.browser = None
         self.contexts: List[BrowserContext] = []
+        # Proxy server the browser and each context send requests through
+        self.proxy_server: Optional[str] = None
+        self._context_proxies: Dict[BrowserContext, str] = {}
+        self.max_contexts = max_contexts or self.settings.browser.max_contexts
+        self.max_context_uses = self.settings.browser.max_context_uses
+        # Leased contexts in least-recently-used order
+        self._leases: "OrderedDict[BrowserContext, ContextLease]" = OrderedDict()
+        self._lease_condition = asyncio.Condition()
         self.ua = UserAgent()
         
     async def __aenter__(self):
@@ -35,14 +63,16 @@ class BrowserManager:
     async def start(self):
         """Start Playwright and browser."""
         try:
-            self.playwright = await async_playwright().start()
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
             
             # Get proxy if available
             proxy = None
             if self.proxy_manager and self.settings.proxy.enabled:
                 proxy = await self.proxy_manager.get_proxy()
             
-            # Launch browser with stealth options
+            # Launch browser with stealth options. Heavy resources are
+            # blocked per context by RequestInterceptor instead of flags.
             browser_args = [
                 '--no-sandbox',
                 '--disable-blink-features=AutomationControlled',
@@ -51,8 +81,6 @@ class BrowserManager:
                 '--disable-features=VizDisplayCompositor',
                 '--disable-extensions',
                 '--disable-plugins',
-                '--disable-images',  # Speed up loading
-                '--disable-javascript',  # Can be overridden per page
             ]
             
             if self.settings.browser.headless:
@@ -63,6 +91,7 @@ class BrowserManager:
                 args=browser_args,
                 proxy=proxy
             )
+            self.proxy_server = proxy['server'] if proxy else None
             
             self.logger.info("Browser started successfully")
             
@@ -74,16 +103,17 @@ class BrowserManager:
         """Close browser and cleanup resources."""
         try:
             # Close all contexts
-            for context in self.contexts:
+            for context in list(self.contexts):
                 await context.close()
             self.contexts.clear()
+            self._leases.clear()
             
             # Close browser
             if self.browser:
                 await self.browser.close()
             
-            # Stop playwright
-            if self.playwright:
+            # Stop playwright unless it is shared with other managers
+            if self.playwright and self._owns_playwright:
                 await self.playwright.stop()
             
             self.logger.info("Browser closed successfully")
@@ -129,14 +159,152 @@ class BrowserManager:
                 context_options['proxy'] = proxy
         
         context = await self.browser.new_context(**context_options)
+        if context_options.get('proxy'):
+            self._context_proxies[context] = context_options['proxy']['server']
         
         # Add stealth scripts
         if self.settings.browser.stealth_mode:
             await self._add_stealth_scripts(context)
         
         self.contexts.append(context)
+        context.on("close", lambda _: self._forget_context(context))
         return context
     
+    def _forget_context(self, context: BrowserContext):
+        """Stop tracking a context once it is closed."""
+        if context in self.contexts:
+            self.contexts.remove(context)
+        self._leases.pop(context, None)
+        self._context_proxies.pop(context, None)
+    
+    def get_proxy_server(self, context: Optional[BrowserContext] = None) -> Optional[str]:
+        """Proxy server that requests from context go out through, if any."""
+        return self._context_proxies.get(context, self.proxy_server)
+    
+    async def close_context(self, context: BrowserContext):
+        """Close a context created by this manager and stop tracking it."""
+        self._forget_context(context)
+        try:
+            await context.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing context: {e}")
+    
+    async def acquire_context(self, **kwargs) -> BrowserContext:
+        """Lease a context, reusing an idle one with the same options when possible."""
+        options_key = json.dumps(kwargs, sort_keys=True, default=str)
+        
+        async with self._lease_condition:
+            while True:
+                lease = self._find_idle_lease(options_key)
+                if lease:
+                    break
+                
+                if len(self._leases) >= self.max_contexts:
+                    # Make room by evicting the least recently used idle context
+                    victim = next((l for l in self._leases.values() if not l.in_use), None)
+                    if victim is None:
+                        await self._lease_condition.wait()
+                        continue
+                    self.logger.debug("Evicting least recently used context")
+                    await self.close_context(victim.context)
+                
+                context = await self.create_context(**kwargs)
+                lease = ContextLease(context=context, options_key=options_key)
+                self._track_origins(lease)
+                self._leases[context] = lease
+                break
+            
+            lease.in_use = True
+            lease.last_used = time.monotonic()
+            self._leases.move_to_end(lease.context)
+            return lease.context
+    
+    async def release_context(self, context: BrowserContext):
+        """Return a leased context after resetting cookies, storage and routes."""
+        lease = self._leases.get(context)
+        if lease is None:
+            await self.close_context(context)
+            return
+        
+        lease.uses += 1
+        retire = lease.uses >= self.max_context_uses
+        if not retire:
+            try:
+                await self._reset_context(lease)
+            except Exception as e:
+                self.logger.warning(f"Failed to reset context, closing it: {e}")
+                retire = True
+        
+        async with self._lease_condition:
+            if retire:
+                await self.close_context(context)
+            else:
+                lease.in_use = False
+                lease.last_used = time.monotonic()
+                self._leases.move_to_end(context)
+            self._lease_condition.notify_all()
+    
+    async def add_route(self, context: BrowserContext, url: Any, handler: Callable):
+        """Register a context route that is removed when the lease is released."""
+        await context.route(url, handler)
+        lease = self._leases.get(context)
+        if lease:
+            lease.routes.append((url, handler))
+    
+    def add_listener(self, context: BrowserContext, event: str, handler: Callable):
+        """Register a context event listener that is removed when the lease is released."""
+        context.on(event, handler)
+        lease = self._leases.get(context)
+        if lease:
+            lease.listeners.append((event, handler))
+    
+    def _find_idle_lease(self, options_key: str) -> Optional[ContextLease]:
+        """Find the most recently used idle context created with the same options."""
+        for lease in reversed(self._leases.values()):
+            if not lease.in_use and lease.options_key == options_key:
+                return lease
+        return None
+    
+    def _track_origins(self, lease: ContextLease):
+        """Record every origin the context visits so its storage can be cleared."""
+        def on_frame_navigated(frame):
+            parsed = urlparse(frame.url)
+            if parsed.scheme in ('http', 'https'):
+                lease.origins.add(f"{parsed.scheme}://{parsed.netloc}")
+        
+        lease.context.on("page", lambda page: page.on("framenavigated", on_frame_navigated))
+    
+    async def _reset_context(self, lease: ContextLease):
+        """Clear cookies, storage, routes and pages so the next lease starts clean."""
+        context = lease.context
+        
+        for page in list(context.pages):
+            await page.close()
+        
+        for url, handler in lease.routes:
+            await context.unroute(url, handler)
+        lease.routes.clear()
+        
+        for event, handler in lease.listeners:
+            context.remove_listener(event, handler)
+        lease.listeners.clear()
+        
+        await context.clear_cookies()
+        
+        if lease.origins:
+            page = await context.new_page()
+            try:
+                cdp = await context.new_cdp_session(page)
+                for origin in lease.origins:
+                    await cdp.send("Storage.clearDataForOrigin", {
+                        'origin': origin,
+                        'storageTypes': 'local_storage,session_storage,indexeddb,websql,cache_storage,service_workers'
+                    })
+                await cdp.detach()
+            finally:
+                await page.close()
+            lease.origins.clear()
+    
     async def _add_stealth_scripts(self, context: BrowserContext):
         """Add stealth scripts to hide automation."""
         stealth_script = """
@@ -328,8 +496,252 @@ class BrowserManager:
             return {}
 
 
+@dataclass
+class PooledBrowser:
+    """Warm browser owned by a BrowserPool."""
+    manager: BrowserManager
+    pids: Set[int] = field(default_factory=set)
+    uses: int = 0
+    active_contexts: int = 0
+
+
+@dataclass
+class BrowserLease:
+    """Browser context leased from a BrowserPool."""
+    browser: PooledBrowser
+    context: BrowserContext
+
+    @property
+    def manager(self) -> BrowserManager:
+        return self.browser.manager
+
+
+class BrowserPool:
+    """Keeps warm browsers per worker process and hands out contexts."""
+    
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_contexts_per_browser: Optional[int] = None,
+        max_uses_per_browser: Optional[int] = None,
+        max_rss_mb: Optional[int] = None
+    ):
+        self.settings = get_settings()
+        self.logger = get_logger(__name__)
+        pool_config = self.settings.browser.pool
+        self.size = size if size is not None else pool_config.size
+        if self.size < 1:
+            raise ValueError(f"Browser pool size must be at least 1, got {self.size}")
+        self.max_contexts_per_browser = max_contexts_per_browser or pool_config.max_contexts_per_browser
+        self.max_uses_per_browser = max_uses_per_browser or pool_config.max_uses_per_browser
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else pool_config.max_rss_mb
+        self.playwright = None
+        self.browsers: List[PooledBrowser] = []
+        self._retiring: List[PooledBrowser] = []
+        self._launching = 0  # slots reserved for browsers being launched
+        self._condition = asyncio.Condition()
+        self._launch_lock = asyncio.Lock()
+        self.stats = {'launches': 0, 'recycles': 0, 'leases': 0}
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
+    async def start(self):
+        """Launch the configured number of warm browsers."""
+        async with self._condition:
+            missing = max(self.size - len(self.browsers) - self._launching, 0)
+            self._launching += missing
+        
+        for _ in range(missing):
+            await self._add_browser(lease=False)
+        self.logger.info(f"Browser pool started with {len(self.browsers)} browsers")
+    
+    async def close(self):
+        """Close every browser in the pool."""
+        async with self._condition:
+            browsers = self.browsers + self._retiring
+            self.browsers = []
+            self._retiring = []
+        
+        for browser in browsers:
+            await browser.manager.close()
+        
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+        
+        self.logger.info("Browser pool closed")
+    
+    async def acquire(self, **context_options) -> BrowserLease:
+        """Lease a clean context from the least loaded warm browser."""
+        launch = False
+        async with self._condition:
+            while True:
+                browser = self._pick_browser()
+                if browser:
+                    browser.active_contexts += 1
+                    break
+                if len(self.browsers) + self._launching < self.size:
+                    # Reserve the slot and launch outside the lock, so leases
+                    # on the warm browsers are not held up by a cold start
+                    self._launching += 1
+                    launch = True
+                    break
+                await self._condition.wait()
+        
+        if launch:
+            browser = await self._add_browser(lease=True)
+        
+        try:
+            context = await browser.manager.acquire_context(**context_options)
+        except Exception:
+            await self._return_browser(browser, used=False)
+            raise
+        
+        self.stats['leases'] += 1
+        return BrowserLease(browser=browser, context=context)
+    
+    async def _add_browser(self, lease: bool) -> PooledBrowser:
+        """Launch a browser into a reserved slot and add it to the pool."""
+        try:
+            browser = await self._launch_browser()
+        except BaseException:
+            async with self._condition:
+                self._launching -= 1
+                self._condition.notify_all()
+            raise
+        
+        async with self._condition:
+            self._launching -= 1
+            self.browsers.append(browser)
+            if lease:
+                browser.active_contexts += 1
+            self._condition.notify_all()
+        return browser
+    
+    async def release(self, lease: BrowserLease):
+        """Return a leased context and recycle its browser when worn out."""
+        await lease.manager.release_context(lease.context)
+        await self._return_browser(lease.browser, used=True)
+    
+    def _pick_browser(self) -> Optional[PooledBrowser]:
+        """Pick the browser with the fewest active contexts that has room."""
+        candidates = [
+            browser for browser in self.browsers
+            if browser.active_contexts < self.max_contexts_per_browser
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda browser: browser.active_contexts)
+    
+    async def _return_browser(self, browser: PooledBrowser, used: bool):
+        """Update browser bookkeeping after a context is released."""
+        to_close = None
+        
+        async with self._condition:
+            browser.active_contexts -= 1
+            if used:
+                browser.uses += 1
+            
+            if browser in self.browsers and self._should_recycle(browser):
+                self.browsers.remove(browser)
+                self._retiring.append(browser)
+                self.stats['recycles'] += 1
+                self.logger.info(f"Recycling browser after {browser.uses} uses")
+            
+            if browser in self._retiring and browser.active_contexts == 0:
+                self._retiring.remove(browser)
+                to_close = browser
+            
+            self._condition.notify_all()
+        
+        if to_close:
+            await to_close.manager.close()
+    
+    def _should_recycle(self, browser: PooledBrowser) -> bool:
+        """Check whether a browser has hit its use or memory budget."""
+        if browser.uses >= self.max_uses_per_browser:
+            return True
+        if self.max_rss_mb and self._browser_rss_mb(browser) > self.max_rss_mb:
+            return True
+        return False
+    
+    def _browser_rss_mb(self, browser: PooledBrowser) -> float:
+        """Get resident memory of a browser's process tree in megabytes."""
+        processes = {}
+        for pid in browser.pids:
+            try:
+                process = psutil.Process(pid)
+                processes[pid] = process
+                for child in process.children(recursive=True):
+                    processes[child.pid] = child
+            except psutil.Error:
+                continue
+        
+        rss = 0
+        for process in processes.values():
+            try:
+                rss += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return rss / (1024 * 1024)
+    
+    async def _launch_browser(self) -> PooledBrowser:
+        """Launch a browser on the shared Playwright driver."""
+        async with self._launch_lock:
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            
+            # Launches are serialized so the new processes can be attributed
+            before = self._child_pids()
+            manager = BrowserManager(
+                playwright=self.playwright,
+                max_contexts=self.max_contexts_per_browser
+            )
+            await manager.start()
+            pids = self._child_pids() - before
+        
+        self.stats['launches'] += 1
+        return PooledBrowser(manager=manager, pids=pids)
+    
+    @staticmethod
+    def _child_pids() -> Set[int]:
+        """Get pids of all processes spawned by this worker."""
+        try:
+            return {child.pid for child in psutil.Process().children(recursive=True)}
+        except psutil.Error:
+            return set()
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get browser pool statistics."""
+        return {
+            **self.stats,
+            'browsers': len(self.browsers),
+            'retiring': len(self._retiring),
+            'launching': self._launching,
+            'active_contexts': sum(browser.active_contexts for browser in self.browsers + self._retiring)
+        }
+
 
+_browser_pool: Optional[BrowserPool] = None
 
 
+def get_browser_pool() -> BrowserPool:
+    """Get the browser pool shared by scrapers in this process."""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+    return _browser_pool
 
 
+async def close_browser_pool():
+    """Close the shared browser pool if it was started."""
+    global _browser_pool
+    if _browser_pool is not None:
+        pool = _browser_pool
+        _browser_pool = None
+        await pool.close()
@@ -0,0 +1,147 @@
+"""
+Capture of XHR/fetch JSON responses as structured data for scrapers.
+"""
+
+import asyncio
+import fnmatch
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Union
+from playwright.async_api import Page, Response
+from utils.logger import get_logger
+
+
+@dataclass
+class CapturedResponse:
+    """A matching response and its parsed JSON body."""
+    url: str
+    status: int
+    method: str
+    resource_type: str
+    data: Any
+    size: int
+    received_at: float
+
+
+class ResponseCapture:
+    """Buffer the JSON bodies of page responses whose URL matches a pattern.
+    
+    The pattern is a glob (as in ReadyCondition.response_url) or a compiled
+    regex. Bodies over max_body_bytes, non-JSON bodies and responses past
+    max_responses are counted in `skipped` instead of being kept.
+    """
+    
+    def __init__(
+        self,
+        pattern: Union[str, Pattern],
+        max_body_bytes: int,
+        max_responses: int,
+        resource_types: Optional[Sequence[str]] = ('xhr', 'fetch')
+    ):
+        self.pattern = pattern if isinstance(pattern, re.Pattern) else re.compile(fnmatch.translate(pattern))
+        self.max_body_bytes = max_body_bytes
+        self.max_responses = max_responses
+        self.resource_types = set(resource_types) if resource_types else None
+        self.logger = get_logger(__name__)
+        self.responses: List[CapturedResponse] = []
+        self.skipped: Dict[str, int] = {'too_large': 0, 'not_json': 0, 'over_limit': 0, 'failed': 0}
+        self.page: Optional[Page] = None
+        self._reads = set()
+        self._arrived = asyncio.Event()
+    
+    @property
+    def data(self) -> List[Any]:
+        """Parsed bodies of the captured responses, in arrival order."""
+        return [response.data for response in self.responses]
+    
+    def matches(self, url: str, resource_type: str) -> bool:
+        """Check whether a response should be captured."""
+        if self.resource_types and resource_type not in self.resource_types:
+            return False
+        return self.pattern.match(url) is not None
+    
+    def attach(self, page: Page):
+        """Start listening to a page's responses."""
+        self.page = page
+        page.on("response", self._on_response)
+    
+    def stop(self):
+        """Stop listening and abandon bodies still being read."""
+        if self.page is not None:
+            try:
+                self.page.remove_listener("response", self._on_response)
+            except Exception:
+                pass
+            self.page = None
+        for read in self._reads:
+            read.cancel()
+        self._reads.clear()
+    
+    def clear(self):
+        """Drop captured responses, e.g. before paginating to the next API page."""
+        self.responses.clear()
+    
+    def _on_response(self, response: Response):
+        if not self.matches(response.url, response.request.resource_type):
+            return
+        # Event handlers must not block the connection, so bodies are read in tasks
+        read = asyncio.ensure_future(self._read(response))
+        self._reads.add(read)
+        read.add_done_callback(self._reads.discard)
+    
+    async def _read(self, response: Response):
+        """Read, size-check and parse one response body."""
+        if len(self.responses) >= self.max_responses:
+            self.skipped['over_limit'] += 1
+            return
+        
+        length = response.headers.get('content-length')
+        if length and length.isdigit() and int(length) > self.max_body_bytes:
+            self.skipped['too_large'] += 1
+            return
+        
+        try:
+            body = await response.body()
+        except Exception as e:
+            # Redirects and aborted requests have no body
+            self.logger.debug(f"Failed to read response body from {response.url}: {e}")
+            self.skipped['failed'] += 1
+            return
+        
+        if len(body) > self.max_body_bytes:
+            self.skipped['too_large'] += 1
+            return
+        
+        try:
+            data = json.loads(body)
+        except ValueError:
+            self.skipped['not_json'] += 1
+            return
+        
+        if len(self.responses) >= self.max_responses:
+            self.skipped['over_limit'] += 1
+            return
+        
+        self.responses.append(CapturedResponse(
+            url=response.url,
+            status=response.status,
+            method=response.request.method,
+            resource_type=response.request.resource_type,
+            data=data,
+            size=len(body),
+            received_at=time.time()
+        ))
+        self._arrived.set()
+    
+    async def wait_for(self, count: int = 1, timeout: Optional[float] = None) -> List[CapturedResponse]:
+        """Wait until at least `count` responses are captured; raises asyncio.TimeoutError."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while len(self.responses) < count:
+            self._arrived.clear()
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                raise asyncio.TimeoutError(f"Captured {len(self.responses)} of {count} responses")
+            await asyncio.wait_for(self._arrived.wait(), remaining)
+        return self.responses[:count]
@@ -0,0 +1,192 @@
+"""
+Change detection for re-scraped pages: HTTP validators and normalized content hashes.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Column, String, DateTime, Integer
+from config.settings import get_settings
+from utils.logger import get_logger
+from storage.engine import Base, get_session_factory
+
+# Markup that changes between identical renders of a page
+VOLATILE_PATTERNS = [
+    r'<script\b[^>]*>.*?</script\s*>',
+    r'<style\b[^>]*>.*?</style\s*>',
+    r'<noscript\b[^>]*>.*?</noscript\s*>',
+    r'<!--.*?-->',
+    r'\s(?:nonce|integrity)="[^"]*"',
+    r'<input\b[^>]*name="[^"]*(?:csrf|token)[^"]*"[^>]*>',
+]
+
+
+class PageUnchanged(Exception):
+    """Raised by navigation when a change-checked page is the same as on the last run."""
+    
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"{url} unchanged ({reason})")
+        self.url = url
+        self.reason = reason
+
+
+class PageStateModel(Base):
+    """Validators and content hashes from the last run of a URL."""
+    __tablename__ = 'page_states'
+    
+    url = Column(String, primary_key=True)
+    scraper_class = Column(String, primary_key=True)
+    etag = Column(String)
+    last_modified = Column(String)
+    # Raw HTML and rendered DOM differ, so each engine keeps its own hash
+    http_hash = Column(String)
+    browser_hash = Column(String)
+    checks = Column(Integer, default=0)
+    unchanged_checks = Column(Integer, default=0)
+    checked_at = Column(DateTime)
+    changed_at = Column(DateTime)
+
+
+def normalize_content(content: str, ignore_patterns: Optional[List[str]] = None) -> str:
+    """Strip volatile markup and whitespace so identical pages hash the same."""
+    for pattern in VOLATILE_PATTERNS + list(ignore_patterns or []):
+        content = re.sub(pattern, ' ', content, flags=re.IGNORECASE | re.DOTALL)
+    content = re.sub(r'>\s+<', '><', content)
+    return re.sub(r'\s+', ' ', content).strip()
+
+
+def content_hash(content: str, ignore_patterns: Optional[List[str]] = None) -> str:
+    """Hash normalized page content."""
+    return hashlib.sha256(normalize_content(content, ignore_patterns).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class PageCheck:
+    """Change check for one job's page: the previous state and what this run observed."""
+    url: str
+    scraper_class: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    http_hash: Optional[str] = None
+    browser_hash: Optional[str] = None
+    ignore_patterns: Optional[List[str]] = None
+    send_conditional: bool = True
+    observed: bool = False
+    unchanged_reason: Optional[str] = None
+    new_etag: Optional[str] = None
+    new_last_modified: Optional[str] = None
+    new_hash: Optional[str] = None
+    engine: Optional[str] = None
+    
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified."""
+        if not self.send_conditional:
+            return {}
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+    
+    def observe(self, engine: str, status: int, headers: Dict[str, str], content: Optional[str]):
+        """Record the response; raise PageUnchanged when it matches the previous run."""
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        self.observed = True
+        self.engine = engine
+        self.new_etag = headers.get('etag') or self.etag
+        self.new_last_modified = headers.get('last-modified') or self.last_modified
+        
+        if status == 304:
+            self.unchanged_reason = 'not_modified'
+        elif self.etag and headers.get('etag') == self.etag:
+            self.unchanged_reason = 'etag'
+        else:
+            self.new_hash = content_hash(content or "", self.ignore_patterns)
+            previous_hash = self.http_hash if engine == 'http' else self.browser_hash
+            if previous_hash == self.new_hash:
+                self.unchanged_reason = 'content_hash'
+        
+        if self.unchanged_reason:
+            raise PageUnchanged(self.url, self.unchanged_reason)
+
+
+class ChangeDetector:
+    """Loads and stores per-URL page state for change checks."""
+    
+    def __init__(self):
+        self.settings = get_settings()
+        self.config = self.settings.change_detection
+        self.logger = get_logger(__name__)
+        self.Session = get_session_factory(self.settings.database)
+    
+    def begin(self, url: str, scraper_class: str) -> PageCheck:
+        """Start a change check for a URL from its stored state."""
+        check = PageCheck(
+            url=url,
+            scraper_class=scraper_class,
+            ignore_patterns=self.config.ignore_patterns,
+            send_conditional=self.config.conditional_requests
+        )
+        try:
+            session = self.Session()
+            model = session.query(PageStateModel).filter_by(url=url, scraper_class=scraper_class).first()
+            if model:
+                check.etag = model.etag
+                check.last_modified = model.last_modified
+                check.http_hash = model.http_hash
+                check.browser_hash = model.browser_hash
+            session.close()
+        except Exception as e:
+            self.logger.error(f"Failed to load page state for {url}: {e}")
+        return check
+    
+    def save(self, check: PageCheck):
+        """Store what a completed job observed; checks that never saw the page are ignored."""
+        if not check.observed:
+            return
+        
+        try:
+            session = self.Session()
+            model = session.query(PageStateModel).filter_by(url=check.url, scraper_class=check.scraper_class).first()
+            if model is None:
+                model = PageStateModel(url=check.url, scraper_class=check.scraper_class, checks=0, unchanged_checks=0)
+                session.add(model)
+            
+            now = datetime.utcnow()
+            model.checks += 1
+            model.checked_at = now
+            model.etag = check.new_etag
+            model.last_modified = check.new_last_modified
+            if check.unchanged_reason:
+                model.unchanged_checks += 1
+            else:
+                model.changed_at = now
+            if check.new_hash:
+                setattr(model, f"{check.engine}_hash", check.new_hash)
+            
+            session.commit()
+            session.close()
+        except Exception as e:
+            self.logger.error(f"Failed to save page state for {check.url}: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get how often tracked pages were found unchanged."""
+        try:
+            session = self.Session()
+            models = session.query(PageStateModel).all()
+            session.close()
+            
+            checks = sum(model.checks or 0 for model in models)
+            unchanged = sum(model.unchanged_checks or 0 for model in models)
+            return {
+                'tracked_urls': len(models),
+                'checks': checks,
+                'unchanged_checks': unchanged,
+                'unchanged_rate': unchanged / checks if checks else 0.0
+            }
+        except Exception as e:
+            self.logger.error(f"Failed to get change detection stats: {e}")
+            return {}
@@ -0,0 +1,182 @@
+"""
+Per-domain circuit breakers that fast-fail navigation to domains that are down.
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+from config.settings import get_settings
+from utils.logger import get_logger
+from utils.helpers import extract_domain
+from utils.public_suffix import registrable_domain
+from .errors import CircuitOpenError, NavigationError
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+@dataclass
+class DomainCircuit:
+    """Breaker state for one domain.
+    
+    Closed lets every request through. After failure_threshold consecutive
+    domain-down failures it opens and rejects requests for `cooldown`
+    seconds, then half-opens: one probe navigation goes out and its outcome
+    closes or re-opens the circuit.
+    """
+    domain: str
+    failure_threshold: int
+    cooldown: float
+    state: str = CLOSED
+    failures: int = 0
+    trips: int = 0
+    rejected: int = 0
+    opened_at: Optional[float] = None
+    probe_in_flight: bool = False
+    last_error: Optional[str] = None
+    changed_at: float = field(default_factory=time.time)
+    
+    def retry_in(self) -> float:
+        """Seconds until an open circuit half-opens."""
+        if self.state != OPEN:
+            return 0.0
+        return max(self.opened_at + self.cooldown - time.monotonic(), 0.0)
+    
+    def check(self, url: str):
+        """Raise CircuitOpenError while the circuit is open and cooling down."""
+        if self.state == OPEN and self.retry_in() > 0:
+            self.rejected += 1
+            raise CircuitOpenError(url, self.domain, self.retry_in())
+    
+    def acquire(self, url: str):
+        """Admit a navigation, or raise CircuitOpenError; past the cooldown only one probe is admitted."""
+        self.check(url)
+        if self.state == OPEN:
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self.probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(url, self.domain, 0.0)
+            self.probe_in_flight = True
+    
+    def release(self):
+        """Give up a navigation without an outcome, e.g. when it was cancelled."""
+        self.probe_in_flight = False
+    
+    def record_success(self):
+        self.probe_in_flight = False
+        self.failures = 0
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+    
+    def record_failure(self, error: NavigationError):
+        self.probe_in_flight = False
+        self.failures += 1
+        self.last_error = str(error)
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.trips += 1
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+    
+    def _set_state(self, state: str):
+        self.state = state
+        self.changed_at = time.time()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'trips': self.trips,
+            'rejected': self.rejected,
+            'retry_in': self.retry_in(),
+            'last_error': self.last_error,
+            'changed_at': self.changed_at
+        }
+
+
+class CircuitBreaker:
+    """Circuit breakers for every domain navigated by scrapers in this process."""
+    
+    def __init__(self, failure_threshold: Optional[int] = None, cooldown: Optional[float] = None):
+        self.settings = get_settings()
+        self.config = self.settings.circuit_breaker
+        self.logger = get_logger(__name__)
+        self.failure_threshold = failure_threshold or self.config.failure_threshold
+        self.cooldown = cooldown if cooldown is not None else self.config.cooldown
+        self.circuits: Dict[str, DomainCircuit] = {}
+    
+    @staticmethod
+    def domain_key(url: str) -> str:
+        """Circuits are per registrable domain, like rate limits: www.shop.com and m.shop.com share one."""
+        return registrable_domain(extract_domain(url))
+    
+    def get_circuit(self, domain: str) -> DomainCircuit:
+        """Get the circuit for a registrable domain, creating a closed one."""
+        circuit = self.circuits.get(domain)
+        if circuit is None:
+            circuit = DomainCircuit(domain, self.failure_threshold, self.cooldown)
+            self.circuits[domain] = circuit
+        return circuit
+    
+    @contextmanager
+    def guard(self, url: str) -> Iterator[Optional[DomainCircuit]]:
+        """Admit a navigation to url and record its outcome on the domain's circuit.
+        
+        Raises CircuitOpenError up front while the domain's circuit is open.
+        Errors that do not mean the domain is down (a 404, say) count as the
+        domain responding.
+        """
+        if not self.config.enabled:
+            yield None
+            return
+        
+        circuit = self.get_circuit(self.domain_key(url))
+        circuit.acquire(url)
+        try:
+            yield circuit
+        except CircuitOpenError:
+            circuit.release()
+            raise
+        except NavigationError as e:
+            if not e.domain_down:
+                circuit.record_success()
+                raise
+            previous_state = circuit.state
+            circuit.record_failure(e)
+            if circuit.state == OPEN and previous_state != OPEN:
+                self.logger.warning(
+                    f"Circuit opened for {circuit.domain} after {circuit.failures} failures "
+                    f"(trip {circuit.trips}): {e}"
+                )
+            raise
+        except BaseException:
+            circuit.release()
+            raise
+        else:
+            if circuit.state == HALF_OPEN:
+                self.logger.info(f"Circuit closed for {circuit.domain}")
+            circuit.record_success()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state per domain and trip totals."""
+        domains = {domain: circuit.to_dict() for domain, circuit in self.circuits.items()}
+        return {
+            'domains': domains,
+            'open': sorted(domain for domain, stats in domains.items() if stats['state'] != CLOSED),
+            'trips': sum(stats['trips'] for stats in domains.values()),
+            'rejected': sum(stats['rejected'] for stats in domains.values())
+        }
+
+
+_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get the process-wide circuit breaker shared by all workers."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
@@ -0,0 +1,278 @@
+"""
+Adaptive per-domain concurrency limits driven by the latency gradient.
+"""
+
+import asyncio
+import math
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, FrozenSet, List, Optional
+from config.settings import get_settings
+from utils.logger import get_logger
+from utils.helpers import extract_domain
+from utils.public_suffix import registrable_domain
+from utils.timing import phase
+
+
+# Domains whose slot the current task already holds, so nested acquires do not deadlock
+_held_domains: ContextVar[FrozenSet[str]] = ContextVar('held_domains', default=frozenset())
+
+
+@dataclass
+class DomainConcurrency:
+    """Concurrency limit and latency estimates for one registrable domain."""
+    domain: str
+    limit: float
+    in_flight: int = 0
+    baseline_latency: Optional[float] = None
+    last_latency: Optional[float] = None
+    samples: int = 0
+    drops: int = 0
+    waiters: Deque[asyncio.Future] = field(default_factory=deque, repr=False)
+    
+    @property
+    def capacity(self) -> int:
+        return max(int(self.limit), 1)
+    
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.capacity and not self.waiters
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'limit': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'waiting': len(self.waiters),
+            'baseline_latency': self.baseline_latency,
+            'last_latency': self.last_latency,
+            'samples': self.samples,
+            'drops': self.drops
+        }
+
+
+class ConcurrencySlot:
+    """A held slot for a domain; release it exactly once."""
+    
+    def __init__(self, limiter: Optional['ConcurrencyLimiter'], domain: str, token: Optional[Token] = None):
+        self.limiter = limiter
+        self.domain = domain
+        self.token = token
+    
+    def release(self):
+        if self.limiter is None:
+            return
+        limiter, self.limiter = self.limiter, None
+        if self.token is not None:
+            try:
+                _held_domains.reset(self.token)
+            except ValueError:
+                # Released from another context; that context never saw the slot
+                pass
+        limiter._release(self.domain)
+
+
+class ConcurrencyLimiter:
+    """Caps how many requests run at once against each domain.
+    
+    Each domain's limit follows the gradient algorithm: every latency
+    sample compares the domain's baseline (a long moving average) with the
+    new latency. While latency stays within `tolerance` of the baseline the
+    limit grows by about sqrt(limit); as it inflates the gradient drops
+    below 1 and the limit shrinks, down to half per sample. Timeouts, 429
+    and 503 multiply the limit by backoff_ratio. Latency is ignored while a
+    domain's requests fill less than half its limit: they say nothing about
+    what more concurrency would do.
+    """
+    
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        self.config = self.settings.concurrency
+        self.logger = get_logger(__name__)
+        self.domains: 'OrderedDict[str, DomainConcurrency]' = OrderedDict()
+        self._release_callbacks: List[Callable[[], None]] = []
+    
+    @staticmethod
+    def domain_key(url: str) -> str:
+        return registrable_domain(extract_domain(url))
+    
+    def get_domain(self, domain: str) -> DomainConcurrency:
+        """Get a domain's state, evicting idle domains beyond max_domains."""
+        state = self.domains.get(domain)
+        if state is None:
+            state = self.domains[domain] = DomainConcurrency(domain, float(self.config.initial_limit))
+            self._evict()
+        self.domains.move_to_end(domain)
+        return state
+    
+    def _evict(self):
+        for _ in range(8):
+            if len(self.domains) <= self.config.max_domains:
+                return
+            domain, state = next(iter(self.domains.items()))
+            if state.in_flight or state.waiters:
+                self.domains.move_to_end(domain)
+            else:
+                del self.domains[domain]
+    
+    def has_capacity(self, url: str) -> bool:
+        """Whether a request to url would start without waiting."""
+        if not self.config.enabled:
+            return True
+        domain = self.domain_key(url)
+        if domain in _held_domains.get():
+            return True
+        return self.get_domain(domain).has_capacity()
+    
+    async def acquire(self, url: str) -> ConcurrencySlot:
+        """Wait for a free slot for url's domain; a task already holding one gets a no-op slot."""
+        domain = self.domain_key(url)
+        held = _held_domains.get()
+        if not self.config.enabled or domain in held:
+            return ConcurrencySlot(None, domain)
+        
+        state = self.get_domain(domain)
+        if state.has_capacity():
+            state.in_flight += 1
+        else:
+            with phase('concurrency_wait'):
+                await self._wait(state)
+        return ConcurrencySlot(self, domain, _held_domains.set(held | {domain}))
+    
+    async def _wait(self, state: DomainConcurrency):
+        """Wait in line until _wake hands this caller a slot, already counted in in_flight."""
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in state.waiters:
+                state.waiters.remove(waiter)
+            elif not waiter.cancelled():
+                # Handed a slot and cancelled at once; pass it on
+                state.in_flight -= 1
+                self._wake(state)
+            raise
+    
+    @asynccontextmanager
+    async def released(self, url: str) -> AsyncIterator[None]:
+        """Give up the slot this task holds for url's domain during the block, then wait for one again.
+        
+        For sleeps such as retry back-off and Retry-After, so an idle holder
+        does not keep other requests to the domain out. A no-op when the
+        task holds no slot for the domain.
+        """
+        domain = self.domain_key(url)
+        if not self.config.enabled or domain not in _held_domains.get():
+            yield
+            return
+        
+        self._release(domain)
+        try:
+            yield
+        except BaseException:
+            # Unwinding: count the slot back at once so the holder's own release balances
+            self.get_domain(domain).in_flight += 1
+            raise
+        
+        state = self.get_domain(domain)
+        try:
+            with phase('concurrency_wait'):
+                if state.has_capacity():
+                    state.in_flight += 1
+                else:
+                    await self._wait(state)
+        except asyncio.CancelledError:
+            state.in_flight += 1
+            raise
+    
+    def add_release_callback(self, callback: Callable[[], None]):
+        """Call callback whenever a domain gains a free slot, e.g. to wake idle queue workers."""
+        self._release_callbacks.append(callback)
+    
+    def remove_release_callback(self, callback: Callable[[], None]):
+        if callback in self._release_callbacks:
+            self._release_callbacks.remove(callback)
+    
+    def _release(self, domain: str):
+        state = self.domains.get(domain)
+        if state is None:
+            return
+        state.in_flight = max(state.in_flight - 1, 0)
+        self._wake(state)
+        self._notify_capacity(state)
+    
+    def _notify_capacity(self, state: DomainConcurrency):
+        if state.has_capacity():
+            for callback in list(self._release_callbacks):
+                callback()
+    
+    def _wake(self, state: DomainConcurrency):
+        while state.in_flight < state.capacity and state.waiters:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                state.in_flight += 1
+    
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[ConcurrencySlot]:
+        """Hold a slot for url's domain for the duration of the block."""
+        held = await self.acquire(url)
+        try:
+            yield held
+        finally:
+            held.release()
+    
+    def record(self, url: str, status: Optional[int], seconds: float):
+        """Adjust a domain's limit from one response; status None means the request timed out."""
+        if not self.config.enabled:
+            return
+        state = self.get_domain(self.domain_key(url))
+        
+        if status is None or status in (429, 503):
+            state.drops += 1
+            self._set_limit(state, state.limit * self.config.backoff_ratio)
+            return
+        
+        state.samples += 1
+        state.last_latency = seconds
+        if state.baseline_latency is None:
+            state.baseline_latency = seconds
+        else:
+            alpha = 2.0 / (self.config.baseline_window + 1)
+            state.baseline_latency += alpha * (seconds - state.baseline_latency)
+            if state.baseline_latency > 2 * seconds:
+                # Latency fell well below the baseline: let the baseline catch up
+                state.baseline_latency *= 0.95
+        
+        if state.in_flight < state.limit / 2:
+            # Too little traffic to tell whether more concurrency would hurt
+            return
+        
+        gradient = max(0.5, min(1.0, self.config.tolerance * state.baseline_latency / max(seconds, 1e-6)))
+        estimate = state.limit * gradient + math.sqrt(state.limit)
+        self._set_limit(state, state.limit * (1 - self.config.smoothing) + estimate * self.config.smoothing)
+    
+    def _set_limit(self, state: DomainConcurrency, limit: float):
+        previous = state.capacity
+        state.limit = min(max(limit, self.config.min_limit), self.config.max_limit)
+        if state.capacity != previous:
+            self.logger.debug(f"Concurrency limit for {state.domain}: {previous} -> {state.capacity}")
+            self._wake(state)
+            if state.capacity > previous:
+                self._notify_capacity(state)
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the limit and load per domain."""
+        return {domain: state.to_dict() for domain, state in self.domains.items()}
+
+
+_concurrency_limiter: Optional[ConcurrencyLimiter] = None
+
+
+def get_concurrency_limiter() -> ConcurrencyLimiter:
+    """Get the process-wide concurrency limiter shared by all workers."""
+    global _concurrency_limiter
+    if _concurrency_limiter is None:
+        _concurrency_limiter = ConcurrencyLimiter()
+    return _concurrency_limiter
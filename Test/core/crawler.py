@@ -0,0 +1,548 @@
+"""
+Crawl mode: URL canonicalization, scope rules, a persistent seen-set and link feedback into the job queue.
+"""
+
+import fnmatch
+import hashlib
+import json
+import math
+import os
+import posixpath
+import re
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from sqlalchemy import Column, String, Text, DateTime, Integer
+from config.settings import get_settings
+from utils.logger import get_logger
+from storage.engine import Base, get_session_factory
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str, tracking_params: Optional[List[str]] = None) -> Optional[str]:
+    """Normalize a URL so equivalent links compare equal; None for non-HTTP URLs."""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None
+    
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    
+    host = parts.hostname.lower().rstrip('.')
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    if parts.username:
+        credentials = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{credentials}@{netloc}"
+    
+    # Resolve dot segments but keep a trailing slash, which servers treat as significant
+    path = parts.path or '/'
+    if '.' in path:
+        normalized = posixpath.normpath(path)
+        if path.endswith('/') and normalized != '/':
+            normalized += '/'
+        path = normalized if normalized.startswith('/') else '/' + normalized
+    path = re.sub(r'/{2,}', '/', path)
+    
+    patterns = tracking_params or []
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not any(fnmatch.fnmatchcase(key.lower(), pattern) for pattern in patterns)
+    )
+    
+    # Fragments never reach the server
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+@dataclass
+class ScopeRules:
+    """Which discovered URLs a crawl follows."""
+    max_depth: int = 3
+    max_pages: int = 10000
+    allowed_hosts: List[str] = field(default_factory=list)  # empty allows any host
+    allow_subdomains: bool = False
+    include_patterns: List[str] = field(default_factory=list)  # regexes; any must match
+    exclude_patterns: List[str] = field(default_factory=list)  # regexes; none may match
+    
+    def __post_init__(self):
+        self.allowed_hosts = [host.lower() for host in self.allowed_hosts]
+        self._include = [re.compile(pattern) for pattern in self.include_patterns]
+        self._exclude = [re.compile(pattern) for pattern in self.exclude_patterns]
+    
+    def allows(self, url: str, depth: int) -> bool:
+        """Check whether a canonical URL at a given depth is in scope."""
+        if depth > self.max_depth:
+            return False
+        
+        if self.allowed_hosts:
+            host = urlsplit(url).hostname or ""
+            if not any(
+                host == allowed or (self.allow_subdomains and host.endswith('.' + allowed))
+                for allowed in self.allowed_hosts
+            ):
+                return False
+        
+        if self._include and not any(pattern.search(url) for pattern in self._include):
+            return False
+        return not any(pattern.search(url) for pattern in self._exclude)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dict."""
+        return asdict(self)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte digests."""
+    
+    def __init__(self, capacity: int, error_rate: float, count: int = 0, bits: Optional[bytearray] = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+    
+    def _positions(self, digest: bytes) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of the digest
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+    
+    def add(self, digest: bytes):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+    
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """Bloom filter that adds larger, tighter layers as it fills, keeping the overall error bounded."""
+    
+    GROWTH = 2
+    TIGHTENING = 0.5
+    
+    def __init__(self, initial_capacity: int, error_rate: float):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.layers: List[BloomFilter] = []
+        self.last_rowid = 0  # highest exact-store row reflected in the filter
+    
+    def add(self, digest: bytes):
+        if not self.layers or self.layers[-1].is_full:
+            index = len(self.layers)
+            self.layers.append(BloomFilter(
+                self.initial_capacity * self.GROWTH ** index,
+                # First layer gets half the budget so the geometric series stays under error_rate
+                self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** index
+            ))
+        self.layers[-1].add(digest)
+    
+    def __contains__(self, digest: bytes) -> bool:
+        return any(digest in layer for layer in self.layers)
+    
+    def __len__(self) -> int:
+        return sum(layer.count for layer in self.layers)
+    
+    def save(self, path: Path):
+        """Write the filter atomically so a crash never leaves a torn snapshot."""
+        header = {
+            'initial_capacity': self.initial_capacity,
+            'error_rate': self.error_rate,
+            'last_rowid': self.last_rowid,
+            'layers': [
+                {'capacity': layer.capacity, 'error_rate': layer.error_rate, 'count': layer.count}
+                for layer in self.layers
+            ]
+        }
+        temp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for layer in self.layers:
+                f.write(layer.bits)
+        os.replace(temp_path, path)
+    
+    @classmethod
+    def load(cls, path: Path) -> 'ScalableBloomFilter':
+        """Read a filter written by save()."""
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            bloom = cls(header['initial_capacity'], header['error_rate'])
+            bloom.last_rowid = header['last_rowid']
+            for layer_info in header['layers']:
+                layer = BloomFilter(layer_info['capacity'], layer_info['error_rate'], layer_info['count'])
+                layer.bits = bytearray(f.read(len(layer.bits)))
+                bloom.layers.append(layer)
+        return bloom
+
+
+class SeenSet:
+    """Disk-backed set of URLs seen by a crawl.
+    
+    A scalable Bloom filter answers most lookups in memory. With the exact
+    fallback, every URL is also kept in sqlite: Bloom hits are confirmed there,
+    so false positives never drop a URL, and the filter can be rebuilt after a
+    crash. Without it the filter is the only store and is snapshotted at
+    checkpoints.
+    """
+    
+    def __init__(
+        self,
+        directory: Path,
+        capacity: int = 1000000,
+        error_rate: float = 0.001,
+        exact: bool = True,
+        checkpoint_every: int = 10000
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.bloom_path = self.directory / 'seen.bloom'
+        self.exact = exact
+        self.checkpoint_every = checkpoint_every
+        self.logger = get_logger(__name__)
+        self._since_checkpoint = 0
+        
+        self.db = None
+        if exact:
+            self.db = sqlite3.connect(str(self.directory / 'seen.sqlite'))
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('PRAGMA synchronous=NORMAL')
+            self.db.execute('CREATE TABLE IF NOT EXISTS seen (id INTEGER PRIMARY KEY, digest BLOB UNIQUE NOT NULL)')
+            self.db.commit()
+        
+        if self.bloom_path.exists():
+            self.bloom = ScalableBloomFilter.load(self.bloom_path)
+        else:
+            self.bloom = ScalableBloomFilter(capacity, error_rate)
+        self._replay()
+    
+    @staticmethod
+    def digest(url: str) -> bytes:
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+    
+    def _replay(self):
+        """Add exact-store rows written after the last Bloom snapshot."""
+        if self.db is None:
+            return
+        rows = self.db.execute('SELECT id, digest FROM seen WHERE id > ? ORDER BY id', (self.bloom.last_rowid,))
+        replayed = 0
+        for rowid, digest in rows:
+            self.bloom.add(digest)
+            self.bloom.last_rowid = rowid
+            replayed += 1
+        if replayed:
+            self.logger.info(f"Replayed {replayed} seen URLs into the Bloom filter")
+    
+    def __contains__(self, url: str) -> bool:
+        digest = self.digest(url)
+        if digest not in self.bloom:
+            return False
+        if self.db is None:
+            return True
+        return self.db.execute('SELECT 1 FROM seen WHERE digest = ?', (digest,)).fetchone() is not None
+    
+    def add_new(self, urls: Iterable[str]) -> List[str]:
+        """Add URLs and return the ones not seen before, in order."""
+        with self.adding(urls) as new_urls:
+            return new_urls
+    
+    @contextmanager
+    def adding(self, urls: Iterable[str], limit: Optional[int] = None) -> Iterator[List[str]]:
+        """Yield up to `limit` unseen URLs, recording them as seen only if the block succeeds.
+        
+        With the exact store the new rows stay in an open transaction for the
+        block, so processes sharing the store wait rather than take the same
+        URLs, and a failure rolls them back.
+        """
+        new_urls, digests = [], {}
+        last_rowid = self.bloom.last_rowid
+        try:
+            for url in urls:
+                if limit is not None and len(new_urls) >= limit:
+                    break
+                digest = self.digest(url)
+                if digest in digests:
+                    continue
+                maybe_seen = digest in self.bloom
+                
+                if self.db is None:
+                    if maybe_seen:
+                        continue
+                else:
+                    if maybe_seen and self.db.execute('SELECT 1 FROM seen WHERE digest = ?', (digest,)).fetchone():
+                        continue
+                    # The unique index makes this exact even with several processes sharing the store
+                    cursor = self.db.execute('INSERT OR IGNORE INTO seen (digest) VALUES (?)', (digest,))
+                    if cursor.rowcount == 0:
+                        continue
+                    last_rowid = max(last_rowid, cursor.lastrowid)
+                
+                digests[digest] = None
+                new_urls.append(url)
+            
+            yield new_urls
+        except BaseException:
+            if self.db is not None:
+                self.db.rollback()
+            raise
+        
+        if self.db is not None:
+            self.db.commit()
+        for digest in digests:
+            self.bloom.add(digest)
+        self.bloom.last_rowid = last_rowid
+        
+        self._since_checkpoint += len(new_urls)
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+    
+    def __len__(self) -> int:
+        return len(self.bloom)
+    
+    def checkpoint(self):
+        """Snapshot the Bloom filter to disk."""
+        self.bloom.save(self.bloom_path)
+        self._since_checkpoint = 0
+    
+    def close(self):
+        """Checkpoint and release the exact store."""
+        self.checkpoint()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+class CrawlModel(Base):
+    """Crawl definition and progress, so workers can resume a crawl after a restart."""
+    __tablename__ = 'crawls'
+    
+    id = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    scraper_class = Column(String, nullable=False)
+    scope = Column(Text, nullable=False)  # JSON ScopeRules
+    pages_enqueued = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+@dataclass
+class Crawl:
+    """A loaded crawl: its definition plus the open seen-set."""
+    id: str
+    name: str
+    scraper_class: str
+    scope: ScopeRules
+    seen: SeenSet
+    pages_enqueued: int = 0
+
+
+class CrawlManager:
+    """Starts crawls and turns links discovered by scrapers into queue jobs."""
+    
+    def __init__(self, queue):
+        self.queue = queue
+        self.settings = get_settings()
+        self.config = self.settings.crawl
+        self.logger = get_logger(__name__)
+        self.crawls: Dict[str, Crawl] = {}
+        self.Session = get_session_factory(self.settings.database)
+    
+    def start_crawl(self, scraper_class: str, seeds: List[str], name: Optional[str] = None, **scope) -> str:
+        """Create a crawl and enqueue its seed URLs."""
+        canonical_seeds = [
+            url for url in (canonicalize_url(seed, self.config.tracking_params) for seed in seeds) if url
+        ]
+        if not canonical_seeds:
+            raise ValueError("No valid seed URLs")
+        
+        scope_options = {
+            'max_depth': self.config.max_depth,
+            'max_pages': self.config.max_pages,
+            'allow_subdomains': self.config.allow_subdomains,
+            'include_patterns': self.config.include_patterns,
+            'exclude_patterns': self.config.exclude_patterns,
+        }
+        scope_options.update(scope)
+        if self.config.same_host and 'allowed_hosts' not in scope:
+            scope_options['allowed_hosts'] = sorted({urlsplit(url).hostname for url in canonical_seeds})
+        rules = ScopeRules(**scope_options)
+        
+        crawl_id = str(uuid.uuid4())
+        session = self.Session()
+        session.add(CrawlModel(
+            id=crawl_id,
+            name=name or f"crawl-{crawl_id[:8]}",
+            scraper_class=scraper_class,
+            scope=json.dumps(rules.to_dict())
+        ))
+        session.commit()
+        session.close()
+        
+        crawl = self.get_crawl(crawl_id)
+        enqueued = self._enqueue(crawl, canonical_seeds, depth=0)
+        self.logger.info(f"Started crawl {crawl_id} with {enqueued} seed URLs")
+        return crawl_id
+    
+    def get_crawl(self, crawl_id: str) -> Optional[Crawl]:
+        """Load a crawl and open its seen-set, reusing it if already loaded."""
+        if crawl_id in self.crawls:
+            return self.crawls[crawl_id]
+        
+        session = self.Session()
+        model = session.query(CrawlModel).filter_by(id=crawl_id).first()
+        session.close()
+        if model is None:
+            return None
+        
+        crawl = Crawl(
+            id=model.id,
+            name=model.name,
+            scraper_class=model.scraper_class,
+            scope=ScopeRules(**json.loads(model.scope)),
+            seen=SeenSet(
+                Path(self.config.state_dir) / model.id,
+                capacity=self.config.bloom_capacity,
+                error_rate=self.config.bloom_error_rate,
+                exact=self.config.exact_seen,
+                checkpoint_every=self.config.checkpoint_every
+            ),
+            pages_enqueued=model.pages_enqueued or 0
+        )
+        self.crawls[crawl_id] = crawl
+        return crawl
+    
+    def enqueue_links(self, job, links: Iterable[str]) -> int:
+        """Enqueue in-scope, unseen links discovered on a crawl job's page."""
+        metadata = job.metadata or {}
+        crawl = self.get_crawl(metadata.get('crawl_id'))
+        if crawl is None:
+            return 0
+        
+        depth = metadata.get('depth', 0) + 1
+        candidates = []
+        for link in links:
+            url = canonicalize_url(link, self.config.tracking_params)
+            if url and crawl.scope.allows(url, depth):
+                candidates.append(url)
+        
+        enqueued = self._enqueue(crawl, candidates, depth, parent=job.url)
+        if enqueued:
+            self.logger.info(f"Crawl {crawl.id}: enqueued {enqueued} links from {job.url} at depth {depth}")
+        return enqueued
+    
+    def _enqueue(self, crawl: Crawl, urls: List[str], depth: int, parent: Optional[str] = None) -> int:
+        """Add unseen URLs as jobs, up to the crawl's page budget."""
+        urls = list(dict.fromkeys(urls))
+        reserved = self._reserve_pages(crawl, len(urls)) if urls else 0
+        if not reserved:
+            return 0
+        
+        enqueued = 0
+        try:
+            # URLs count as seen only once their jobs are stored, so a failed
+            # insert leaves them to be discovered again
+            with crawl.seen.adding(urls, limit=reserved) as new_urls:
+                if new_urls:
+                    self.queue.add_jobs([
+                        {
+                            'name': f"{crawl.name} d{depth}",
+                            'url': url,
+                            'scraper_class': crawl.scraper_class,
+                            # Breadth-first: shallower pages run first
+                            'priority': -depth,
+                            'metadata': {'crawl_id': crawl.id, 'depth': depth, 'parent': parent}
+                        }
+                        for url in new_urls
+                    ])
+                enqueued = len(new_urls)
+        finally:
+            if enqueued < reserved:
+                self._release_pages(crawl, reserved - enqueued)
+        return enqueued
+    
+    def _reserve_pages(self, crawl: Crawl, wanted: int) -> int:
+        """Take up to `wanted` pages from the crawl's budget in the database; return how many.
+        
+        The budget is shared by every worker and process feeding the crawl, so
+        it is read and debited with a compare-and-set on the stored count.
+        """
+        session = self.Session()
+        try:
+            while True:
+                enqueued = session.query(CrawlModel.pages_enqueued).filter_by(id=crawl.id).scalar() or 0
+                granted = min(wanted, crawl.scope.max_pages - enqueued)
+                if granted <= 0:
+                    crawl.pages_enqueued = enqueued
+                    return 0
+                
+                updated = session.query(CrawlModel).filter(
+                    CrawlModel.id == crawl.id,
+                    CrawlModel.pages_enqueued == enqueued
+                ).update({
+                    'pages_enqueued': enqueued + granted,
+                    'updated_at': datetime.utcnow()
+                }, synchronize_session=False)
+                session.commit()
+                if updated:
+                    crawl.pages_enqueued = enqueued + granted
+                    return granted
+        finally:
+            session.close()
+    
+    def _release_pages(self, crawl: Crawl, count: int):
+        """Give back budget reserved for pages that were not enqueued."""
+        try:
+            session = self.Session()
+            session.query(CrawlModel).filter_by(id=crawl.id).update({
+                'pages_enqueued': CrawlModel.pages_enqueued - count,
+                'updated_at': datetime.utcnow()
+            }, synchronize_session=False)
+            session.commit()
+            session.close()
+            crawl.pages_enqueued -= count
+        except Exception as e:
+            self.logger.error(f"Failed to release page budget for crawl {crawl.id}: {e}")
+    
+    def get_crawl_stats(self, crawl_id: str) -> Dict[str, Any]:
+        """Get the crawl's scope and progress."""
+        crawl = self.get_crawl(crawl_id)
+        if crawl is None:
+            return {}
+        
+        # Other workers enqueue into the same crawl
+        session = self.Session()
+        crawl.pages_enqueued = session.query(CrawlModel.pages_enqueued).filter_by(id=crawl.id).scalar() or 0
+        session.close()
+        return {
+            'id': crawl.id,
+            'name': crawl.name,
+            'scraper_class': crawl.scraper_class,
+            'pages_enqueued': crawl.pages_enqueued,
+            'seen_urls': len(crawl.seen),
+            'scope': crawl.scope.to_dict()
+        }
+    
+    def close(self):
+        """Checkpoint and close every loaded crawl."""
+        for crawl in self.crawls.values():
+            try:
+                crawl.seen.close()
+            except Exception as e:
+                self.logger.error(f"Failed to checkpoint crawl {crawl.id}: {e}")
+        self.crawls.clear()
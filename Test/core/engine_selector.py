@@ -0,0 +1,318 @@
+"""
+Per-domain engine selection (HTTP vs browser) learned from extraction history.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from sqlalchemy import Column, String, DateTime, Integer
+from config.settings import get_settings
+from utils.logger import get_logger
+from storage.engine import Base, get_session_factory
+from utils.helpers import extract_domain
+from .change_detection import PageUnchanged
+from .errors import CircuitOpenError, RobotsDisallowedError
+from .http_scraper import HttpScraper
+from .scraper import result_records
+
+
+class EngineStatsModel(Base):
+    """Engine comparison history per domain and scraper class."""
+    __tablename__ = 'engine_stats'
+    
+    domain = Column(String, primary_key=True)
+    scraper_class = Column(String, primary_key=True)
+    probes = Column(Integer, default=0)  # jobs where both engines ran
+    http_matches = Column(Integer, default=0)  # probes where HTTP matched the browser yield
+    runs_since_probe = Column(Integer, default=0)
+    http_failures = Column(Integer, default=0)
+    last_browser_yield = Column(Integer, default=0)
+    last_probe_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+def extraction_yield(result: Any) -> int:
+    """Count the records a scrape produced."""
+    return len(result_records(result))
+
+
+class EngineSelector:
+    """Routes jobs to the cheapest engine that produces the same extraction yield."""
+    
+    HTTP = 'http'
+    BROWSER = 'browser'
+    PROBE = 'probe'
+    
+    def __init__(self):
+        self.settings = get_settings()
+        self.config = self.settings.engine_selection
+        self.logger = get_logger(__name__)
+        self.Session = get_session_factory(self.settings.database)
+    
+    def choose(self, url: str, scraper_class: str) -> str:
+        """Decide whether to run HTTP, the browser, or both to compare them."""
+        stats = self._get_stats(extract_domain(url), scraper_class)
+        
+        if stats is None or stats['probes'] < self.config.min_samples:
+            return self.PROBE
+        
+        if self._probe_due(stats):
+            return self.PROBE
+        
+        if stats['http_matches'] / stats['probes'] >= self.config.match_threshold:
+            return self.HTTP
+        return self.BROWSER
+    
+    def _probe_due(self, stats: Dict[str, Any]) -> bool:
+        """Check whether it is time to compare both engines again."""
+        if stats['runs_since_probe'] >= self.config.reprobe_every:
+            return True
+        last_probe_at = stats['last_probe_at']
+        interval = timedelta(hours=self.config.reprobe_interval_hours)
+        return last_probe_at is None or datetime.utcnow() - last_probe_at > interval
+    
+    async def run(self, url: str, scraper_class: str, create_scraper: Callable[[str], Any]) -> Any:
+        """Run a scrape on the selected engine and learn from the outcome."""
+        # create_scraper(engine) returns an uninitialized scraper for that engine
+        decision = self.choose(url, scraper_class)
+        domain = extract_domain(url)
+        
+        if decision == self.BROWSER:
+            self.record_run(domain, scraper_class)
+            result, _ = await self._run_engine(create_scraper(self.BROWSER), url)
+            return result
+        
+        if decision == self.HTTP:
+            failed, fell_back, result = False, False, None
+            try:
+                result, fell_back = await self._run_engine(create_scraper(self.HTTP), url)
+            except PageUnchanged:
+                self.record_run(domain, scraper_class)
+                raise
+            except (CircuitOpenError, RobotsDisallowedError):
+                # The browser would be turned away by the same breaker or robots.txt
+                raise
+            except Exception as e:
+                self.logger.info(f"HTTP engine failed for {domain}: {e}")
+                failed = True
+            
+            if failed or fell_back or self._empty_http_yield(domain, scraper_class, extraction_yield(result)):
+                # HTTP stopped working for this site; count it against HTTP
+                self.record_http_failure(domain, scraper_class)
+                if not fell_back:
+                    result, _ = await self._run_engine(create_scraper(self.BROWSER), url)
+                return result
+            
+            self.record_run(domain, scraper_class)
+            return result
+        
+        return await self._probe(url, scraper_class, create_scraper)
+    
+    async def run_iter(
+        self,
+        url: str,
+        scraper_class: str,
+        create_scraper: Callable[[str], Any]
+    ) -> AsyncIterator[Any]:
+        """Stream records from the selected engine and learn from the outcome."""
+        decision = self.choose(url, scraper_class)
+        domain = extract_domain(url)
+        
+        if decision == self.PROBE:
+            # Probes compare complete results, so they are not streamed
+            for record in result_records(await self._probe(url, scraper_class, create_scraper)):
+                yield record
+            return
+        
+        count, fell_back = 0, False
+        try:
+            scraper = create_scraper(decision)
+            async with scraper:
+                async for record in scraper.run_iter(url):
+                    count += 1
+                    yield record
+                fell_back = isinstance(scraper, HttpScraper) and scraper.uses_browser
+        except PageUnchanged:
+            self.record_run(domain, scraper_class)
+            raise
+        except (CircuitOpenError, RobotsDisallowedError):
+            raise
+        except Exception as e:
+            if decision != self.HTTP or count:
+                raise
+            # Nothing was emitted yet, so the browser can take over cleanly
+            self.logger.info(f"HTTP engine failed for {domain}: {e}")
+            self.record_http_failure(domain, scraper_class)
+            async for record in self._stream_engine(create_scraper(self.BROWSER), url):
+                yield record
+            return
+        
+        if decision == self.HTTP:
+            if fell_back:
+                self.record_http_failure(domain, scraper_class)
+                return
+            if self._empty_http_yield(domain, scraper_class, count):
+                # Nothing was emitted, so the browser can still fill in this page
+                self.record_http_failure(domain, scraper_class)
+                async for record in self._stream_engine(create_scraper(self.BROWSER), url):
+                    yield record
+                return
+        self.record_run(domain, scraper_class)
+    
+    def _empty_http_yield(self, domain: str, scraper_class: str, http_yield: int) -> bool:
+        """Check for an HTTP run that found nothing on a domain where the browser finds records.
+        
+        Pages on a domain legitimately yield different counts, so a single-engine
+        run is only compared with the browser when it came back empty; yields are
+        compared in full only by probes, where both engines fetch the same page.
+        """
+        if http_yield:
+            return False
+        stats = self._get_stats(domain, scraper_class) or {}
+        return stats.get('last_browser_yield', 0) > 0
+    
+    async def _probe(self, url: str, scraper_class: str, create_scraper: Callable[[str], Any]) -> Any:
+        """Run both engines, compare their yields and return the browser result."""
+        domain = extract_domain(url)
+        http_yield = None
+        try:
+            http_result, fell_back = await self._run_engine(create_scraper(self.HTTP), url)
+            if not fell_back:
+                http_yield = extraction_yield(http_result)
+        except (PageUnchanged, CircuitOpenError, RobotsDisallowedError):
+            # Nothing to compare; probe again on the next reachable, changed page
+            raise
+        except Exception as e:
+            self.logger.debug(f"HTTP probe failed for {domain}: {e}")
+        
+        browser_result, _ = await self._run_engine(create_scraper(self.BROWSER), url)
+        self.record_probe(domain, scraper_class, http_yield, extraction_yield(browser_result))
+        return browser_result
+    
+    async def _stream_engine(self, scraper, url: str) -> AsyncIterator[Any]:
+        """Stream records from a scraper."""
+        async with scraper:
+            async for record in scraper.run_iter(url):
+                yield record
+    
+    async def _run_engine(self, scraper, url: str) -> Tuple[Any, bool]:
+        """Run a scraper and report whether it fell back to the browser."""
+        async with scraper:
+            result = await scraper.run(url)
+            fell_back = isinstance(scraper, HttpScraper) and scraper.uses_browser
+        return result, fell_back
+    
+    def record_probe(self, domain: str, scraper_class: str, http_yield: Optional[int], browser_yield: int):
+        """Record a comparison of both engines on the same page."""
+        matched = http_yield is not None and http_yield >= browser_yield
+        
+        def update(model: EngineStatsModel):
+            model.probes += 1
+            if matched:
+                model.http_matches += 1
+            model.runs_since_probe = 0
+            model.last_browser_yield = browser_yield
+            model.last_probe_at = datetime.utcnow()
+        
+        self._update_stats(domain, scraper_class, update)
+        self.logger.info(
+            f"Engine probe for {domain}/{scraper_class}: http={http_yield} browser={browser_yield} "
+            f"({'match' if matched else 'mismatch'})"
+        )
+    
+    def record_run(self, domain: str, scraper_class: str):
+        """Record a job that ran on a single engine."""
+        def update(model: EngineStatsModel):
+            model.runs_since_probe += 1
+        
+        self._update_stats(domain, scraper_class, update)
+    
+    def record_http_failure(self, domain: str, scraper_class: str):
+        """Record an HTTP run that no longer matched the browser."""
+        def update(model: EngineStatsModel):
+            model.http_failures += 1
+            # Counts as a failed comparison so the domain drops back to the browser
+            model.probes += 1
+            model.runs_since_probe += 1
+        
+        self._update_stats(domain, scraper_class, update)
+        self.logger.info(f"HTTP engine underperformed for {domain}/{scraper_class}")
+    
+    def _get_stats(self, domain: str, scraper_class: str) -> Optional[Dict[str, Any]]:
+        """Get stored stats for a domain and scraper class."""
+        try:
+            session = self.Session()
+            model = session.query(EngineStatsModel).filter_by(
+                domain=domain,
+                scraper_class=scraper_class
+            ).first()
+            session.close()
+            
+            if model is None:
+                return None
+            return {
+                'probes': model.probes,
+                'http_matches': model.http_matches,
+                'runs_since_probe': model.runs_since_probe,
+                'http_failures': model.http_failures,
+                'last_browser_yield': model.last_browser_yield,
+                'last_probe_at': model.last_probe_at
+            }
+        except Exception as e:
+            self.logger.error(f"Failed to get engine stats for {domain}: {e}")
+            return None
+    
+    def _update_stats(self, domain: str, scraper_class: str, update: Callable[[EngineStatsModel], None]):
+        """Apply an update to the stats row, creating it if needed."""
+        try:
+            session = self.Session()
+            model = session.query(EngineStatsModel).filter_by(
+                domain=domain,
+                scraper_class=scraper_class
+            ).first()
+            
+            if model is None:
+                model = EngineStatsModel(
+                    domain=domain,
+                    scraper_class=scraper_class,
+                    probes=0,
+                    http_matches=0,
+                    runs_since_probe=0,
+                    http_failures=0,
+                    last_browser_yield=0
+                )
+                session.add(model)
+            
+            update(model)
+            model.updated_at = datetime.utcnow()
+            session.commit()
+            session.close()
+        
+        except Exception as e:
+            self.logger.error(f"Failed to update engine stats for {domain}: {e}")
+    
+    def get_engine_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the preferred engine and history for every known domain."""
+        try:
+            session = self.Session()
+            models = session.query(EngineStatsModel).all()
+            session.close()
+            
+            stats = {}
+            for model in models:
+                ratio = model.http_matches / model.probes if model.probes else 0.0
+                preferred = (
+                    self.HTTP
+                    if model.probes >= self.config.min_samples and ratio >= self.config.match_threshold
+                    else self.BROWSER
+                )
+                stats[f"{model.domain}/{model.scraper_class}"] = {
+                    'preferred': preferred,
+                    'probes': model.probes,
+                    'http_match_ratio': ratio,
+                    'http_failures': model.http_failures
+                }
+            return stats
+        
+        except Exception as e:
+            self.logger.error(f"Failed to get engine stats: {e}")
+            return {}
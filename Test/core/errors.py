@@ -0,0 +1,207 @@
+"""
+Navigation error taxonomy: retryable, permanent and throttled failures.
+"""
+
+import asyncio
+import socket
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+import aiohttp
+from utils.timing import phase
+
+
+RETRYABLE = 'retryable'
+PERMANENT = 'permanent'
+THROTTLED = 'throttled'
+
+# Browser network errors that another attempt will not fix, and whether
+# they mean the whole domain is unreachable rather than just this page
+PERMANENT_NETWORK_ERRORS = {
+    'ERR_NAME_NOT_RESOLVED': True,
+    'ERR_NAME_RESOLUTION_FAILED': True,
+    'ERR_ADDRESS_UNREACHABLE': True,
+    'ERR_CERT_': True,
+    'ERR_SSL_': True,
+    'ERR_BAD_SSL_CLIENT_AUTH_CERT': True,
+    'ERR_TOO_MANY_REDIRECTS': False,
+    'ERR_INVALID_URL': False,
+    'ERR_UNKNOWN_URL_SCHEME': False,
+    'ERR_BLOCKED_BY_CLIENT': False,
+    'ERR_INVALID_RESPONSE': False,
+}
+
+
+class NavigationError(Exception):
+    """A failed navigation, classified by whether another attempt can succeed.
+    
+    `domain_down` marks failures that say the site rather than the page is
+    unavailable; only those count towards the domain's circuit breaker.
+    """
+    
+    kind = RETRYABLE
+    
+    def __init__(
+        self,
+        url: str,
+        message: str,
+        status: Optional[int] = None,
+        domain_down: bool = True,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(f"{message} ({url})")
+        self.url = url
+        self.status = status
+        self.domain_down = domain_down
+        self.retry_after = retry_after
+
+
+class RetryableError(NavigationError):
+    """Transient failure: timeouts, dropped connections, 5xx responses."""
+    kind = RETRYABLE
+
+
+class PermanentError(NavigationError):
+    """Failure that retrying will not fix: unknown host, bad certificate, 4xx responses."""
+    kind = PERMANENT
+
+
+class ThrottledError(NavigationError):
+    """The site asked us to slow down (429, 503); retry after `retry_after` seconds."""
+    kind = THROTTLED
+
+
+class CircuitOpenError(PermanentError):
+    """Raised without a request while a domain's circuit breaker is open."""
+    
+    def __init__(self, url: str, domain: str, retry_in: float):
+        super().__init__(url, f"Circuit open for {domain}, retry in {retry_in:.0f}s", domain_down=False)
+        self.domain = domain
+        self.retry_in = retry_in
+
+
+class RobotsDisallowedError(PermanentError):
+    """Raised without a request when robots.txt disallows the URL."""
+    
+    def __init__(self, url: str):
+        super().__init__(url, "Disallowed by robots.txt", domain_down=False)
+
+
+def error_kind(error: BaseException) -> str:
+    """Label an error for metrics: a NavigationError kind, 'circuit_open', 'robots_disallowed' or 'other'."""
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(error, RobotsDisallowedError):
+        return 'robots_disallowed'
+    if isinstance(error, NavigationError):
+        return error.kind
+    return 'other'
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_status(url: str, status: int, headers: Optional[Dict[str, str]] = None) -> NavigationError:
+    """Classify an HTTP error status."""
+    headers = {key.lower(): value for key, value in (headers or {}).items()}
+    message = f"HTTP {status}"
+    
+    if status in (429, 503):
+        # A 429 is the site pacing us, which the rate limiter answers; only a 503 says it is unavailable
+        return ThrottledError(
+            url, message, status, domain_down=status == 503, retry_after=parse_retry_after(headers.get('retry-after'))
+        )
+    if status in (408, 425) or status >= 500:
+        return RetryableError(url, message, status)
+    # A 403 is usually a block of the whole site; other 4xx are about this page
+    return PermanentError(url, message, status, domain_down=status == 403)
+
+
+def classify_exception(url: str, error: BaseException) -> NavigationError:
+    """Classify an exception raised by Playwright or aiohttp while navigating."""
+    if isinstance(error, NavigationError):
+        return error
+    
+    message = str(error).splitlines()[0] if str(error) else type(error).__name__
+    
+    if isinstance(error, (aiohttp.ClientConnectorCertificateError, aiohttp.ClientSSLError)):
+        return PermanentError(url, message)
+    if isinstance(error, aiohttp.ClientConnectorError) and isinstance(error.os_error, socket.gaierror):
+        return PermanentError(url, message)
+    if isinstance(error, (aiohttp.TooManyRedirects, aiohttp.InvalidURL)):
+        return PermanentError(url, message, domain_down=False)
+    if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError)):
+        return RetryableError(url, message)
+    
+    # Playwright reports network failures as net::ERR_* inside the message
+    for marker, domain_down in PERMANENT_NETWORK_ERRORS.items():
+        if marker in message:
+            return PermanentError(url, message, domain_down=domain_down)
+    return RetryableError(url, message)
+
+
+async def _wait_to_retry(wait_time: float, before_retry: Optional[Callable[[], Awaitable]]):
+    """Back off, then wait for the rate limiter to allow the retry."""
+    with phase('retry_wait'):
+        await asyncio.sleep(wait_time)
+    if before_retry is not None:
+        with phase('rate_limit'):
+            await before_retry()
+
+
+async def retry_navigation(
+    func: Callable,
+    url: str,
+    *args,
+    max_retries: int = 3,
+    delay: float = 1.0,
+    backoff_factor: float = 2.0,
+    max_retry_after: float = 60.0,
+    circuit=None,
+    concurrency=None,
+    before_retry: Optional[Callable[[], Awaitable]] = None,
+    **kwargs
+) -> Any:
+    """Retry func(url, *args) by the class of the error it raises.
+    
+    Permanent errors are raised at once. Retryable errors back off
+    exponentially. Throttled errors wait for Retry-After unless it exceeds
+    max_retry_after. Retrying stops early when `circuit` opens meanwhile.
+    The caller's slot in the `concurrency` limiter is given up while it waits.
+    `before_retry` is awaited after the backoff, before each retry; callers
+    pass the rate limiter's wait_for_token so retries are paced and counted
+    like any other request.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return await func(url, *args, **kwargs)
+        except Exception as e:
+            error = classify_exception(url, e)
+            wait_time = delay * (backoff_factor ** attempt)
+            if error.kind == THROTTLED and error.retry_after is not None:
+                wait_time = max(wait_time, error.retry_after)
+            
+            too_long = error.kind == THROTTLED and wait_time > max_retry_after
+            if error.kind == PERMANENT or attempt == max_retries or too_long:
+                if error is e:
+                    raise
+                raise error from e
+            
+            if concurrency is not None:
+                async with concurrency.released(url):
+                    await _wait_to_retry(wait_time, before_retry)
+            else:
+                await _wait_to_retry(wait_time, before_retry)
+            
+            if circuit is not None:
+                circuit.check(url)
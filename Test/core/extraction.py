@@ -0,0 +1,116 @@
+"""
+Bulk in-page extraction: field specs and the script that resolves them in one call.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+from utils.helpers import clean_text
+
+
+FieldSpec = Union[Optional[str], Tuple[str, str], Dict[str, Any]]
+
+
+# Runs in the page: for each container, try each field's candidate selectors in
+# order and keep the first non-empty value (or values, for multiple fields).
+# An empty selector means the container itself.
+READ_ITEMS_JS = """
+(containers, fields) => {
+    const read = (element, attribute) => {
+        const value = attribute ? element.getAttribute(attribute) : element.innerText;
+        return value || '';
+    };
+    return containers.map(container => {
+        const item = {};
+        for (const field of fields) {
+            let value = field.multiple ? [] : '';
+            for (const selector of field.selectors) {
+                const elements = selector
+                    ? (field.multiple ? Array.from(container.querySelectorAll(selector)) : [container.querySelector(selector)])
+                    : [container];
+                const values = elements.filter(Boolean).map(element => read(element, field.attribute));
+                const found = values.filter(candidate => candidate.trim());
+                if (found.length) {
+                    value = field.multiple ? found : found[0];
+                    break;
+                }
+            }
+            item[field.name] = value;
+        }
+        return item;
+    });
+}
+"""
+
+EXTRACT_ITEMS_JS = (
+    f"(containerSelector, fields) => ({READ_ITEMS_JS.strip()})"
+    f"(Array.from(document.querySelectorAll(containerSelector)), fields)"
+)
+
+# Extracts only containers not returned by an earlier call with the same key.
+# Containers are remembered in a WeakSet, so virtualized lists that recycle
+# nodes and a fresh document after navigation both behave correctly.
+EXTRACT_NEW_ITEMS_SCRIPT = f"""
+([containerSelector, fields, key]) => {{
+    const seen = window[key] || (window[key] = new WeakSet());
+    const fresh = Array.from(document.querySelectorAll(containerSelector)).filter(container => !seen.has(container));
+    fresh.forEach(container => seen.add(container));
+    return ({READ_ITEMS_JS.strip()})(fresh, fields);
+}}
+"""
+
+HAS_NEW_ITEMS_SCRIPT = """
+([containerSelector, key]) => {
+    const seen = window[key];
+    return Array.from(document.querySelectorAll(containerSelector)).some(container => !(seen && seen.has(container)));
+}
+"""
+
+EXTRACT_MANY_SCRIPT = f"([containerSelector, fields]) => ({EXTRACT_ITEMS_JS.strip()})(containerSelector, fields)"
+
+
+def build_extract_script(container_selector: str, field_specs: List[Dict[str, Any]]) -> str:
+    """Compile a container selector and field specs into a self-contained page function."""
+    return (
+        f"() => ({EXTRACT_ITEMS_JS.strip()})"
+        f"({json.dumps(container_selector)}, {json.dumps(field_specs)})"
+    )
+
+
+def normalize_fields(fields: Dict[str, FieldSpec]) -> List[Dict[str, Any]]:
+    """Turn the field shorthand accepted by extract_many into explicit specs."""
+    specs = []
+    for name, spec in fields.items():
+        if spec is None or isinstance(spec, str):
+            selectors, attribute = [spec or ""], None
+        elif isinstance(spec, tuple):
+            selectors, attribute = [spec[0] or ""], spec[1]
+        elif isinstance(spec, dict):
+            selectors = spec.get('selectors') or [spec.get('selector') or ""]
+            attribute = spec.get('attribute')
+        else:
+            raise ValueError(f"Invalid field spec for {name}: {spec!r}")
+        specs.append({
+            'name': name,
+            'selectors': list(selectors),
+            'attribute': attribute,
+            'multiple': bool(isinstance(spec, dict) and spec.get('multiple'))
+        })
+    return specs
+
+
+def clean_value(value: str, attribute: Optional[str]) -> str:
+    """Normalize whitespace in text and trim attribute values."""
+    value = value or ""
+    return value.strip() if attribute else clean_text(value)
+
+
+def clean_item(item: Dict[str, Any], field_specs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Clean every field of an extracted item."""
+    cleaned = {}
+    for spec in field_specs:
+        value = item.get(spec['name'])
+        if spec.get('multiple'):
+            cleaned[spec['name']] = [clean_value(entry, spec['attribute']) for entry in value or []]
+        else:
+            cleaned[spec['name']] = clean_value(value, spec['attribute'])
+    return cleaned
@@ -0,0 +1,453 @@
+"""
+Lightweight HTTP scraper engine with the same extraction API as BaseScraper.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Union
+from urllib.parse import urljoin
+import aiohttp
+from bs4 import BeautifulSoup
+from fake_useragent import UserAgent
+from config.settings import get_settings
+from utils.logger import get_logger
+from utils.helpers import clean_text, is_valid_url
+from utils.timing import phase, timed
+from .scraper import BaseScraper
+from .extraction import normalize_fields
+from .navigation import ReadyCondition
+from .capture import ResponseCapture
+from .errors import classify_status, retry_navigation
+from .schema import ExtractionSchema
+from .rate_limiter import get_rate_limiter
+
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Elements whose text a browser never renders
+NON_RENDERED_TAGS = {'script', 'style', 'noscript', 'template'}
+
+
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Get the pooled HTTP session shared by scrapers in this process."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        settings = get_settings()
+        connector = aiohttp.TCPConnector(
+            limit=settings.http.max_connections,
+            limit_per_host=settings.http.max_connections_per_host,
+            ttl_dns_cache=settings.http.dns_cache_ttl
+        )
+        _http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=settings.http.timeout),
+            headers={
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9',
+            }
+        )
+    return _http_session
+
+
+async def close_http_session():
+    """Close the shared HTTP session if it was opened."""
+    global _http_session
+    if _http_session is not None:
+        session = _http_session
+        _http_session = None
+        await session.close()
+
+
+class HttpScraper(BaseScraper):
+    """Scraper engine that fetches pages over HTTP and parses them with lxml."""
+    
+    # Selectors that must exist in the raw HTML; if any is missing the
+    # scraper falls back to rendering the page in the browser
+    required_selectors: List[str] = []
+    
+    def __init__(self, name: str = None):
+        super().__init__(name)
+        self.engine = 'http'
+        self.session = None
+        self.document = None
+        self.html = ""
+        self.current_url = None
+        self.user_agent = DEFAULT_USER_AGENT
+        self._paginated_documents: Dict[str, Any] = {}
+    
+    @property
+    def uses_browser(self) -> bool:
+        """Whether this scraper has fallen back to the browser engine."""
+        return self.engine == 'browser'
+    
+    @timed('setup')
+    async def initialize(self):
+        """Initialize the HTTP engine; the browser is only started on fallback."""
+        self.logger.info(f"Initializing HTTP scraper: {self.name}")
+        self.rate_limiter = get_rate_limiter()
+        self.session = await get_http_session()
+        
+        if self.settings.browser.user_agent_rotation:
+            try:
+                self.user_agent = UserAgent().random
+            except Exception:
+                self.user_agent = DEFAULT_USER_AGENT
+    
+    @timed('teardown')
+    async def cleanup(self):
+        """Cleanup scraper resources."""
+        self.document = None
+        if self.uses_browser:
+            await super().cleanup()
+    
+    async def navigate(self, url: str, wait_until: str = "networkidle", ready: Optional[ReadyCondition] = None):
+        """Fetch URL over HTTP, falling back to the browser if required selectors are missing."""
+        if self.uses_browser:
+            return await super().navigate(url, wait_until, ready)
+        
+        if not is_valid_url(url):
+            raise ValueError(f"Invalid URL: {url}")
+        
+        check = self.change_check if self.change_check is not None and self.change_check.url == url else None
+        request_headers = check.conditional_headers() if check else {}
+        
+        with self.circuit_breaker.guard(url) as circuit:
+            with phase('rate_limit'):
+                await self.rate_limiter.wait_for_token(url)
+            
+            async with self.concurrency.slot(url):
+                with phase('fetch'):
+                    status, html, headers, final_url = await retry_navigation(
+                        self._fetch_ok,
+                        url,
+                        request_headers,
+                        max_retries=self.settings.scraping.max_retries,
+                        delay=self.settings.scraping.retry_delay,
+                        max_retry_after=self.settings.scraping.max_retry_after,
+                        circuit=circuit,
+                        concurrency=self.concurrency,
+                        before_retry=lambda: self.rate_limiter.wait_for_token(url)
+                    )
+        
+        if check:
+            self.change_check = None
+            with phase('change_check'):
+                check.observe('http', status, headers, html)
+        
+        self.response_status = status
+        self.response_headers = headers
+        self.current_url = final_url
+        self.html = html
+        with phase('parse'):
+            self.document = BeautifulSoup(html, 'lxml')
+        
+        missing = [selector for selector in self.required_selectors if not self.document.select_one(selector)]
+        if missing:
+            self.logger.info(f"Required selectors {missing} missing from HTML of {url}, falling back to browser")
+            await self._fallback_to_browser()
+            return await super().navigate(url, wait_until, ready)
+        
+        self.logger.info(f"Fetched {url} over HTTP ({len(html)} bytes)")
+        return self.document
+    
+    async def capture_responses(
+        self,
+        pattern: Union[str, Pattern],
+        resource_types: Optional[Sequence[str]] = ('xhr', 'fetch'),
+        max_body_bytes: Optional[int] = None,
+        max_responses: Optional[int] = None
+    ) -> ResponseCapture:
+        """API responses only exist when a browser runs the page, so switch to the browser first."""
+        if not self.uses_browser:
+            self.logger.info("Response capture needs a browser, switching from the HTTP engine")
+            await self._fallback_to_browser()
+        return await super().capture_responses(pattern, resource_types, max_body_bytes, max_responses)
+    
+    async def _fetch_ok(self, url: str, extra_headers: Optional[Dict[str, str]] = None):
+        """Fetch a URL, raising a classified NavigationError for error statuses."""
+        started = time.monotonic()
+        try:
+            status, html, headers, final_url = await self._fetch(url, extra_headers)
+        except asyncio.TimeoutError:
+            self._record_response(url, None, time.monotonic() - started)
+            raise
+        self._record_response(url, status, time.monotonic() - started, headers)
+        if status >= 400:
+            raise classify_status(url, status, headers)
+        return status, html, headers, final_url
+    
+    async def _fetch(self, url: str, extra_headers: Optional[Dict[str, str]] = None):
+        """Fetch a URL with the pooled session."""
+        self.logger.info(f"Fetching: {url}")
+        headers = {'User-Agent': self.user_agent, **(extra_headers or {})}
+        async with self.session.get(url, headers=headers) as response:
+            html = await response.text(errors='replace')
+            return response.status, html, dict(response.headers), str(response.url)
+    
+    async def _fallback_to_browser(self):
+        """Switch this scraper to the browser engine."""
+        self.engine = 'browser'
+        self.document = None
+        await super().initialize()
+    
+    def _inner_text(self, element) -> str:
+        """Approximate innerText by skipping text that is never rendered."""
+        parts = [
+            text for text in element.find_all(string=True)
+            if text.parent.name not in NON_RENDERED_TAGS
+        ]
+        return clean_text(' '.join(parts))
+    
+    @staticmethod
+    def _attribute_value(element, attribute: str) -> str:
+        """Get an attribute value as the DOM would report it."""
+        value = element.get(attribute)
+        if isinstance(value, list):
+            return ' '.join(value)
+        return value or ""
+    
+    @timed('selector_wait')
+    async def wait_for_selector(
+        self,
+        selector: str,
+        timeout: Optional[int] = None,
+        state: str = "visible"
+    ) -> bool:
+        """Check whether an element exists in the fetched HTML."""
+        if self.uses_browser:
+            return await super().wait_for_selector(selector, timeout, state)
+        return self.document is not None and self.document.select_one(selector) is not None
+    
+    @timed('selector_wait')
+    async def wait_for_any(
+        self,
+        selectors: List[str],
+        timeout: Optional[int] = None,
+        state: str = "visible"
+    ) -> Optional[str]:
+        """Return the first candidate selector present in the fetched HTML."""
+        if self.uses_browser:
+            return await super().wait_for_any(selectors, timeout, state)
+        if self.document is None:
+            return None
+        return next((selector for selector in selectors if self.document.select_one(selector)), None)
+    
+    @timed('selector_wait')
+    async def wait_for_load(self, timeout: Optional[int] = None):
+        """Nothing to wait for once the HTML is fetched."""
+        if self.uses_browser:
+            await super().wait_for_load(timeout)
+    
+    @timed('extract')
+    async def get_text(self, selector: str) -> str:
+        """Get text content from element."""
+        if self.uses_browser:
+            return await super().get_text(selector)
+        element = self.document.select_one(selector) if self.document else None
+        return self._inner_text(element) if element else ""
+    
+    @timed('extract')
+    async def get_texts(self, selector: str) -> List[str]:
+        """Get text content from multiple elements."""
+        if self.uses_browser:
+            return await super().get_texts(selector)
+        if not self.document:
+            return []
+        return [self._inner_text(element) for element in self.document.select(selector)]
+    
+    @timed('extract')
+    async def get_attribute(self, selector: str, attribute: str) -> str:
+        """Get attribute value from element."""
+        if self.uses_browser:
+            return await super().get_attribute(selector, attribute)
+        element = self.document.select_one(selector) if self.document else None
+        return self._attribute_value(element, attribute) if element else ""
+    
+    @timed('extract')
+    async def get_attributes(self, selector: str, attribute: str) -> List[str]:
+        """Get attribute values from multiple elements."""
+        if self.uses_browser:
+            return await super().get_attributes(selector, attribute)
+        if not self.document:
+            return []
+        return [self._attribute_value(element, attribute) for element in self.document.select(selector)]
+    
+    @timed('extract')
+    async def extract_many(self, container_selector: str, fields: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Extract fields from every container element in the fetched HTML."""
+        if self.uses_browser:
+            return await super().extract_many(container_selector, fields)
+        if not self.document:
+            return []
+        
+        return self._extract_items(container_selector, normalize_fields(fields))
+    
+    @timed('extract')
+    async def extract_schema(self, schema: ExtractionSchema) -> List[Dict[str, Any]]:
+        """Extract a schema's items from the fetched HTML."""
+        if self.uses_browser:
+            return await super().extract_schema(schema)
+        if not self.document:
+            return []
+        
+        compiled = schema.compile()
+        items = self._extract_items(schema.container, compiled.field_specs)
+        return compiled.process(items, base_url=self.current_url or "")
+    
+    def _extract_items(self, container_selector: str, field_specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Resolve field specs against the fetched HTML like the in-page script does."""
+        items = []
+        for container in self.document.select(container_selector):
+            item = {}
+            for spec in field_specs:
+                value = [] if spec.get('multiple') else ""
+                for selector in spec['selectors']:
+                    if not selector:
+                        elements = [container]
+                    elif spec.get('multiple'):
+                        elements = container.select(selector)
+                    else:
+                        elements = [element for element in [container.select_one(selector)] if element]
+                    
+                    values = (self._read(element, spec['attribute']) for element in elements)
+                    found = [text for text in values if text]
+                    if found:
+                        value = found if spec.get('multiple') else found[0]
+                        break
+                item[spec['name']] = value
+            items.append(item)
+        return items
+    
+    def _read(self, element, attribute: Optional[str]) -> str:
+        """Read an attribute or the rendered text of an element."""
+        if attribute:
+            return self._attribute_value(element, attribute).strip()
+        return self._inner_text(element)
+    
+    @timed('extract')
+    async def _extract_new_items(
+        self,
+        container_selector: str,
+        field_specs: List[Dict[str, Any]],
+        key: str
+    ) -> List[Dict[str, Any]]:
+        """Extract every item of a newly fetched document; a document is only extracted once per key."""
+        if self.uses_browser:
+            return await super()._extract_new_items(container_selector, field_specs, key)
+        if not self.document or self._paginated_documents.get(key) is self.document:
+            return []
+        
+        self._paginated_documents[key] = self.document
+        return self._extract_items(container_selector, field_specs)
+    
+    def _forget_new_items(self, key: str):
+        """Drop the document kept for a finished paginator."""
+        self._paginated_documents.pop(key, None)
+    
+    @timed('selector_wait')
+    async def _wait_for_new_items(self, container_selector: str, key: str, timeout: float) -> bool:
+        """Fetched HTML only changes by navigating."""
+        if self.uses_browser:
+            return await super()._wait_for_new_items(container_selector, key, timeout)
+        return False
+    
+    def get_url(self) -> str:
+        """Get the URL of the fetched document."""
+        if self.uses_browser:
+            return super().get_url()
+        return self.current_url or ""
+    
+    @timed('extract')
+    async def discover_links(self) -> List[str]:
+        """Get the absolute URLs of all links in the fetched HTML."""
+        if self.uses_browser:
+            return await super().discover_links()
+        if not self.document:
+            return []
+        
+        # Resolve against <base href> like the DOM does
+        base = self.document.select_one('base[href]')
+        base_url = urljoin(self.current_url or "", base['href']) if base else self.current_url or ""
+        return [urljoin(base_url, link['href'].strip()) for link in self.document.select('a[href]')]
+    
+    async def click(self, selector: str, wait_after: bool = True) -> bool:
+        """Clicking needs a browser."""
+        if self.uses_browser:
+            return await super().click(selector, wait_after)
+        self.logger.warning(f"Cannot click {selector} with the HTTP engine")
+        return False
+    
+    async def fill(self, selector: str, text: str) -> bool:
+        """Filling inputs needs a browser."""
+        if self.uses_browser:
+            return await super().fill(selector, text)
+        self.logger.warning(f"Cannot fill {selector} with the HTTP engine")
+        return False
+    
+    async def select_option(self, selector: str, value: str) -> bool:
+        """Selecting options needs a browser."""
+        if self.uses_browser:
+            return await super().select_option(selector, value)
+        self.logger.warning(f"Cannot select option in {selector} with the HTTP engine")
+        return False
+    
+    async def take_screenshot(self, path: str, full_page: bool = True):
+        """Screenshots need a browser."""
+        if self.uses_browser:
+            await super().take_screenshot(path, full_page)
+        else:
+            self.logger.warning("Cannot take screenshots with the HTTP engine")
+    
+    async def get_page_content(self) -> Dict[str, Any]:
+        """Get current page content and metadata."""
+        if self.uses_browser:
+            return await super().get_page_content()
+        if not self.document:
+            return {}
+        title = self.document.title.get_text() if self.document.title else ""
+        return {
+            'html': self.html,
+            'title': clean_text(title),
+            'url': self.current_url,
+            'timestamp': time.time()
+        }
+    
+    async def scroll_to_bottom(self, pause: float = 1.0):
+        """Static HTML has nothing to lazy-load."""
+        if self.uses_browser:
+            await super().scroll_to_bottom(pause)
+    
+    async def scroll_to_element(self, selector: str):
+        """Static HTML has nothing to scroll."""
+        if self.uses_browser:
+            await super().scroll_to_element(selector)
+    
+    async def evaluate(self, script: str) -> Any:
+        """JavaScript needs a browser."""
+        if self.uses_browser:
+            return await super().evaluate(script)
+        self.logger.warning("Cannot evaluate JavaScript with the HTTP engine")
+        return None
+
+
+_http_variants: Dict[type, type] = {}
+
+
+def make_http_scraper(scraper_class: type) -> type:
+    """Build a variant of a browser scraper class that runs on the HTTP engine."""
+    if issubclass(scraper_class, HttpScraper):
+        return scraper_class
+    if scraper_class not in _http_variants:
+        # The scraper's own methods come first; extraction falls through to HttpScraper
+        _http_variants[scraper_class] = type(
+            f"Http{scraper_class.__name__}",
+            (scraper_class, HttpScraper),
+            {'__module__': scraper_class.__module__}
+        )
+    return _http_variants[scraper_class]
@@ -0,0 +1,161 @@
+"""
+Request interception to block heavy resources and third-party hosts.
+"""
+
+import fnmatch
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from playwright.async_api import BrowserContext, Request, Response, Route
+from config.settings import InterceptionConfig, get_settings
+from utils.logger import get_logger
+from utils.public_suffix import registrable_domain
+
+
+# Typical transfer sizes used until real responses of a type have been seen. Blocked
+# types are never fetched, so with the default rules their savings come from here
+DEFAULT_RESOURCE_SIZES = {
+    'image': 50_000,
+    'media': 500_000,
+    'font': 40_000,
+    'stylesheet': 20_000,
+    'script': 30_000,
+}
+DEFAULT_RESOURCE_SIZE = 5_000
+
+
+@dataclass
+class InterceptionStats:
+    """Counters for intercepted requests."""
+    requests_seen: int = 0
+    requests_blocked: int = 0
+    bytes_saved: int = 0  # an estimate: blocked requests are never made, so never measured
+    bytes_saved_from_defaults: int = 0  # the part of bytes_saved priced at DEFAULT_RESOURCE_SIZES
+    blocked_by_reason: Dict[str, int] = field(default_factory=dict)
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests_seen': self.requests_seen,
+            'requests_blocked': self.requests_blocked,
+            'bytes_saved_estimate': self.bytes_saved,
+            'bytes_saved_from_defaults': self.bytes_saved_from_defaults,
+            'blocked_by_reason': dict(self.blocked_by_reason),
+            'blocked_by_type': dict(self.blocked_by_type)
+        }
+
+
+class RequestInterceptor:
+    """Blocks requests by resource type, domain, URL pattern or third-party origin."""
+    
+    def __init__(self, config: Optional[InterceptionConfig] = None, overrides: Optional[Dict[str, Any]] = None):
+        self.logger = get_logger(__name__)
+        config = config or get_settings().browser.interception
+        if overrides:
+            config = config.model_copy(update=overrides)
+        self.config = config
+        self.stats = InterceptionStats()
+        self._blocked_types = set(config.block_resource_types)
+        self._blocked_domains = {domain.lower().lstrip('.') for domain in config.block_domains}
+        self._url_pattern = (
+            re.compile('|'.join(fnmatch.translate(pattern) for pattern in config.block_url_patterns))
+            if config.block_url_patterns else None
+        )
+        # Running (total bytes, count) of allowed responses per resource type
+        self._observed_sizes: Dict[str, list] = {}
+    
+    async def install(self, browser_manager, context: BrowserContext):
+        """Route every request of a context through the interceptor."""
+        if not self.config.enabled:
+            return
+        await browser_manager.add_route(context, "**/*", self._handle_route)
+        browser_manager.add_listener(context, "response", self._record_response)
+    
+    def should_block(self, url: str, resource_type: str, first_party_url: Optional[str] = None) -> Optional[str]:
+        """Return the reason a request should be blocked, or None to allow it."""
+        if resource_type in self._blocked_types:
+            return 'resource_type'
+        
+        host = (urlparse(url).hostname or '').lower()
+        if self._blocked_domains and self._host_matches(host):
+            return 'domain'
+        
+        if self._url_pattern and self._url_pattern.match(url):
+            return 'url_pattern'
+        
+        if self.config.block_third_party and resource_type != 'document' and first_party_url:
+            first_party_host = (urlparse(first_party_url).hostname or '').lower()
+            if first_party_host and self._site(host) != self._site(first_party_host):
+                return 'third_party'
+        
+        return None
+    
+    def _host_matches(self, host: str) -> bool:
+        """Check whether a host or any of its parent domains is blocked."""
+        labels = host.split('.')
+        for i in range(len(labels) - 1):
+            if '.'.join(labels[i:]) in self._blocked_domains:
+                return True
+        return False
+    
+    @staticmethod
+    def _site(host: str) -> str:
+        """The site of a host: its registrable domain, so shop.co.uk and other.co.uk differ."""
+        return registrable_domain(host)
+    
+    async def _handle_route(self, route: Route, request: Request):
+        """Abort or continue an intercepted request."""
+        self.stats.requests_seen += 1
+        
+        first_party_url = None
+        if self.config.block_third_party:
+            try:
+                first_party_url = request.frame.page.url
+            except Exception:
+                first_party_url = None
+        
+        reason = self.should_block(request.url, request.resource_type, first_party_url)
+        if reason:
+            self._record_block(reason, request.resource_type)
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+    
+    def _record_block(self, reason: str, resource_type: str):
+        """Update counters for a blocked request."""
+        self.stats.requests_blocked += 1
+        size, observed = self._estimated_size(resource_type)
+        self.stats.bytes_saved += size
+        if not observed:
+            self.stats.bytes_saved_from_defaults += size
+        self.stats.blocked_by_reason[reason] = self.stats.blocked_by_reason.get(reason, 0) + 1
+        self.stats.blocked_by_type[resource_type] = self.stats.blocked_by_type.get(resource_type, 0) + 1
+    
+    def _record_response(self, response: Response):
+        """Learn typical response sizes per resource type from allowed traffic."""
+        try:
+            length = int(response.headers.get('content-length', 0))
+        except (TypeError, ValueError):
+            return
+        if length <= 0:
+            return
+        
+        observed = self._observed_sizes.setdefault(response.request.resource_type, [0, 0])
+        observed[0] += length
+        observed[1] += 1
+    
+    def _estimated_size(self, resource_type: str) -> Tuple[int, bool]:
+        """Estimate the transfer size of a request that was never made.
+        
+        Returns the size and whether it is the average of allowed responses of
+        that type; otherwise it is the typical default size for the type.
+        """
+        observed = self._observed_sizes.get(resource_type)
+        if observed and observed[1]:
+            return observed[0] // observed[1], True
+        return DEFAULT_RESOURCE_SIZES.get(resource_type, DEFAULT_RESOURCE_SIZE), False
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get interception counters; bytes saved are estimates, partly from default sizes."""
+        return self.stats.to_dict()
@@ -0,0 +1,259 @@
+"""
+Wake idle queue workers when jobs are added instead of having them poll the database.
+"""
+
+import asyncio
+import hashlib
+import os
+import socket
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from utils.logger import get_logger
+
+
+# PostgreSQL channel that add_job notifies and workers listen on
+CHANNEL = 'scraper_jobs'
+
+# Longest idle wait while jobs added by other processes cannot wake us
+UNHEARD_POLL_INTERVAL = 1.0
+
+
+class JobNotifier:
+    """Wakes this process's idle workers when jobs become claimable.
+    
+    Workers read `version` before looking for jobs and pass it to wait(), so
+    a notification that arrives between the query and the wait is never
+    lost. notify() may be called from any thread. Subclasses also carry
+    notifications between processes; until they listen, idle waits are
+    capped at UNHEARD_POLL_INTERVAL so other processes' jobs start as soon
+    as they did with polling.
+    """
+    
+    name = 'local'
+    
+    def __init__(self):
+        self.logger = get_logger(__name__)
+        self.version = 0
+        self.listening = False  # hearing other processes' notifications
+        self._event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def notify(self):
+        """Tell every worker, in this process and others, that jobs were added."""
+        self._wake()
+        try:
+            self._publish()
+        except Exception as e:
+            # Workers elsewhere still find the jobs on their next poll
+            self.logger.debug(f"Failed to publish job notification: {e}")
+    
+    def wake(self):
+        """Wake this process's idle workers only, e.g. when a domain slot frees up."""
+        self._wake()
+    
+    def _publish(self):
+        """Tell other processes; nothing to do for a single process."""
+    
+    def _listen(self):
+        """Start receiving other processes' notifications on the running loop."""
+    
+    def _wake(self):
+        self.version += 1
+        loop, event = self._loop, self._event
+        if loop is None or event is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            event.set()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(event.set)
+    
+    async def wait(self, since: int, timeout: float):
+        """Wait until a notification newer than `since` arrives, or `timeout` seconds pass."""
+        if self._loop is not asyncio.get_running_loop():
+            self._loop = asyncio.get_running_loop()
+            self._event = asyncio.Event()
+            self._listen()
+        if self.version != since:
+            return
+        
+        event = self._event
+        if not self.listening:
+            timeout = min(timeout, UNHEARD_POLL_INTERVAL)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # The first worker back re-arms the event for the next notification
+            if event is self._event and event.is_set():
+                self._event = asyncio.Event()
+    
+    def close(self):
+        self._loop = None
+        self._event = None
+
+
+class SocketNotifier(JobNotifier):
+    """Notifies workers in other processes on this host through Unix datagram sockets.
+    
+    For SQLite, which has no notifications of its own. Every listening
+    process binds a socket in a directory named after the database file;
+    notify() sends one byte to each socket there and removes those whose
+    process is gone.
+    """
+    
+    name = 'socket'
+    
+    def __init__(self, database_path: str):
+        super().__init__()
+        # Socket paths are limited to about 100 bytes, so the directory lives in the temp dir
+        digest = hashlib.sha1(str(Path(database_path).resolve()).encode()).hexdigest()[:12]
+        self.directory = Path(tempfile.gettempdir()) / f"scraper-jobs-{digest}"
+        self.path: Optional[Path] = None
+        self._sender: Optional[socket.socket] = None
+        self._receiver: Optional[socket.socket] = None
+    
+    def _publish(self):
+        if not self.directory.is_dir():
+            return
+        if self._sender is None:
+            self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sender.setblocking(False)
+        for path in self.directory.glob('*.sock'):
+            if path == self.path:
+                continue
+            try:
+                self._sender.sendto(b'1', str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                path.unlink(missing_ok=True)
+            except BlockingIOError:
+                # The listener has wakeups queued already
+                pass
+    
+    def _listen(self):
+        self.close_receiver()
+        try:
+            self.directory.mkdir(mode=0o700, exist_ok=True)
+            self.path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+            self._receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._receiver.setblocking(False)
+            self._receiver.bind(str(self.path))
+            self._loop.add_reader(self._receiver.fileno(), self._on_readable)
+            self.listening = True
+        except OSError as e:
+            self.logger.warning(f"Cannot listen for job notifications, polling instead: {e}")
+            self.close_receiver()
+    
+    def _on_readable(self):
+        try:
+            while self._receiver.recv(64):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        self._wake()
+    
+    def close_receiver(self):
+        self.listening = False
+        if self._receiver is not None:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(self._receiver.fileno())
+            self._receiver.close()
+            self._receiver = None
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+            self.path = None
+    
+    def close(self):
+        self.close_receiver()
+        if self._sender is not None:
+            self._sender.close()
+            self._sender = None
+        super().close()
+
+
+class PostgresNotifier(JobNotifier):
+    """Notifies workers on every host through PostgreSQL LISTEN/NOTIFY.
+    
+    Listening needs psycopg2; with another driver workers fall back to
+    polling while notifications are still sent.
+    """
+    
+    name = 'postgres'
+    
+    def __init__(self, engine: Engine):
+        super().__init__()
+        self.engine = engine
+        self._connection = None
+    
+    def _publish(self):
+        with self.engine.begin() as connection:
+            connection.execute(text("SELECT pg_notify(:channel, '')"), {'channel': CHANNEL})
+    
+    def _listen(self):
+        self.close_listener()
+        try:
+            self._connection = self.engine.raw_connection()
+            driver_connection = self._connection.driver_connection
+            driver_connection.autocommit = True
+            with driver_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            self._loop.add_reader(driver_connection.fileno(), self._on_readable)
+            self.listening = True
+        except Exception as e:
+            self.logger.warning(f"Cannot listen for job notifications, polling instead: {e}")
+            self.close_listener()
+    
+    def _on_readable(self):
+        driver_connection = self._connection.driver_connection
+        try:
+            driver_connection.poll()
+            driver_connection.notifies.clear()
+        except Exception as e:
+            self.logger.warning(f"Lost the job notification connection, polling instead: {e}")
+            self.close_listener()
+        self._wake()
+    
+    def close_listener(self):
+        self.listening = False
+        if self._connection is None:
+            return
+        try:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(self._connection.driver_connection.fileno())
+        except Exception:
+            pass
+        # The connection is LISTENing; never hand it back to the pool
+        self._connection.invalidate()
+        self._connection = None
+    
+    def close(self):
+        self.close_listener()
+        super().close()
+
+
+def create_job_notifier(name: str, engine: Engine) -> JobNotifier:
+    """Create the notifier named by scraping.job_notify; 'auto' picks one for the database."""
+    database = engine.url.database
+    if name == 'auto':
+        if engine.dialect.name == 'postgresql':
+            name = 'postgres'
+        elif engine.dialect.name == 'sqlite' and database not in (None, '', ':memory:') and hasattr(socket, 'AF_UNIX'):
+            name = 'socket'
+        else:
+            name = 'local'
+    
+    if name == 'local':
+        return JobNotifier()
+    if name == 'socket':
+        return SocketNotifier(database)
+    if name == 'postgres':
+        return PostgresNotifier(engine)
+    raise ValueError(f"Unknown job notifier: {name}")
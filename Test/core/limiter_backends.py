@@ -0,0 +1,170 @@
+"""
+Shared token accounting for rate limiters in several workers, processes or nodes.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+from sqlalchemy import update, select, case, Column, String, Float
+from sqlalchemy.exc import IntegrityError
+from config.settings import get_settings
+from utils.logger import get_logger
+from storage.engine import Base, get_session_factory
+
+
+class LimiterBackend(ABC):
+    """Token buckets whose budget is shared by every rate limiter using the backend."""
+    
+    name = 'backend'
+    
+    @abstractmethod
+    def take(self, key: str, tokens: float, rate: float, capacity: float) -> float:
+        """Atomically refill bucket `key`, debit `tokens` and return the new balance.
+        
+        The balance goes negative when tokens are taken ahead of their refill;
+        negative `tokens` give unused tokens back.
+        """
+    
+    def close(self):
+        """Release backend resources."""
+
+
+class MemoryBackend(LimiterBackend):
+    """In-process stand-in for a shared limiter server, e.g. for tests or a single host."""
+    
+    name = 'memory'
+    
+    def __init__(self):
+        # key -> (tokens, updated_at)
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+    
+    def take(self, key: str, tokens: float, rate: float, capacity: float) -> float:
+        now = time.time()
+        balance, updated_at = self.buckets.get(key, (capacity, now))
+        balance = min(capacity, balance + max(now - updated_at, 0.0) * rate) - tokens
+        self.buckets[key] = (balance, max(now, updated_at))
+        return balance
+
+
+class RateLimitBucketModel(Base):
+    """Shared token bucket state."""
+    __tablename__ = 'rate_limit_buckets'
+    
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # unix time of the last refill
+
+
+class DatabaseBackend(LimiterBackend):
+    """Token buckets in the shared database (settings.database.url).
+    
+    Each take is one transaction: an UPDATE that refills and debits the row,
+    which locks it, then a read of the new balance before commit.
+    """
+    
+    name = 'database'
+    
+    def __init__(self, database_url: Optional[str] = None):
+        self.settings = get_settings()
+        self.logger = get_logger(__name__)
+        self.database_url = database_url or self.settings.database.url
+        self.Session = get_session_factory(self.settings.database, self.database_url)
+    
+    def take(self, key: str, tokens: float, rate: float, capacity: float) -> float:
+        model = RateLimitBucketModel
+        now = time.time()
+        # Clocks differ between nodes; never refill for time a row has already been refilled for
+        elapsed = case((model.updated_at < now, now - model.updated_at), else_=0.0)
+        refilled = model.tokens + elapsed * rate
+        debit = (
+            update(model)
+            .where(model.key == key)
+            .values(
+                tokens=case((refilled > capacity, capacity), else_=refilled) - tokens,
+                updated_at=case((model.updated_at < now, now), else_=model.updated_at)
+            )
+        )
+        
+        for _ in range(2):
+            session = self.Session()
+            try:
+                if session.execute(debit).rowcount == 0:
+                    session.add(RateLimitBucketModel(key=key, tokens=capacity - tokens, updated_at=now))
+                    session.flush()
+                balance = session.execute(select(model.tokens).where(model.key == key)).scalar_one()
+                session.commit()
+                return balance
+            except IntegrityError:
+                # Another limiter created the row first; debit it instead
+                session.rollback()
+            finally:
+                session.close()
+        raise RuntimeError(f"Could not take tokens from rate limit bucket {key}")
+
+
+class TokenLease:
+    """Tokens taken from a shared bucket in one round trip and handed out locally.
+    
+    A lease takes `size` tokens at once. With the balance B the backend
+    returns, token i of the lease is earned (i + 1 - size - B) / rate seconds
+    after the lease was taken, so local callers get the same schedule they
+    would have got one round trip at a time. Tokens still unused when the
+    lease expires are given back.
+    """
+    
+    def __init__(self, backend: LimiterBackend, key: str, rate: float, capacity: float, size: int, ttl: float):
+        self.backend = backend
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        # Never hold more than the bucket can burst or earns during the lease
+        self.size = max(1, min(size, int(capacity), int(rate * ttl)))
+        self.ttl = ttl
+        self.taken = 0
+        self.remaining = 0
+        self.balance = 0.0
+        self.taken_at = 0.0
+        self.round_trips = 0
+    
+    def reserve(self, tokens: int = 1) -> float:
+        """Take tokens from the lease, renewing it if needed; return seconds until they are earned."""
+        now = time.time()
+        if self.remaining < tokens or now - self.taken_at > self.ttl:
+            self._renew(max(tokens, self.size))
+            now = self.taken_at
+        
+        index = self.taken - self.remaining
+        self.remaining -= tokens
+        ready_at = self.taken_at + (index + tokens - self.taken - self.balance) / self.rate
+        return max(ready_at - now, 0.0)
+    
+    def _renew(self, count: int):
+        self.release()
+        self.taken_at = time.time()
+        self.balance = self.backend.take(self.key, count, self.rate, self.capacity)
+        self.taken = self.remaining = count
+        self.round_trips += 1
+    
+    def release(self):
+        """Give unused tokens back to the shared bucket."""
+        if self.remaining > 0:
+            self.backend.take(self.key, -self.remaining, self.rate, self.capacity)
+            self.remaining = 0
+
+
+_memory_backend: Optional[MemoryBackend] = None
+
+
+def create_limiter_backend(name: str) -> Optional[LimiterBackend]:
+    """Create the backend named by rate_limiting.backend; None keeps buckets in the limiter."""
+    global _memory_backend
+    if name == 'local':
+        return None
+    if name == 'memory':
+        # One store per process, shared by every limiter like an external server would be
+        if _memory_backend is None:
+            _memory_backend = MemoryBackend()
+        return _memory_backend
+    if name == 'database':
+        return DatabaseBackend()
+    raise ValueError(f"Unknown rate limiter backend: {name}")
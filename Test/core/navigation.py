@@ -0,0 +1,140 @@
+"""
+Readiness conditions for early-return navigation and time-to-ready metrics.
+"""
+
+import asyncio
+import fnmatch
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from playwright.async_api import Page
+
+
+@dataclass
+class ReadyCondition:
+    """Caller-declared condition that marks a page as ready for extraction."""
+    selectors: List[str] = field(default_factory=list)
+    require_all: bool = True  # all selectors must be present, otherwise any one
+    count_selector: Optional[str] = None
+    min_count: int = 1
+    response_url: Optional[str] = None  # glob matched against response URLs
+    timeout: Optional[float] = None  # seconds; defaults to scraping.ready_timeout
+    
+    def __post_init__(self):
+        if not (self.selectors or self.count_selector or self.response_url):
+            raise ValueError("ReadyCondition needs selectors, count_selector or response_url")
+    
+    def matches_response(self, url: str) -> bool:
+        """Check whether a response URL satisfies the condition."""
+        return re.match(fnmatch.translate(self.response_url), url) is not None
+    
+    def watch_responses(self, page: Page, timeout: float) -> Optional[asyncio.Task]:
+        """Start waiting for a matching response; must be called before navigating."""
+        if not self.response_url:
+            return None
+        waiter = asyncio.ensure_future(page.wait_for_event(
+            "response",
+            predicate=lambda response: self.matches_response(response.url),
+            timeout=timeout * 1000
+        ))
+        # Navigation may fail before anyone awaits the waiter
+        waiter.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return waiter
+    
+    async def wait(self, page: Page, timeout: float, response_waiter: Optional[asyncio.Task] = None):
+        """Wait until every part of the condition holds; raises on timeout."""
+        waiters = []
+        
+        if self.selectors:
+            selector_waits = [
+                page.wait_for_selector(selector, state="attached", timeout=timeout * 1000)
+                for selector in self.selectors
+            ]
+            if self.require_all:
+                waiters.extend(selector_waits)
+            else:
+                waiters.append(self._first_of(selector_waits))
+        
+        if self.count_selector:
+            waiters.append(page.wait_for_function(
+                "([selector, count]) => document.querySelectorAll(selector).length >= count",
+                arg=[self.count_selector, self.min_count],
+                timeout=timeout * 1000
+            ))
+        
+        if response_waiter is not None:
+            waiters.append(response_waiter)
+        
+        pending = asyncio.gather(*waiters)
+        try:
+            await asyncio.wait_for(pending, timeout)
+        except Exception:
+            # One part failed; stop waiting on the rest
+            pending.cancel()
+            raise
+    
+    @staticmethod
+    async def _first_of(awaitables: List[Any]):
+        """Return once any awaitable succeeds; raise if all of them fail."""
+        tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    return await next_done
+                except Exception:
+                    continue
+            raise TimeoutError("None of the ready selectors appeared")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class NavigationMetrics:
+    """Per-URL time-to-ready measurements for navigations in this process."""
+    
+    def __init__(self, max_urls: int = 1000):
+        self.max_urls = max_urls
+        self.by_url: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.by_mode: Dict[str, Dict[str, float]] = {}
+    
+    def record(self, url: str, seconds: float, mode: str):
+        """Record how long a page took to become ready and how readiness was decided."""
+        # mode is 'ready' (condition met), 'fallback' (capped networkidle), 'load'
+        # or 'response' (capture_api returned on the API response)
+        self.by_url[url] = {'time_to_ready': seconds, 'mode': mode, 'recorded_at': time.time()}
+        self.by_url.move_to_end(url)
+        while len(self.by_url) > self.max_urls:
+            self.by_url.popitem(last=False)
+        
+        totals = self.by_mode.setdefault(mode, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        totals['count'] += 1
+        totals['total_seconds'] += seconds
+        totals['max_seconds'] = max(totals['max_seconds'], seconds)
+    
+    def get_url_metrics(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the latest measurement for a URL."""
+        return self.by_url.get(url)
+    
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """Get count, average and max time-to-ready per mode."""
+        return {
+            mode: {
+                'count': totals['count'],
+                'avg_seconds': totals['total_seconds'] / totals['count'],
+                'max_seconds': totals['max_seconds']
+            }
+            for mode, totals in self.by_mode.items()
+        }
+
+
+_navigation_metrics: Optional[NavigationMetrics] = None
+
+
+def get_navigation_metrics() -> NavigationMetrics:
+    """Get the process-wide navigation metrics."""
+    global _navigation_metrics
+    if _navigation_metrics is None:
+        _navigation_metrics = NavigationMetrics()
+    return _navigation_metrics
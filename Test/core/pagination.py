@@ -0,0 +1,156 @@
+"""
+Pagination for next-link, load-more and infinite-scroll listings with incremental extraction.
+"""
+
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from urllib.parse import urljoin
+from config.settings import get_settings
+from utils.logger import get_logger
+
+
+PAGINATION_MODES = ('scroll', 'load_more', 'next_link')
+
+SCROLL_SCRIPT = "() => window.scrollTo(0, (document.scrollingElement || document.body).scrollHeight)"
+
+
+@dataclass
+class PaginationStep:
+    """One pagination step: how many new items it produced and how long it took."""
+    index: int
+    new_items: int
+    seconds: float
+
+
+class Paginator:
+    """Walk a listing step by step and yield only the items each step adds.
+    
+    Step 0 extracts what is already on the page. Each later step scrolls,
+    clicks the load-more button or follows the next link, waits for unseen
+    containers, and extracts just those. Pagination stops when a step adds
+    nothing, the control is gone, or max_steps / max_items is reached.
+    """
+    
+    def __init__(
+        self,
+        scraper,
+        container_selector: str,
+        field_specs: List[Dict[str, Any]],
+        process: Callable[[List[Dict[str, Any]], str], List[Dict[str, Any]]],
+        mode: str = 'scroll',
+        next_selector: Optional[str] = None,
+        max_steps: Optional[int] = None,
+        max_items: Optional[int] = None,
+        step_timeout: Optional[float] = None
+    ):
+        if mode not in PAGINATION_MODES:
+            raise ValueError(f"Unknown pagination mode: {mode}")
+        if mode != 'scroll' and not next_selector:
+            raise ValueError(f"Pagination mode {mode} needs next_selector")
+        
+        settings = get_settings()
+        self.scraper = scraper
+        self.container_selector = container_selector
+        self.field_specs = field_specs
+        self.process = process
+        self.mode = mode
+        self.next_selector = next_selector
+        self.max_steps = max_steps if max_steps is not None else settings.scraping.pagination_max_steps
+        self.max_items = max_items
+        self.step_timeout = step_timeout if step_timeout is not None else settings.scraping.pagination_step_timeout
+        self.logger = get_logger(__name__)
+        
+        # Page-side key for the set of containers this paginator already extracted
+        self.key = f"__scraperSeen_{uuid.uuid4().hex}"
+        self.steps: List[PaginationStep] = []
+        self.item_count = 0
+        self.stop_reason: Optional[str] = None
+        self._visited = set()
+    
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self._iterate()
+    
+    async def _iterate(self) -> AsyncIterator[Dict[str, Any]]:
+        self._visited.add(self.scraper.get_url())
+        index = 0
+        
+        try:
+            while True:
+                start = time.perf_counter()
+                if index > 0 and not await self._advance():
+                    break
+                
+                raw_items = await self.scraper._extract_new_items(self.container_selector, self.field_specs, self.key)
+                items = self.process(raw_items, self.scraper.get_url())
+                if self.max_items is not None:
+                    items = items[:self.max_items - self.item_count]
+                self.steps.append(PaginationStep(index, len(items), time.perf_counter() - start))
+                
+                for item in items:
+                    yield item
+                self.item_count += len(items)
+                
+                if not raw_items:
+                    self.stop_reason = 'no_new_items'
+                    break
+                if self.max_items is not None and self.item_count >= self.max_items:
+                    self.stop_reason = 'max_items'
+                    break
+                if index >= self.max_steps:
+                    self.stop_reason = 'max_steps'
+                    break
+                index += 1
+        finally:
+            # Let the scraper drop what it kept to tell extracted items apart
+            self.scraper._forget_new_items(self.key)
+        
+        self.logger.info(
+            f"Pagination ({self.mode}) stopped after {len(self.steps)} steps "
+            f"with {self.item_count} items: {self.stop_reason}"
+        )
+    
+    async def _advance(self) -> bool:
+        """Perform one pagination action; False (with stop_reason set) when there is nothing left."""
+        if self.mode == 'next_link':
+            href = await self.scraper.get_attribute(self.next_selector, 'href')
+            if not href:
+                self.stop_reason = 'no_next_link'
+                return False
+            
+            next_url = urljoin(self.scraper.get_url(), href)
+            if next_url in self._visited:
+                self.stop_reason = 'repeated_page'
+                return False
+            self._visited.add(next_url)
+            await self.scraper.navigate(next_url)
+            return True
+        
+        if self.mode == 'load_more':
+            if not await self.scraper.click(self.next_selector, wait_after=False):
+                self.stop_reason = 'no_load_more'
+                return False
+        else:
+            await self.scraper.evaluate(SCROLL_SCRIPT)
+        
+        # Returns as soon as an unseen container appears, so fast pages are not slowed by a fixed sleep
+        await self.scraper._wait_for_new_items(self.container_selector, self.key, self.step_timeout)
+        return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-step latency and totals."""
+        seconds = [step.seconds for step in self.steps]
+        return {
+            'mode': self.mode,
+            'steps': len(self.steps),
+            'items': self.item_count,
+            'stop_reason': self.stop_reason,
+            'total_seconds': sum(seconds),
+            'avg_step_seconds': sum(seconds) / len(seconds) if seconds else 0.0,
+            'max_step_seconds': max(seconds) if seconds else 0.0,
+            'step_details': [
+                {'step': step.index, 'new_items': step.new_items, 'seconds': step.seconds}
+                for step in self.steps
+            ]
+        }
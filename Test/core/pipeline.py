@@ -30,6 +30,16 @@ class ExportResult:
     error_message: Optional[str] = None
 
 
+def xml_record(item: Dict[str, Any]) -> str:
+    """Render one record as an XML element."""
+    xml_content = '  <record>\n'
+    for key, value in item.items():
+        # Escape XML special characters
+        escaped_value = str(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        xml_content += f'    <{key}>{escaped_value}</{key}>\n'
+    return xml_content + '  </record>\n'
+
+
 class DataPipeline:
     """Data pipeline for processing and exporting scraped data."""
     
@@ -233,12 +243,7 @@ class DataPipeline:
             xml_content = '<?xml version="1.0" encoding="UTF-8"?>\n<data>\n'
             
             for item in data:
-                xml_content += '  <record>\n'
-                for key, value in item.items():
-                    # Escape XML special characters
-                    escaped_value = str(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    xml_content += f'    <{key}>{escaped_value}</{key}>\n'
-                xml_content += '  </record>\n'
+                xml_content += xml_record(item)
             
             xml_content += '</data>'
             
@@ -315,6 +320,15 @@ class DataPipeline:
         
         return results
     
+    def open_stream(
+        self,
+        filename: str,
+        formats: Optional[List[str]] = None,
+        clean: bool = True
+    ) -> 'ExportStream':
+        """Open export files that records can be appended to batch by batch."""
+        return ExportStream(self, sanitize_filename(filename), formats or self.export_formats, clean)
+    
     def get_export_stats(self) -> Dict[str, Any]:
         """Get statistics about exported data."""
         try:
@@ -358,8 +372,112 @@ class DataPipeline:
             self.logger.error(f"Failed to cleanup old exports: {e}")
 
 
-
-
-
-
-
+class ExportStream:
+    """Incremental export: each batch is written out and dropped from memory."""
+    
+    def __init__(self, pipeline: DataPipeline, filename: str, formats: List[str], clean: bool = True):
+        self.pipeline = pipeline
+        self.logger = pipeline.logger
+        self.clean = clean
+        self.record_count = 0
+        self.writers: Dict[str, Dict[str, Any]] = {}
+        self.errors: Dict[str, str] = {}
+        
+        extensions = {'json': 'json', 'csv': 'csv', 'excel': 'xlsx', 'xml': 'xml'}
+        for format_type in formats:
+            if format_type not in extensions:
+                self.logger.warning(f"Unsupported export format: {format_type}")
+                continue
+            file_path = pipeline.data_dir / f"{filename}.{extensions[format_type]}"
+            self.writers[format_type] = {'path': file_path, 'file': None}
+    
+    def write(self, batch: List[Dict[str, Any]]):
+        """Append a batch of records to every export file."""
+        if not batch:
+            return
+        if self.clean:
+            batch = self.pipeline.clean_data(batch)
+        
+        for format_type, writer in self.writers.items():
+            if format_type in self.errors:
+                continue
+            try:
+                getattr(self, f"_write_{format_type}")(writer, batch)
+            except Exception as e:
+                self.logger.error(f"Streaming {format_type} export failed: {e}")
+                self.errors[format_type] = str(e)
+        
+        self.record_count += len(batch)
+    
+    def _write_json(self, writer: Dict[str, Any], batch: List[Dict[str, Any]]):
+        if writer['file'] is None:
+            writer['file'] = open(writer['path'], 'w', encoding='utf-8')
+            writer['file'].write('[')
+            writer['first'] = True
+        for item in batch:
+            writer['file'].write('\n  ' if writer['first'] else ',\n  ')
+            writer['file'].write(json.dumps(item, ensure_ascii=False, default=str))
+            writer['first'] = False
+    
+    def _write_csv(self, writer: Dict[str, Any], batch: List[Dict[str, Any]]):
+        if writer['file'] is None:
+            # Columns come from the first batch; later unseen fields are dropped
+            fieldnames = sorted({key for item in batch for key in item.keys()})
+            writer['file'] = open(writer['path'], 'w', newline='', encoding='utf-8')
+            writer['csv'] = csv.DictWriter(writer['file'], fieldnames=fieldnames, extrasaction='ignore')
+            writer['csv'].writeheader()
+        writer['csv'].writerows(batch)
+    
+    def _write_excel(self, writer: Dict[str, Any], batch: List[Dict[str, Any]]):
+        if writer['file'] is None:
+            from openpyxl import Workbook
+            # Write-only workbooks stream rows to disk instead of holding them
+            writer['file'] = Workbook(write_only=True)
+            writer['sheet'] = writer['file'].create_sheet('Data')
+            writer['columns'] = sorted({key for item in batch for key in item.keys()})
+            writer['sheet'].append(writer['columns'])
+        for item in batch:
+            writer['sheet'].append([self._excel_value(item.get(column)) for column in writer['columns']])
+    
+    @staticmethod
+    def _excel_value(value: Any) -> Any:
+        if value is None or isinstance(value, (str, int, float, bool, datetime)):
+            return value
+        return json.dumps(value, default=str)
+    
+    def _write_xml(self, writer: Dict[str, Any], batch: List[Dict[str, Any]]):
+        if writer['file'] is None:
+            writer['file'] = open(writer['path'], 'w', encoding='utf-8')
+            writer['file'].write('<?xml version="1.0" encoding="UTF-8"?>\n<data>\n')
+        for item in batch:
+            writer['file'].write(xml_record(item))
+    
+    def close(self) -> List[ExportResult]:
+        """Finish every export file and report the results."""
+        results = []
+        for format_type, writer in self.writers.items():
+            try:
+                if writer['file'] is not None:
+                    failed = format_type in self.errors
+                    if format_type == 'json' and not failed:
+                        writer['file'].write('\n]\n')
+                    elif format_type == 'xml' and not failed:
+                        writer['file'].write('</data>')
+                    
+                    if format_type != 'excel':
+                        writer['file'].close()
+                    elif not failed:
+                        writer['file'].save(writer['path'])
+            except Exception as e:
+                self.logger.error(f"Streaming {format_type} export failed: {e}")
+                self.errors[format_type] = str(e)
+            
+            if format_type in self.errors:
+                results.append(ExportResult(format_type, str(writer['path']), 0, False, self.errors[format_type]))
+            elif writer['file'] is None:
+                results.append(ExportResult(format_type, '', 0, False, 'No data to export'))
+            else:
+                results.append(ExportResult(format_type, str(writer['path']), self.record_count, True))
+        
+        self.logger.info(f"Streamed {self.record_count} records to {len(self.writers)} export formats")
+        return results
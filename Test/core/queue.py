@@ -4,18 +4,33 @@ Job queue system with persistence and worker management.
 
 import asyncio
 import json
+import os
+import socket
 import uuid
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, AsyncIterator, Callable
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Boolean
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import inspect, text, update, select, and_, or_, Column, String, Text, DateTime, Integer, Boolean, Index
 from config.settings import get_settings
 from utils.logger import get_logger
 from utils.helpers import retry_async
+from utils.timing import PhaseHistograms, PhaseTimer, get_phase_histograms, job_timer, phase
+from storage.database import DatabaseManager
+from storage.engine import Base, get_engine, get_session_factory
+from .browser import close_browser_pool
+from .change_detection import ChangeDetector, PageUnchanged
+from .circuit_breaker import get_circuit_breaker
+from .concurrency import get_concurrency_limiter
+from .crawler import CrawlManager
+from .errors import PermanentError, error_kind
+from .http_scraper import close_http_session
+from .job_notify import JobNotifier, create_job_notifier
+from .pipeline import DataPipeline
+from .rate_limiter import close_rate_limiter
+from .robots import close_robots_cache, get_robots_cache
 
 
 class JobStatus(Enum):
@@ -43,15 +58,14 @@ class Job:
     error_message: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
     metadata: Optional[Dict[str, Any]] = None
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
     
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = datetime.utcnow()
 
 
-Base = declarative_base()
-
-
 class JobModel(Base):
     """SQLAlchemy model for job persistence."""
     __tablename__ = 'jobs'
@@ -69,33 +83,39 @@ class JobModel(Base):
     max_retries = Column(Integer, default=3)
     error_message = Column(Text)
     result = Column(Text)  # JSON string
-    metadata = Column(Text)  # JSON string
+    metadata_ = Column('metadata', Text)  # JSON string
+    worker_id = Column(String)  # worker that claimed the job
+    lease_expires_at = Column(DateTime)  # a running job whose lease passed may be claimed again
+    
+    __table_args__ = (Index('ix_jobs_claim', 'status', 'priority', 'created_at'),)
 
 
 class JobQueue:
     """Job queue with persistence and worker management."""
     
-    def __init__(self):
+    def __init__(self, engine_selector=None):
         self.settings = get_settings()
         self.logger = get_logger(__name__)
         self.engine = None
         self.Session = None
+        self.engine_selector = engine_selector
+        self.database = None
+        self.crawl_manager = None
+        self.change_detector = None
         self.workers = []
         self.is_running = False
+        # Prefixes worker names so claims from different processes and hosts stay distinct
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.notifier: Optional[JobNotifier] = None
         self._setup_database()
     
     def _setup_database(self):
         """Setup database connection and create tables."""
         try:
-            self.engine = create_engine(
-                self.settings.database.url,
-                echo=self.settings.database.echo,
-                pool_size=self.settings.database.pool_size
-            )
-            self.Session = sessionmaker(bind=self.engine)
-            
-            # Create tables
-            Base.metadata.create_all(self.engine)
+            self.engine = get_engine(self.settings.database)
+            self.Session = get_session_factory(self.settings.database)
+            self._add_missing_columns()
+            self.notifier = create_job_notifier(self.settings.scraping.job_notify, self.engine)
             
             self.logger.info("Database setup completed")
             
@@ -103,6 +123,18 @@ class JobQueue:
             self.logger.error(f"Failed to setup database: {e}")
             raise
     
+    def _add_missing_columns(self):
+        """Add columns and indexes introduced since a jobs table was created; create_all leaves existing tables alone."""
+        existing = {column['name'] for column in inspect(self.engine).get_columns(JobModel.__tablename__)}
+        with self.engine.begin() as connection:
+            for column in JobModel.__table__.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {JobModel.__tablename__} ADD COLUMN {column.name} {column_type}"))
+                    self.logger.info(f"Added column {column.name} to {JobModel.__tablename__}")
+            for index in JobModel.__table__.indexes:
+                index.create(connection, checkfirst=True)
+    
     def add_job(
         self,
         name: str,
@@ -132,6 +164,7 @@ class JobQueue:
             session.add(job_model)
             session.commit()
             session.close()
+            self.notifier.notify()
             
             self.logger.info(f"Added job {job_id}: {name}")
             return job_id
@@ -140,6 +173,50 @@ class JobQueue:
             self.logger.error(f"Failed to add job: {e}")
             raise
     
+    def add_jobs(self, jobs: List[Dict[str, Any]]) -> List[str]:
+        """Add several jobs in one transaction; each dict takes add_job's arguments."""
+        job_ids, job_models = [], []
+        for spec in jobs:
+            job = Job(
+                id=str(uuid.uuid4()),
+                name=spec['name'],
+                url=spec['url'],
+                scraper_class=spec['scraper_class'],
+                status=JobStatus.PENDING,
+                priority=spec.get('priority', 0),
+                max_retries=spec.get('max_retries', 3),
+                metadata=spec.get('metadata') or {}
+            )
+            job_ids.append(job.id)
+            job_models.append(JobModel(**self._job_to_dict(job)))
+        
+        try:
+            session = self.Session()
+            session.add_all(job_models)
+            session.commit()
+            session.close()
+            if job_models:
+                self.notifier.notify()
+            
+            self.logger.info(f"Added {len(job_models)} jobs")
+            return job_ids
+            
+        except Exception as e:
+            self.logger.error(f"Failed to add jobs: {e}")
+            raise
+    
+    def get_crawl_manager(self) -> CrawlManager:
+        """Get the manager for crawls fed by this queue, creating it on first use."""
+        if self.crawl_manager is None:
+            self.crawl_manager = CrawlManager(self)
+        return self.crawl_manager
+    
+    def get_change_detector(self) -> ChangeDetector:
+        """Get the page-state store for change-checked jobs, creating it on first use."""
+        if self.change_detector is None:
+            self.change_detector = ChangeDetector()
+        return self.change_detector
+    
     def get_job(self, job_id: str) -> Optional[Job]:
         """Get job by ID."""
         try:
@@ -155,13 +232,19 @@ class JobQueue:
             self.logger.error(f"Failed to get job {job_id}: {e}")
             return None
     
-    def get_pending_jobs(self, limit: int = 10) -> List[Job]:
-        """Get pending jobs ordered by priority."""
+    def get_pending_jobs(self, limit: int = 10, include_expired: bool = False) -> List[Job]:
+        """Get pending jobs ordered by priority.
+        
+        include_expired also returns running jobs whose lease expired, which
+        claim_jobs hands out again.
+        """
+        if include_expired:
+            condition = self._claimable(datetime.utcnow())
+        else:
+            condition = JobModel.status == JobStatus.PENDING.value
         try:
             session = self.Session()
-            job_models = session.query(JobModel).filter_by(
-                status=JobStatus.PENDING.value
-            ).order_by(
+            job_models = session.query(JobModel).filter(condition).order_by(
                 JobModel.priority.desc(),
                 JobModel.created_at.asc()
             ).limit(limit).all()
@@ -173,17 +256,109 @@ class JobQueue:
             self.logger.error(f"Failed to get pending jobs: {e}")
             return []
     
+    @staticmethod
+    def _claimable(now: datetime):
+        """Pending jobs, and running jobs whose worker stopped renewing its lease."""
+        return or_(
+            JobModel.status == JobStatus.PENDING.value,
+            and_(JobModel.status == JobStatus.RUNNING.value, JobModel.lease_expires_at < now)
+        )
+    
+    def claim_jobs(self, worker_id: str, limit: int = 1, job_ids: Optional[List[str]] = None) -> List[Job]:
+        """Atomically claim up to `limit` claimable jobs for a worker, highest priority first.
+        
+        Claimed jobs are running, record worker_id and are leased for
+        scraping.job_lease seconds; renew_lease extends the lease while the
+        job runs. job_ids restricts the claim to those jobs. Each job goes to
+        exactly one caller however many workers, processes or hosts claim at
+        once: PostgreSQL selects the rows FOR UPDATE SKIP LOCKED, so claims
+        never wait on each other's rows, and SQLite runs the selection and
+        update as one UPDATE ... RETURNING statement under its write lock.
+        """
+        now = datetime.utcnow()
+        values = {
+            'status': JobStatus.RUNNING.value,
+            'worker_id': worker_id,
+            'started_at': now,
+            'lease_expires_at': now + timedelta(seconds=self.settings.scraping.job_lease)
+        }
+        candidates = select(JobModel.id).where(self._claimable(now))
+        if job_ids is not None:
+            candidates = candidates.where(JobModel.id.in_(job_ids))
+        candidates = candidates.order_by(JobModel.priority.desc(), JobModel.created_at.asc()).limit(limit)
+        dialect = self.engine.dialect.name
+        
+        try:
+            session = self.Session()
+            try:
+                if dialect in ('postgresql', 'sqlite'):
+                    if dialect == 'postgresql':
+                        candidates = candidates.with_for_update(skip_locked=True)
+                    claim = (
+                        update(JobModel)
+                        .where(JobModel.id.in_(candidates), self._claimable(now))
+                        .values(**values)
+                        .returning(JobModel)
+                        .execution_options(synchronize_session=False)
+                    )
+                    models = session.execute(claim).scalars().all()
+                else:
+                    # No RETURNING: claim candidates one by one, each UPDATE only succeeding if still claimable
+                    models = []
+                    for job_id in session.execute(candidates).scalars().all():
+                        claim = update(JobModel).where(JobModel.id == job_id, self._claimable(now)).values(**values)
+                        if session.execute(claim).rowcount == 1:
+                            models.append(session.get(JobModel, job_id))
+                jobs = [self._model_to_job(model) for model in models]
+                session.commit()
+            finally:
+                session.close()
+        except Exception as e:
+            self.logger.error(f"Failed to claim jobs for {worker_id}: {e}")
+            return []
+        
+        jobs.sort(key=lambda job: (-job.priority, job.created_at))
+        return jobs
+    
+    def renew_lease(self, job_id: str, worker_id: str) -> bool:
+        """Extend a running job's lease; False if the worker no longer holds the job."""
+        lease = datetime.utcnow() + timedelta(seconds=self.settings.scraping.job_lease)
+        try:
+            session = self.Session()
+            renewed = session.execute(
+                update(JobModel)
+                .where(
+                    JobModel.id == job_id,
+                    JobModel.worker_id == worker_id,
+                    JobModel.status == JobStatus.RUNNING.value
+                )
+                .values(lease_expires_at=lease)
+            ).rowcount == 1
+            session.commit()
+            session.close()
+            return renewed
+        except Exception as e:
+            self.logger.error(f"Failed to renew lease on job {job_id}: {e}")
+            # Unconfirmed: another worker may claim the job once the old lease runs out
+            return False
+    
     def update_job_status(
         self,
         job_id: str,
         status: JobStatus,
         error_message: Optional[str] = None,
-        result: Optional[Dict[str, Any]] = None
-    ):
-        """Update job status and related fields."""
+        result: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        worker_id: Optional[str] = None
+    ) -> bool:
+        """Update job status and related fields; metadata is merged into the job's.
+        
+        With worker_id the update only applies while that worker still holds
+        the running job's claim. Returns False if nothing was written.
+        """
         try:
             session = self.Session()
-            job_model = session.query(JobModel).filter_by(id=job_id).first()
+            job_model = self._owned_job(session, job_id, worker_id)
             
             if job_model:
                 job_model.status = status.value
@@ -192,6 +367,7 @@ class JobQueue:
                     job_model.started_at = datetime.utcnow()
                 elif status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]:
                     job_model.completed_at = datetime.utcnow()
+                    job_model.lease_expires_at = None
                 
                 if error_message:
                     job_model.error_message = error_message
@@ -199,28 +375,52 @@ class JobQueue:
                 if result:
                     job_model.result = json.dumps(result)
                 
+                if metadata:
+                    merged = json.loads(job_model.metadata_) if job_model.metadata_ else {}
+                    merged.update(metadata)
+                    job_model.metadata_ = json.dumps(merged)
+                
                 session.commit()
             
             session.close()
+            return job_model is not None
             
         except Exception as e:
             self.logger.error(f"Failed to update job {job_id}: {e}")
+            return False
     
-    def increment_retry_count(self, job_id: str):
-        """Increment retry count for a job."""
+    def increment_retry_count(self, job_id: str, worker_id: Optional[str] = None) -> bool:
+        """Increment retry count for a job; worker_id fences the write as in update_job_status."""
         try:
             session = self.Session()
-            job_model = session.query(JobModel).filter_by(id=job_id).first()
+            job_model = self._owned_job(session, job_id, worker_id)
             
             if job_model:
                 job_model.retry_count += 1
                 job_model.status = JobStatus.PENDING.value
+                job_model.lease_expires_at = None
                 session.commit()
+                self.notifier.notify()
             
             session.close()
+            return job_model is not None
             
         except Exception as e:
             self.logger.error(f"Failed to increment retry count for job {job_id}: {e}")
+            return False
+    
+    def _owned_job(self, session, job_id: str, worker_id: Optional[str]) -> Optional[JobModel]:
+        """Load a job for update, or None if worker_id is given and no longer holds its claim."""
+        query = session.query(JobModel).filter_by(id=job_id)
+        if worker_id is not None:
+            query = query.filter_by(worker_id=worker_id, status=JobStatus.RUNNING.value)
+            if session.bind.dialect.name == 'postgresql':
+                # Hold the row so a reclaim cannot slip in between this check and the write
+                query = query.with_for_update()
+        job_model = query.first()
+        if job_model is None and worker_id is not None:
+            self.logger.warning(f"Worker {worker_id} no longer holds job {job_id}; dropping its update")
+        return job_model
     
     def get_job_stats(self) -> Dict[str, int]:
         """Get job statistics."""
@@ -239,6 +439,23 @@ class JobQueue:
             self.logger.error(f"Failed to get job stats: {e}")
             return {}
     
+    def get_failure_stats(self) -> Dict[str, int]:
+        """Count failed jobs by error kind (retryable, permanent, throttled, circuit_open, other)."""
+        try:
+            session = self.Session()
+            models = session.query(JobModel.metadata_).filter_by(status=JobStatus.FAILED.value).all()
+            session.close()
+            
+            stats: Dict[str, int] = {}
+            for (metadata,) in models:
+                kind = (json.loads(metadata) if metadata else {}).get('error_kind', 'other')
+                stats[kind] = stats.get(kind, 0) + 1
+            return stats
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get failure stats: {e}")
+            return {}
+    
     def cleanup_old_jobs(self, days: int = 30):
         """Remove old completed/failed jobs."""
         try:
@@ -265,6 +482,9 @@ class JobQueue:
         
         self.is_running = True
         self.logger.info(f"Starting {worker_count} workers")
+        # Workers waiting for a full domain wake as soon as one of its slots frees up
+        concurrency = get_concurrency_limiter()
+        concurrency.add_release_callback(self.notifier.wake)
         
         # Create worker tasks
         for i in range(worker_count):
@@ -274,7 +494,25 @@ class JobQueue:
             self.workers.append(worker)
         
         # Wait for all workers
-        await asyncio.gather(*self.workers, return_exceptions=True)
+        try:
+            await asyncio.gather(*self.workers, return_exceptions=True)
+        finally:
+            # Shut down the warm browsers and HTTP connections shared by this process's workers
+            await close_browser_pool()
+            await close_http_session()
+            # Give leased rate limit tokens back to the shared budget
+            close_rate_limiter()
+            close_robots_cache()
+            breaker_stats = get_circuit_breaker().get_stats()
+            if breaker_stats['trips']:
+                self.logger.info(
+                    f"Circuit breakers tripped {breaker_stats['trips']} times and rejected "
+                    f"{breaker_stats['rejected']} navigations; open: {', '.join(breaker_stats['open']) or 'none'}"
+                )
+            if self.crawl_manager:
+                self.crawl_manager.close()
+            concurrency.remove_release_callback(self.notifier.wake)
+            self.notifier.close()
     
     async def stop_workers(self):
         """Stop all worker processes."""
@@ -296,19 +534,35 @@ class JobQueue:
     
     async def _worker_loop(self, worker_name: str, scraper_factory: Callable):
         """Worker loop to process jobs."""
+        worker_id = f"{self.node_id}-{worker_name}"
         self.logger.info(f"Worker {worker_name} started")
         
         while self.is_running:
             try:
-                # Get pending jobs
-                jobs = self.get_pending_jobs(limit=1)
+                # Read the notification version first so a job added during the query still wakes us
+                version = self.notifier.version
+                jobs = self.get_pending_jobs(limit=self.settings.concurrency.scan_jobs, include_expired=True)
                 
                 if not jobs:
-                    await asyncio.sleep(1)  # Wait for new jobs
+                    # Sleep until add_job notifies; the timeout catches expired leases and unnotified writers
+                    await self.notifier.wait(version, self.settings.scraping.idle_poll_interval)
+                    continue
+                
+                # Prefer jobs whose domain has a free slot, so slow sites
+                # do not hold every worker and its browser context
+                concurrency = get_concurrency_limiter()
+                ready = [job.id for job in jobs if concurrency.has_capacity(job.url)]
+                if not ready:
+                    # Every scanned job's domain is full; a freed slot or a new job wakes us
+                    await self.notifier.wait(version, self.settings.scraping.idle_poll_interval)
+                    continue
+                
+                claimed = self.claim_jobs(worker_id, job_ids=ready)
+                if not claimed:
+                    # Other workers claimed them first; look again
                     continue
                 
-                job = jobs[0]
-                await self._process_job(job, worker_name, scraper_factory)
+                await self._process_job(claimed[0], worker_name, scraper_factory)
                 
             except asyncio.CancelledError:
                 break
@@ -322,37 +576,219 @@ class JobQueue:
         """Process a single job."""
         self.logger.info(f"Worker {worker_name} processing job {job.id}: {job.name}")
         
-        # Update job status to running
-        self.update_job_status(job.id, JobStatus.RUNNING)
+        if job.status != JobStatus.RUNNING or job.worker_id is None:
+            # Update job status to running
+            self.update_job_status(job.id, JobStatus.RUNNING)
+            await self._run_job(job, scraper_factory)
+            return
         
+        # Claimed jobs are already running; renew the claim while the job runs
+        # and stop the job if the claim passes to another worker
+        work = asyncio.ensure_future(self._run_job(job, scraper_factory, owner=job.worker_id))
+        lease = asyncio.ensure_future(self._keep_lease(job, work))
         try:
-            # Create scraper instance
-            if scraper_factory:
-                scraper = scraper_factory(job.scraper_class)
-            else:
-                # Default scraper creation
-                scraper = self._create_scraper(job.scraper_class)
-            
-            # Run scraper
-            async with scraper:
-                result = await scraper.run(job.url)
+            await work
+        except asyncio.CancelledError:
+            if not (lease.done() and not lease.cancelled() and lease.result()):
+                raise
+        finally:
+            lease.cancel()
+    
+    async def _run_job(self, job: Job, scraper_factory: Callable, owner: Optional[str] = None):
+        """Scrape a job and record its outcome; with owner, outcomes are only written while that worker holds the claim."""
+        timer_context = job_timer() if self.settings.timing.enabled else nullcontext()
+        with timer_context as timer:
+            checks = []
+            slot = None
             
-            # Update job as completed
-            self.update_job_status(job.id, JobStatus.COMPLETED, result=result)
-            self.logger.info(f"Job {job.id} completed successfully")
+            try:
+                if self.settings.rate_limiting.respect_robots_txt:
+                    # Refuse disallowed pages before a browser is leased or a rate limit slot booked
+                    with phase('robots'):
+                        await get_robots_cache().check(job.url)
+                
+                # The job counts against its domain's concurrency limit until it finishes;
+                # its navigations run inside this slot instead of taking their own
+                slot = await get_concurrency_limiter().acquire(job.url)
+                
+                def create_scraper(engine: str):
+                    scraper = self._build_scraper(job.scraper_class, scraper_factory, engine, job)
+                    if scraper.change_check is not None:
+                        checks.append(scraper.change_check)
+                    return scraper
+                
+                if self.settings.scraping.stream_results:
+                    if self.engine_selector:
+                        records = self.engine_selector.run_iter(job.url, job.scraper_class, create_scraper)
+                        result = await self._stream_results(job, records)
+                    else:
+                        async with create_scraper('browser') as scraper:
+                            result = await self._stream_results(job, scraper.run_iter(job.url))
+                elif self.engine_selector:
+                    # Let the selector pick HTTP or browser from this domain's history
+                    result = await self.engine_selector.run(job.url, job.scraper_class, create_scraper)
+                else:
+                    async with create_scraper('browser') as scraper:
+                        result = await scraper.run(job.url)
+                
+                metadata = self._finish_timer(timer)
+                if checks:
+                    for check in checks:
+                        self.get_change_detector().save(check)
+                    # Recorded next to the timings, whatever shape the scraper's result has
+                    metadata = {**(metadata or {}), 'unchanged': False}
+                
+                # Update job as completed
+                if self.update_job_status(
+                    job.id, JobStatus.COMPLETED, result=result, metadata=metadata, worker_id=owner
+                ):
+                    self.logger.info(f"Job {job.id} completed successfully")
+                
+            except PageUnchanged as e:
+                # Nothing to extract, store or export; the job still counts as done
+                for check in checks:
+                    self.get_change_detector().save(check)
+                self.update_job_status(
+                    job.id,
+                    JobStatus.COMPLETED,
+                    result={'unchanged': True, 'reason': e.reason},
+                    metadata={**(self._finish_timer(timer) or {}), 'unchanged': True, 'unchanged_reason': e.reason},
+                    worker_id=owner
+                )
+                self.logger.info(f"Job {job.id} skipped: {e}")
+                
+            except Exception as e:
+                self.logger.error(f"Job {job.id} failed: {e}")
+                
+                # Permanent errors (404, unknown host, open circuit) fail the same way on every retry
+                permanent = isinstance(e, PermanentError)
+                if not permanent and job.retry_count < job.max_retries:
+                    if self.increment_retry_count(job.id, worker_id=owner):
+                        self.logger.info(f"Job {job.id} will be retried ({job.retry_count + 1}/{job.max_retries})")
+                else:
+                    metadata = self._finish_timer(timer) or {}
+                    metadata['error_kind'] = error_kind(e)
+                    recorded = self.update_job_status(
+                        job.id, JobStatus.FAILED, error_message=str(e), metadata=metadata, worker_id=owner
+                    )
+                    if recorded and permanent:
+                        self.logger.error(f"Job {job.id} failed permanently without retrying ({metadata['error_kind']})")
+                    elif recorded:
+                        self.logger.error(f"Job {job.id} failed permanently after {job.max_retries} retries")
+            finally:
+                if slot is not None:
+                    slot.release()
+    
+    async def _keep_lease(self, job: Job, work: asyncio.Future) -> bool:
+        """Renew a claimed job's lease until cancelled; if renewal fails, cancel the job's work and return True."""
+        while True:
+            await asyncio.sleep(self.settings.scraping.job_lease / 3)
+            if not self.renew_lease(job.id, job.worker_id):
+                self.logger.warning(f"Lost the lease on job {job.id}; stopping it so its new worker alone runs it")
+                work.cancel()
+                return True
+    
+    def _finish_timer(self, timer: Optional[PhaseTimer]) -> Optional[Dict[str, Any]]:
+        """Record a finished job's phase breakdown and return it as job metadata."""
+        if timer is None:
+            return None
+        breakdown = timer.breakdown()
+        get_phase_histograms().record_breakdown(breakdown)
+        return {'timings': breakdown}
+    
+    def get_phase_stats(self, limit: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """Get per-phase latency across the most recently finished jobs."""
+        limit = limit or self.settings.timing.stats_jobs
+        histograms = PhaseHistograms()
+        try:
+            session = self.Session()
+            models = session.query(JobModel).filter(
+                JobModel.status.in_([JobStatus.COMPLETED.value, JobStatus.FAILED.value]),
+                JobModel.metadata_.isnot(None)
+            ).order_by(JobModel.completed_at.desc()).limit(limit).all()
+            session.close()
             
+            for model in models:
+                timings = json.loads(model.metadata_).get('timings')
+                if timings:
+                    histograms.record_breakdown(timings)
         except Exception as e:
-            self.logger.error(f"Job {job.id} failed: {e}")
+            self.logger.error(f"Failed to get phase stats: {e}")
+        return histograms.get_summary()
+    
+    async def _stream_results(self, job: Job, records: AsyncIterator[Any]) -> Dict[str, Any]:
+        """Flush streamed records to storage and exports in batches; return a job summary."""
+        batch_size = self.settings.scraping.stream_batch_size
+        if self.database is None:
+            self.database = DatabaseManager()
+        stream = None
+        
+        batch, record_count, data_ids = [], 0, []
+        
+        def flush():
+            with phase('store'):
+                write_batch()
+        
+        def write_batch():
+            nonlocal stream
+            if stream is None and self.settings.storage.auto_export:
+                # Opened on the first batch so jobs without records leave no empty files
+                stream = DataPipeline().open_stream(f"job_{job.id}")
+            data_ids.append(self.database.save_data(
+                scraper_name=job.scraper_class,
+                url=job.url,
+                data=batch,
+                metadata={'job_id': job.id, 'batch': len(data_ids)}
+            ))
+            if stream:
+                stream.write(batch)
+        
+        try:
+            async for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    flush()
+                    record_count += len(batch)
+                    batch = []
             
-            # Check if we should retry
-            if job.retry_count < job.max_retries:
-                self.increment_retry_count(job.id)
-                self.logger.info(f"Job {job.id} will be retried ({job.retry_count + 1}/{job.max_retries})")
-            else:
-                self.update_job_status(job.id, JobStatus.FAILED, error_message=str(e))
-                self.logger.error(f"Job {job.id} failed permanently after {job.max_retries} retries")
-    
-    def _create_scraper(self, scraper_class: str):
+            if batch:
+                flush()
+                record_count += len(batch)
+        finally:
+            exports = stream.close() if stream else []
+        
+        return {
+            'records': record_count,
+            'batches': len(data_ids),
+            'data_ids': data_ids,
+            'exports': [export.file_path for export in exports if export.success]
+        }
+    
+    def _build_scraper(
+        self,
+        scraper_class: str,
+        scraper_factory: Callable = None,
+        engine: str = 'browser',
+        job: Optional[Job] = None
+    ):
+        """Create a scraper instance for a job on the given engine."""
+        # scraper_factory(scraper_class, engine) builds the scraper for that engine itself
+        if scraper_factory:
+            scraper = scraper_factory(scraper_class, engine)
+        else:
+            # Default scraper creation
+            scraper = self._create_scraper(scraper_class, engine)
+        
+        if job and job.metadata and job.metadata.get('detect_changes'):
+            scraper.change_check = self.get_change_detector().begin(job.url, job.scraper_class)
+        
+        if job and job.metadata and job.metadata.get('crawl_id'):
+            # Crawl jobs feed the links on each page back into the queue
+            crawls = self.get_crawl_manager()
+            scraper.link_collector = lambda links: crawls.enqueue_links(job, links)
+        return scraper
+    
+    def _create_scraper(self, scraper_class: str, engine: str = 'browser'):
         """Create scraper instance by class name."""
         # This would need to be implemented based on your scraper registry
         # For now, return a placeholder
@@ -363,7 +799,8 @@ class JobQueue:
         data = asdict(job)
         data['status'] = job.status.value
         data['result'] = json.dumps(job.result) if job.result else None
-        data['metadata'] = json.dumps(job.metadata) if job.metadata else None
+        data['metadata_'] = json.dumps(job.metadata) if job.metadata else None
+        del data['metadata']
         return data
     
     def _model_to_job(self, model: JobModel) -> Job:
@@ -382,7 +819,9 @@ class JobQueue:
             max_retries=model.max_retries,
             error_message=model.error_message,
             result=json.loads(model.result) if model.result else None,
-            metadata=json.loads(model.metadata) if model.metadata else None
+            metadata=json.loads(model.metadata_) if model.metadata_ else None,
+            worker_id=model.worker_id,
+            lease_expires_at=model.lease_expires_at
         )
     
     async def __aenter__(self):
@@ -0,0 +1,218 @@
+"""
+Adaptive per-domain request rates: additive increase, multiplicative decrease.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import Column, String, Float, Integer, DateTime
+from utils.logger import get_logger
+from storage.engine import Base, get_session_factory
+
+# Weight of each new sample in a domain's baseline latency
+BASELINE_ALPHA = 0.1
+
+# Samples needed before latency inflation is trusted as a signal
+MIN_BASELINE_SAMPLES = 5
+
+
+class DomainRateModel(Base):
+    """Learned request rate per domain."""
+    __tablename__ = 'domain_rates'
+    
+    domain = Column(String, primary_key=True)
+    rate = Column(Float, nullable=False)  # requests per minute
+    baseline_latency = Column(Float)
+    samples = Column(Integer, default=0)
+    increases = Column(Integer, default=0)
+    decreases = Column(Integer, default=0)
+    last_signal = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+@dataclass
+class DomainRate:
+    """A domain's current rate and the latency it is judged against."""
+    domain: str
+    rate: float  # requests per minute
+    baseline_latency: Optional[float] = None
+    samples: int = 0
+    increases: int = 0
+    decreases: int = 0
+    last_signal: Optional[str] = None
+    last_decrease_at: float = 0.0
+    saved_at: float = 0.0
+    dirty: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rate_per_minute': self.rate,
+            'baseline_latency': self.baseline_latency,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'last_signal': self.last_signal
+        }
+
+
+class AdaptiveRateControl:
+    """Learns how fast each domain can be scraped from its responses.
+    
+    Every response without trouble adds to the rate so that it grows by
+    `additive_increase` requests per minute for each minute of clean
+    traffic. A 429 or 503 multiplies the rate by `decrease_factor`; a
+    timeout or a response slower than `latency_factor` times the domain's
+    baseline multiplies it by `latency_decrease_factor`. Like TCP, only
+    one decrease happens per window: responses to requests sent before
+    the last decrease are ignored. Rates never drop below min_rate nor grow
+    past max_rate, and are stored in the database so restarts resume from them.
+    """
+    
+    def __init__(self, settings):
+        self.settings = settings
+        self.config = settings.rate_limiting.adaptive
+        self.logger = get_logger(__name__)
+        self.domains: Dict[str, DomainRate] = {}
+    
+    def get(self, domain: str, default_rate: float) -> DomainRate:
+        """Get a domain's rate state, loading the learned rate on first use."""
+        state = self.domains.get(domain)
+        if state is None:
+            state = self._load(domain) or DomainRate(domain, default_rate)
+            self.domains[domain] = state
+        return state
+    
+    def _load(self, domain: str) -> Optional[DomainRate]:
+        if not self.config.persist:
+            return None
+        try:
+            session = get_session_factory(self.settings.database)()
+            model = session.query(DomainRateModel).filter_by(domain=domain).first()
+            session.close()
+            if model is None:
+                return None
+            return DomainRate(
+                domain=domain,
+                rate=model.rate,
+                baseline_latency=model.baseline_latency,
+                samples=model.samples or 0,
+                increases=model.increases or 0,
+                decreases=model.decreases or 0,
+                last_signal=model.last_signal,
+                saved_at=time.time()
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to load learned rate for {domain}: {e}")
+            return None
+    
+    def observe(self, domain: str, default_rate: float, status: Optional[int], seconds: float) -> Optional[float]:
+        """Adapt to one response; status None means the request timed out. Returns the new rate if it changed."""
+        state = self.get(domain, default_rate)
+        now = time.time()
+        sent_at = now - seconds
+        
+        if status in (429, 503):
+            signal, factor = 'throttled', self.config.decrease_factor
+        elif status is None:
+            signal, factor = 'timeout', self.config.latency_decrease_factor
+        elif status >= 400:
+            return None
+        elif self._inflated(state, seconds):
+            signal, factor = 'slow', self.config.latency_decrease_factor
+        else:
+            self._update_baseline(state, seconds)
+            if sent_at < state.last_decrease_at:
+                return None
+            return self._set_rate(state, state.rate + self.config.additive_increase / state.rate, 'ok')
+        
+        if sent_at < state.last_decrease_at:
+            # Sent at the old rate; the last decrease already answered it
+            return None
+        state.last_decrease_at = now
+        return self._set_rate(state, state.rate * factor, signal)
+    
+    def set_rate(self, domain: str, rate: float) -> float:
+        """Restart learning for a domain from a manually chosen rate."""
+        state = self.get(domain, rate)
+        state.rate = rate
+        state.dirty = True
+        self.save(state)
+        return state.rate
+    
+    def _inflated(self, state: DomainRate, seconds: float) -> bool:
+        if state.baseline_latency is None or state.samples < MIN_BASELINE_SAMPLES:
+            return False
+        return seconds > state.baseline_latency * self.config.latency_factor
+    
+    def _update_baseline(self, state: DomainRate, seconds: float):
+        if state.baseline_latency is None:
+            state.baseline_latency = seconds
+        else:
+            state.baseline_latency += BASELINE_ALPHA * (seconds - state.baseline_latency)
+        state.samples += 1
+    
+    def _set_rate(self, state: DomainRate, rate: float, signal: str) -> Optional[float]:
+        if rate > state.rate:
+            # A configured rate above max_rate is kept, but never grown
+            rate = min(rate, max(self.config.max_rate, state.rate))
+        rate = max(rate, self.config.min_rate)
+        decreased = rate < state.rate
+        changed = rate != state.rate
+        state.last_signal = signal
+        
+        if decreased:
+            state.decreases += 1
+            self.logger.info(f"Rate for {state.domain} lowered to {rate:.1f}/min ({signal})")
+        elif changed:
+            state.increases += 1
+        
+        state.rate = rate
+        state.dirty = state.dirty or changed
+        # Decreases are saved at once; increases at most every save_interval
+        if decreased or time.time() - state.saved_at >= self.config.save_interval:
+            self.save(state)
+        return rate if changed else None
+    
+    def save(self, state: DomainRate):
+        """Store a domain's learned rate if it changed since the last save."""
+        if not self.config.persist or not state.dirty:
+            return
+        try:
+            session = get_session_factory(self.settings.database)()
+            model = session.query(DomainRateModel).filter_by(domain=state.domain).first()
+            if model is None:
+                model = DomainRateModel(domain=state.domain)
+                session.add(model)
+            
+            model.rate = state.rate
+            model.baseline_latency = state.baseline_latency
+            model.samples = state.samples
+            model.increases = state.increases
+            model.decreases = state.decreases
+            model.last_signal = state.last_signal
+            model.updated_at = datetime.utcnow()
+            
+            session.commit()
+            session.close()
+            state.dirty = False
+            state.saved_at = time.time()
+        except Exception as e:
+            self.logger.error(f"Failed to save learned rate for {state.domain}: {e}")
+    
+    def forget(self, domain: str):
+        """Save a domain's rate and drop it from memory; it is reloaded on next use."""
+        state = self.domains.pop(domain, None)
+        if state is not None:
+            self.save(state)
+    
+    def flush(self):
+        """Save every domain whose rate changed since it was last saved."""
+        for state in self.domains.values():
+            self.save(state)
+    
+    def close(self):
+        self.flush()
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the learned rate per domain."""
+        return {domain: state.to_dict() for domain, state in self.domains.items()}
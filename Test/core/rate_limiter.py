@@ -1,15 +1,28 @@
 """
-Rate limiter with token bucket algorithm and per-domain throttling.
+Rate limiter with token bucket algorithm and hierarchical throttling.
+
+A request must pass every level: the global budget, its registrable domain
+(eTLD+1, so www.shop.com and m.shop.com share one bucket), the server IP it
+resolves to and the proxy it goes out through. Requests reserve their slot
+instead of waiting under a lock: each call books the earliest time all
+levels allow and then sleeps on its own, so requests to different domains
+wait concurrently.
 """
 
 import asyncio
+import socket
 import time
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Tuple
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from config.settings import get_settings
 from utils.logger import get_logger
 from utils.helpers import extract_domain, random_delay
+from utils.public_suffix import normalize_host, registrable_domain
+from .errors import RobotsDisallowedError, parse_retry_after
+from .limiter_backends import TokenLease, create_limiter_backend
+from .rate_control import AdaptiveRateControl
+from .robots import RobotsCache, get_robots_cache
 
 
 @dataclass
@@ -40,24 +53,105 @@ class TokenBucket:
             self.tokens -= tokens
             return True
         return False
+    
+    def reserve(self, tokens: int = 1) -> float:
+        """Take tokens now, borrowing against future refills; return seconds until they are earned."""
+        self.refill()
+        self.tokens -= tokens
+        return max(-self.tokens / self.refill_rate, 0.0)
+
+
+class BucketCache(OrderedDict):
+    """Token buckets by key, created on first use and kept in least-recently-used order.
+    
+    Past max_size the least recently used buckets are evicted, but only once
+    idle: refilled to capacity and, if given, passing is_idle. A bucket
+    recreated later starts full, so evicting idle ones changes no limit.
+    Busy buckets found at the old end are moved to the new end so they
+    do not hold up eviction of the idle ones behind them.
+    """
+    
+    # Old-end buckets looked at per insert, bounding the work of one insert
+    EVICTION_SCAN = 8
+    
+    def __init__(
+        self,
+        factory: Callable[[], TokenBucket],
+        max_size: int,
+        is_idle: Optional[Callable[[str], bool]] = None,
+        on_evict: Optional[Callable[[str], None]] = None
+    ):
+        super().__init__()
+        self.factory = factory
+        self.max_size = max(max_size, 1)
+        self.is_idle = is_idle
+        self.on_evict = on_evict
+        self.evictions = 0
+    
+    def __missing__(self, key: str) -> TokenBucket:
+        bucket = self[key] = self.factory()
+        return bucket
+    
+    def __getitem__(self, key: str) -> TokenBucket:
+        bucket = super().__getitem__(key)
+        self.move_to_end(key)
+        return bucket
+    
+    def __setitem__(self, key: str, bucket: TokenBucket):
+        super().__setitem__(key, bucket)
+        self.move_to_end(key)
+        for _ in range(self.EVICTION_SCAN):
+            if len(self) <= self.max_size:
+                break
+            oldest, oldest_bucket = next(iter(self.items()))
+            if oldest == key:
+                break
+            oldest_bucket.refill()
+            if oldest_bucket.tokens < oldest_bucket.capacity or (self.is_idle and not self.is_idle(oldest)):
+                # Still throttling; the cache may run over its size until it goes idle
+                self.move_to_end(oldest)
+                continue
+            del self[oldest]
+            self.evictions += 1
+            if self.on_evict:
+                self.on_evict(oldest)
 
 
 class RateLimiter:
-    """Rate limiter with token bucket algorithm and per-domain throttling."""
+    """Rate limiter with token bucket algorithm and hierarchical throttling."""
     
     def __init__(self):
         self.settings = get_settings()
         self.logger = get_logger(__name__)
+        max_buckets = self.settings.rate_limiting.max_buckets
         self.buckets: Dict[str, TokenBucket] = defaultdict(self._create_bucket)
-        self.domain_buckets: Dict[str, TokenBucket] = defaultdict(self._create_domain_bucket)
-        self.robots_cache: Dict[str, Optional[Dict]] = {}
-        self._lock = asyncio.Lock()
+        # Keyed by registrable domain; see domain_key()
+        self.domain_buckets = BucketCache(
+            self._create_domain_bucket, max_buckets, self._domain_idle, self._forget_domain
+        )
+        self.ip_buckets = BucketCache(
+            self._create_ip_bucket, max_buckets, on_evict=lambda ip: self._release_lease(f"ip:{ip}")
+        )
+        self.proxy_buckets = BucketCache(
+            self._create_proxy_bucket, max_buckets, on_evict=lambda proxy: self._release_lease(f"proxy:{proxy}")
+        )
+        # host -> (IP or None if resolution failed, expiry)
+        self.resolved: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        # Earliest start of the next request per domain, after the human-like delay and crawl-delay
+        self.domain_next_slot: Dict[str, float] = {}
+        self.robots: Optional[RobotsCache] = None
+        # With a shared backend the buckets above only hold each limit's rate and
+        # capacity; tokens are accounted in the backend and leased out locally
+        self.backend = create_limiter_backend(self.settings.rate_limiting.backend)
+        self.leases: Dict[str, TokenLease] = {}
+        # Created on first use, so it follows settings replaced after construction
+        self.rate_control: Optional[AdaptiveRateControl] = None
     
     def _create_bucket(self) -> TokenBucket:
         """Create default token bucket."""
         return TokenBucket(
-            capacity=self.settings.rate_limiting.burst_limit,
-            refill_rate=self.settings.rate_limiting.default_rate / 60.0
+            capacity=self.settings.rate_limiting.global_burst,
+            refill_rate=self.settings.rate_limiting.global_rate / 60.0
         )
     
     def _create_domain_bucket(self) -> TokenBucket:
@@ -67,115 +161,214 @@ class RateLimiter:
             refill_rate=self.settings.rate_limiting.default_rate / 60.0
         )
     
-    async def wait_for_token(self, url: str, tokens: int = 1) -> bool:
-        """Wait for tokens to become available."""
+    def _create_ip_bucket(self) -> TokenBucket:
+        """Create token bucket for one server IP."""
+        return TokenBucket(
+            capacity=self.settings.rate_limiting.ip_burst,
+            refill_rate=self.settings.rate_limiting.ip_rate / 60.0
+        )
+    
+    def _create_proxy_bucket(self) -> TokenBucket:
+        """Create token bucket for one outgoing proxy."""
+        return TokenBucket(
+            capacity=self.settings.rate_limiting.proxy_burst,
+            refill_rate=self.settings.rate_limiting.proxy_rate / 60.0
+        )
+    
+    @staticmethod
+    def domain_key(url: str) -> str:
+        """Registrable domain a URL is limited under, e.g. https://m.shop.co.uk:443/ -> shop.co.uk."""
+        return registrable_domain(extract_domain(url))
+    
+    def _domain_idle(self, domain: str) -> bool:
+        return self.domain_next_slot.get(domain, 0.0) <= time.time()
+    
+    def _forget_domain(self, domain: str):
+        """Drop the per-domain state kept next to an evicted domain bucket."""
+        self.domain_next_slot.pop(domain, None)
+        self._release_lease(f"domain:{domain}")
+        if self.rate_control is not None:
+            self.rate_control.forget(domain)
+    
+    async def wait_for_token(self, url: str, tokens: int = 1, proxy: Optional[str] = None) -> bool:
+        """Wait for tokens to become available at every level.
+        
+        proxy is the outgoing proxy server, if any. Raises
+        RobotsDisallowedError, without booking a slot, for URLs that
+        robots.txt disallows.
+        """
         if not self.settings.rate_limiting.enabled:
             return True
         
-        domain = extract_domain(url)
-        
-        async with self._lock:
-            # Check global rate limit
-            if not self.buckets['global'].consume(tokens):
-                self.logger.debug("Global rate limit exceeded, waiting...")
-                await self._wait_for_bucket_refill(self.buckets['global'], tokens)
-            
-            # Check domain-specific rate limit
-            if not self.domain_buckets[domain].consume(tokens):
-                self.logger.debug(f"Domain rate limit exceeded for {domain}, waiting...")
-                await self._wait_for_bucket_refill(self.domain_buckets[domain], tokens)
-            
-            # Check robots.txt if enabled
-            if self.settings.rate_limiting.respect_robots_txt:
-                await self._check_robots_txt(url)
-            
-            # Add random delay for human-like behavior
-            delay = random_delay(
-                self.settings.rate_limiting.delay.min,
-                self.settings.rate_limiting.delay.max
-            )
+        domain = self.domain_key(url)
+        ip = None
+        if self.settings.rate_limiting.ip_rate > 0:
+            ip = await self._resolve(normalize_host(extract_domain(url)))
+        
+        # Check robots.txt if enabled
+        crawl_delay = 0.0
+        if self.settings.rate_limiting.respect_robots_txt:
+            if self.robots is None:
+                self.robots = get_robots_cache()
+            rules = await self.robots.get_rules(url)
+            if not rules.is_allowed(url):
+                raise RobotsDisallowedError(url)
+            crawl_delay = rules.crawl_delay or 0.0
+        
+        if domain not in self.domain_buckets and self._get_rate_control():
+            # Resume from the rate learned for this domain on earlier runs
+            self._apply_rate(domain, self.rate_control.get(domain, self.settings.rate_limiting.default_rate).rate)
+        
+        delay = self.reserve(domain, tokens, crawl_delay, ip=ip, proxy=proxy)
+        if delay > 0:
+            self.logger.debug(f"Waiting {delay:.2f} seconds for rate limit on {domain}...")
             await asyncio.sleep(delay)
-            
-            return True
+        
+        return True
     
-    async def _wait_for_bucket_refill(self, bucket: TokenBucket, tokens: int):
-        """Wait for bucket to have enough tokens."""
-        while not bucket.consume(tokens):
-            # Calculate time until next token is available
-            time_to_wait = (tokens - bucket.tokens) / bucket.refill_rate
-            if time_to_wait > 0:
-                self.logger.debug(f"Waiting {time_to_wait:.2f} seconds for rate limit...")
-                await asyncio.sleep(min(time_to_wait, 60))  # Cap at 60 seconds
-            bucket.refill()
+    def reserve(
+        self,
+        domain: str,
+        tokens: int = 1,
+        min_interval: float = 0.0,
+        ip: Optional[str] = None,
+        proxy: Optional[str] = None
+    ) -> float:
+        """Book the earliest slot the limits allow for a request to domain; return seconds until it.
+        
+        Nothing here awaits, so reservations never interleave and no lock is
+        held while callers sleep. The next request to the same domain is then
+        spaced by a random human-like delay, or min_interval if that is longer.
+        Tokens are taken from every level's bucket when the slot is booked,
+        which can only make a limit stricter, never looser.
+        """
+        now = time.time()
+        waits = [
+            self._take('global', self.buckets['global'], tokens),
+            self._take(f"domain:{domain}", self.domain_buckets[domain], tokens)
+        ]
+        if ip and self.settings.rate_limiting.ip_rate > 0:
+            waits.append(self._take(f"ip:{ip}", self.ip_buckets[ip], tokens))
+        if proxy and self.settings.rate_limiting.proxy_rate > 0:
+            waits.append(self._take(f"proxy:{proxy}", self.proxy_buckets[proxy], tokens))
+        start = max(now + max(waits), self.domain_next_slot.get(domain, now))
+        
+        spacing = random_delay(
+            self.settings.rate_limiting.delay.min,
+            self.settings.rate_limiting.delay.max
+        )
+        self.domain_next_slot[domain] = start + max(spacing, min_interval)
+        return start - now
     
-    async def _check_robots_txt(self, url: str):
-        """Check robots.txt for crawl delay."""
-        domain = extract_domain(url)
+    def record_response(
+        self,
+        url: str,
+        status: Optional[int],
+        seconds: float,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """Adapt a domain's rate to a response; status None means the request timed out.
         
-        if domain in self.robots_cache:
-            robots_info = self.robots_cache[domain]
-        else:
-            robots_info = await self._fetch_robots_txt(domain)
-            self.robots_cache[domain] = robots_info
+        A Retry-After on a 429/503 also holds every request to the domain,
+        from all callers, until the server's deadline.
+        """
+        if not self.settings.rate_limiting.enabled or not self._get_rate_control():
+            return
         
-        if robots_info and 'crawl_delay' in robots_info:
-            delay = robots_info['crawl_delay']
-            self.logger.debug(f"Robots.txt crawl delay for {domain}: {delay}s")
-            await asyncio.sleep(delay)
+        domain = self.domain_key(url)
+        if status in (429, 503):
+            headers = {key.lower(): value for key, value in (headers or {}).items()}
+            retry_after = parse_retry_after(headers.get('retry-after'))
+            if retry_after:
+                resume_at = time.time() + min(retry_after, self.settings.rate_limiting.adaptive.max_pause)
+                self.domain_next_slot[domain] = max(self.domain_next_slot.get(domain, 0.0), resume_at)
+        
+        rate = self.rate_control.observe(domain, self.domain_buckets[domain].refill_rate * 60, status, seconds)
+        if rate is not None:
+            self._apply_rate(domain, rate)
     
-    async def _fetch_robots_txt(self, domain: str) -> Optional[Dict]:
-        """Fetch and parse robots.txt for a domain."""
-        try:
-            import aiohttp
-            
-            robots_url = f"http://{domain}/robots.txt"
-            timeout = aiohttp.ClientTimeout(total=10)
-            
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(robots_url) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        return self._parse_robots_txt(content)
+    async def _resolve(self, host: str) -> Optional[str]:
+        """Resolve a host to the IP its requests go to, cached for dns_ttl seconds."""
+        cached = self.resolved.get(host)
+        if cached is not None and cached[1] > time.time():
+            self.resolved.move_to_end(host)
+            return cached[0]
         
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            ip = infos[0][4][0]
         except Exception as e:
-            self.logger.debug(f"Failed to fetch robots.txt for {domain}: {e}")
+            # Without an IP only the other levels apply; the request reports the DNS error itself
+            self.logger.debug(f"Failed to resolve {host} for rate limiting: {e}")
+            ip = None
         
-        return None
+        self.resolved[host] = (ip, time.time() + self.settings.rate_limiting.dns_ttl)
+        self.resolved.move_to_end(host)
+        while len(self.resolved) > self.settings.rate_limiting.max_buckets:
+            self.resolved.popitem(last=False)
+        return ip
     
-    def _parse_robots_txt(self, content: str) -> Dict:
-        """Parse robots.txt content for crawl delay."""
-        robots_info = {}
-        current_user_agent = None
+    def _get_rate_control(self) -> Optional[AdaptiveRateControl]:
+        """Get adaptive rate control, or None when it is disabled."""
+        if not self.settings.rate_limiting.adaptive.enabled:
+            return None
+        if self.rate_control is None:
+            self.rate_control = AdaptiveRateControl(self.settings)
+        return self.rate_control
+    
+    def _apply_rate(self, domain: str, rate: float):
+        """Set a domain bucket's refill rate in requests per minute, keeping its burst."""
+        bucket = self.domain_buckets[domain]
+        bucket.refill()
+        bucket.refill_rate = rate / 60.0
+        lease = self.leases.get(f"domain:{domain}")
+        if lease is not None:
+            lease.rate = bucket.refill_rate
+    
+    def _take(self, key: str, bucket: TokenBucket, tokens: int) -> float:
+        """Take tokens from this process's bucket or a lease on the shared one; return seconds to wait."""
+        if self.backend is None:
+            return bucket.reserve(tokens)
         
-        for line in content.split('\n'):
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            
-            if ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip().lower()
-                value = value.strip()
-                
-                if key == 'user-agent':
-                    current_user_agent = value
-                elif key == 'crawl-delay' and current_user_agent in ['*', 'scraper']:
-                    try:
-                        robots_info['crawl_delay'] = float(value)
-                    except ValueError:
-                        pass
-        
-        return robots_info
+        lease = self.leases.get(key)
+        if lease is None:
+            lease = self.leases[key] = TokenLease(
+                self.backend,
+                key,
+                bucket.refill_rate,
+                bucket.capacity,
+                self.settings.rate_limiting.lease_size,
+                self.settings.rate_limiting.lease_ttl
+            )
+        try:
+            return lease.reserve(tokens)
+        except Exception as e:
+            # Keep scraping politely on this process's own budget while the backend is unavailable
+            self.logger.error(f"Rate limiter backend failed for {key}, using local bucket: {e}")
+            return bucket.reserve(tokens)
+    
+    def _release_lease(self, key: str):
+        """Return a lease's unused tokens to the shared bucket."""
+        lease = self.leases.pop(key, None)
+        if lease is not None:
+            try:
+                lease.release()
+            except Exception as e:
+                self.logger.debug(f"Failed to release rate limit lease for {key}: {e}")
     
     def set_domain_rate(self, domain: str, rate: int, burst: int = None):
-        """Set custom rate limit for a specific domain."""
+        """Set custom rate limit for a domain; it applies to the domain's whole registrable domain."""
         if burst is None:
             burst = rate
         
+        domain = registrable_domain(domain)
         self.domain_buckets[domain] = TokenBucket(
             capacity=burst,
             refill_rate=rate / 60.0
         )
+        self._release_lease(f"domain:{domain}")
+        if self._get_rate_control():
+            self.rate_control.set_rate(domain, rate)
         self.logger.info(f"Set rate limit for {domain}: {rate} req/min, burst: {burst}")
     
     def get_rate_stats(self) -> Dict[str, Dict[str, float]]:
@@ -185,35 +378,99 @@ class RateLimiter:
         # Global stats
         global_bucket = self.buckets['global']
         global_bucket.refill()
+        lease = self.leases.get('global')
         stats['global'] = {
-            'tokens_available': global_bucket.tokens,
+            'tokens_available': self._available(lease, global_bucket),
             'capacity': global_bucket.capacity,
             'refill_rate': global_bucket.refill_rate
         }
         
         # Domain stats
+        now = time.time()
         for domain, bucket in self.domain_buckets.items():
             bucket.refill()
+            lease = self.leases.get(f"domain:{domain}")
             stats[domain] = {
-                'tokens_available': bucket.tokens,
+                'tokens_available': self._available(lease, bucket),
                 'capacity': bucket.capacity,
-                'refill_rate': bucket.refill_rate
+                'refill_rate': bucket.refill_rate,
+                'rate_per_minute': bucket.refill_rate * 60,
+                # How far ahead requests to this domain are already booked
+                'reserved_seconds': max(self.domain_next_slot.get(domain, now) - now, 0.0)
             }
+            if self.rate_control is not None and domain in self.rate_control.domains:
+                stats[domain]['adaptive'] = self.rate_control.domains[domain].to_dict()
+        
+        # Server IP and proxy stats
+        for prefix, level in (('ip', self.ip_buckets), ('proxy', self.proxy_buckets)):
+            for key, bucket in level.items():
+                bucket.refill()
+                stats[f"{prefix}:{key}"] = {
+                    'tokens_available': self._available(self.leases.get(f"{prefix}:{key}"), bucket),
+                    'capacity': bucket.capacity,
+                    'refill_rate': bucket.refill_rate,
+                    'rate_per_minute': bucket.refill_rate * 60
+                }
         
+        stats['global']['evicted_buckets'] = sum(
+            level.evictions for level in (self.domain_buckets, self.ip_buckets, self.proxy_buckets)
+        )
         return stats
     
+    def _available(self, lease: Optional[TokenLease], bucket: TokenBucket) -> float:
+        """Tokens this process can use right away."""
+        if self.backend is not None:
+            return lease.remaining if lease else 0
+        return max(bucket.tokens, 0.0)
+    
     def reset_limits(self):
         """Reset all rate limits."""
+        for key in list(self.leases):
+            self._release_lease(key)
         self.buckets.clear()
         self.domain_buckets.clear()
-        self.robots_cache.clear()
+        self.ip_buckets.clear()
+        self.proxy_buckets.clear()
+        self.domain_next_slot.clear()
+        self.resolved.clear()
+        if self.robots is not None:
+            self.robots.clear()
         self.logger.info("Rate limits reset")
     
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        pass
+        self.close()
+    
+    def close(self):
+        """Return leased tokens, save learned rates and close the shared backend."""
+        if self.rate_control is not None:
+            self.rate_control.close()
+        for key in list(self.leases):
+            self._release_lease(key)
+        if self.backend is not None:
+            self.backend.close()
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the rate limiter shared by all scrapers in this process."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def close_rate_limiter():
+    """Close the shared rate limiter if it was created."""
+    global _rate_limiter
+    if _rate_limiter is not None:
+        limiter = _rate_limiter
+        _rate_limiter = None
+        limiter.close()
 
 
 
@@ -0,0 +1,319 @@
+"""
+robots.txt rules: fetching, RFC 9309 matching and a TTL cache persisted to the database.
+"""
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import unquote, urlparse
+import aiohttp
+from sqlalchemy import Column, String, Text, Integer, Float, DateTime
+from config.settings import get_settings
+from utils.logger import get_logger
+from storage.engine import Base, get_session_factory
+from .errors import RobotsDisallowedError
+
+
+class RobotsModel(Base):
+    """Fetched robots.txt per origin."""
+    __tablename__ = 'robots_txt'
+    
+    origin = Column(String, primary_key=True)  # scheme://host[:port]
+    status = Column(Integer)  # None when the fetch failed
+    content = Column(Text, default='')
+    fetched_at = Column(Float, nullable=False)
+    expires_at = Column(Float, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+@dataclass
+class RobotsRule:
+    """An Allow or Disallow line."""
+    path: str
+    allow: bool
+    pattern: Pattern = field(repr=False)
+    
+    @classmethod
+    def create(cls, path: str, allow: bool) -> 'RobotsRule':
+        # '*' matches any run of characters and a trailing '$' anchors the end
+        anchored = path.endswith('$')
+        body = path[:-1] if anchored else path
+        regex = '.*'.join(re.escape(part) for part in body.split('*'))
+        return cls(path, allow, re.compile(regex + ('$' if anchored else '')))
+
+
+class RobotsRules:
+    """The robots.txt group that applies to one user agent, plus the file's sitemaps."""
+    
+    def __init__(
+        self,
+        rules: Optional[List[RobotsRule]] = None,
+        crawl_delay: Optional[float] = None,
+        sitemaps: Optional[List[str]] = None,
+        disallow_all: bool = False
+    ):
+        self.rules = rules or []
+        self.crawl_delay = crawl_delay
+        self.sitemaps = sitemaps or []
+        self.disallow_all = disallow_all
+    
+    @classmethod
+    def parse(cls, content: str, user_agent: str) -> 'RobotsRules':
+        """Parse robots.txt, merging every group for user_agent or else every '*' group.
+        
+        A group is consecutive User-agent lines followed by their rules;
+        user agents match by product token, case-insensitively.
+        """
+        token = user_agent.split('/')[0].strip().lower()
+        groups: List[Tuple[List[str], List[Tuple[str, str]]]] = []
+        sitemaps = []
+        agents: List[str] = []
+        lines: List[Tuple[str, str]] = []
+        
+        for raw_line in content.splitlines():
+            line = raw_line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            key, value = line.split(':', 1)
+            key = key.strip().lower()
+            value = value.strip()
+            
+            if key == 'sitemap':
+                if value:
+                    sitemaps.append(value)
+            elif key == 'user-agent':
+                if lines:
+                    # A User-agent after rules starts the next group
+                    groups.append((agents, lines))
+                    agents, lines = [], []
+                agents.append(value.split('/')[0].strip().lower())
+            elif agents:
+                lines.append((key, value))
+        if agents:
+            groups.append((agents, lines))
+        
+        matching = [group_lines for group_agents, group_lines in groups if token in group_agents]
+        if not matching:
+            matching = [group_lines for group_agents, group_lines in groups if '*' in group_agents]
+        
+        rules = []
+        crawl_delay = None
+        for group_lines in matching:
+            for key, value in group_lines:
+                if key in ('allow', 'disallow') and value:
+                    rules.append(RobotsRule.create(value, key == 'allow'))
+                elif key == 'crawl-delay':
+                    try:
+                        crawl_delay = float(value)
+                    except ValueError:
+                        pass
+        return cls(rules, crawl_delay, sitemaps)
+    
+    def is_allowed(self, url: str) -> bool:
+        """Check a URL against the rules: the longest matching path wins, Allow on ties."""
+        if self.disallow_all:
+            return False
+        parsed = urlparse(url)
+        path = unquote(parsed.path or '/') + (f"?{unquote(parsed.query)}" if parsed.query else '')
+        if path == '/robots.txt':
+            return True
+        
+        best: Optional[RobotsRule] = None
+        for rule in self.rules:
+            if rule.pattern.match(path):
+                if best is None or len(rule.path) > len(best.path) or (
+                    len(rule.path) == len(best.path) and rule.allow
+                ):
+                    best = rule
+        return best is None or best.allow
+
+
+@dataclass
+class RobotsEntry:
+    """A cached robots.txt fetch for one origin."""
+    origin: str
+    status: Optional[int]
+    content: str
+    fetched_at: float
+    expires_at: float
+    rules: RobotsRules = field(default=None, repr=False)
+    
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+
+class RobotsCache:
+    """robots.txt rules for every origin scraped by this process.
+    
+    Each origin is fetched once per TTL through the pooled HTTP session;
+    concurrent callers wait on the same fetch. Fetches are stored in the
+    database so restarts and other workers reuse them until they expire.
+    Following RFC 9309, a 4xx means no restrictions and a 5xx means the
+    whole site is disallowed until the shorter error_ttl passes. Network
+    failures allow everything for error_ttl and leave the real error to the
+    navigation itself.
+    """
+    
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        self.config = self.settings.robots
+        self.logger = get_logger(__name__)
+        self.entries: 'OrderedDict[str, RobotsEntry]' = OrderedDict()
+        self._fetches: Dict[str, asyncio.Future] = {}
+        self.stats = {'hits': 0, 'loaded': 0, 'fetched': 0, 'disallowed': 0}
+    
+    @staticmethod
+    def origin(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme or 'http'}://{parsed.netloc.lower()}"
+    
+    async def get_rules(self, url: str) -> RobotsRules:
+        """Get the rules for url's origin, fetching robots.txt at most once per TTL."""
+        origin = self.origin(url)
+        entry = self.entries.get(origin)
+        if entry is None or entry.expired():
+            entry = self._load(origin)
+        if entry is not None and not entry.expired():
+            self.entries.move_to_end(origin)
+            self.stats['hits'] += 1
+            return entry.rules
+        
+        fetch = self._fetches.get(origin)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch(origin))
+            self._fetches[origin] = fetch
+            fetch.add_done_callback(lambda done: self._fetches.pop(origin, None))
+        # A cancelled caller must not cancel the fetch other callers are waiting on
+        entry = await asyncio.shield(fetch)
+        return entry.rules
+    
+    async def is_allowed(self, url: str) -> bool:
+        """Check whether robots.txt lets us fetch url."""
+        return (await self.get_rules(url)).is_allowed(url)
+    
+    async def check(self, url: str):
+        """Raise RobotsDisallowedError if robots.txt disallows url."""
+        if not await self.is_allowed(url):
+            self.stats['disallowed'] += 1
+            raise RobotsDisallowedError(url)
+    
+    async def get_crawl_delay(self, url: str) -> float:
+        """Crawl-delay in seconds for url's origin, 0 if none."""
+        return (await self.get_rules(url)).crawl_delay or 0.0
+    
+    async def get_sitemaps(self, url: str) -> List[str]:
+        """Sitemap URLs listed in the robots.txt of url's origin."""
+        return list((await self.get_rules(url)).sitemaps)
+    
+    async def _fetch(self, origin: str) -> RobotsEntry:
+        from .http_scraper import get_http_session
+        
+        status, content = None, ''
+        try:
+            session = await get_http_session()
+            async with session.get(
+                f"{origin}/robots.txt",
+                headers={'User-Agent': self.config.user_agent},
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            ) as response:
+                status = response.status
+                if status < 300:
+                    # Rules past the size limit are ignored, as RFC 9309 allows
+                    body = await response.content.read(self.config.max_bytes)
+                    content = body.decode('utf-8', errors='replace')
+        except Exception as e:
+            self.logger.debug(f"Failed to fetch robots.txt for {origin}: {e}")
+        
+        self.stats['fetched'] += 1
+        now = time.time()
+        ttl = self.config.ttl if status is not None and status < 500 else self.config.error_ttl
+        entry = self._cache(RobotsEntry(origin, status, content, now, now + ttl))
+        if entry.rules.crawl_delay:
+            self.logger.debug(f"Robots.txt crawl delay for {origin}: {entry.rules.crawl_delay}s")
+        self._save(entry)
+        return entry
+    
+    def _cache(self, entry: RobotsEntry) -> RobotsEntry:
+        if entry.status is not None and entry.status >= 500:
+            entry.rules = RobotsRules(disallow_all=True)
+        elif entry.status is not None and entry.status < 300:
+            entry.rules = RobotsRules.parse(entry.content, self.config.user_agent)
+        else:
+            entry.rules = RobotsRules()
+        
+        self.entries[entry.origin] = entry
+        self.entries.move_to_end(entry.origin)
+        while len(self.entries) > self.config.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+    
+    def _load(self, origin: str) -> Optional[RobotsEntry]:
+        if not self.config.persist:
+            return None
+        try:
+            session = get_session_factory(self.settings.database)()
+            model = session.query(RobotsModel).filter_by(origin=origin).first()
+            session.close()
+            if model is None or model.expires_at <= time.time():
+                return None
+            self.stats['loaded'] += 1
+            return self._cache(RobotsEntry(
+                origin, model.status, model.content or '', model.fetched_at, model.expires_at
+            ))
+        except Exception as e:
+            self.logger.error(f"Failed to load robots.txt for {origin}: {e}")
+            return None
+    
+    def _save(self, entry: RobotsEntry):
+        if not self.config.persist:
+            return
+        try:
+            session = get_session_factory(self.settings.database)()
+            model = session.query(RobotsModel).filter_by(origin=entry.origin).first()
+            if model is None:
+                model = RobotsModel(origin=entry.origin)
+                session.add(model)
+            
+            model.status = entry.status
+            model.content = entry.content
+            model.fetched_at = entry.fetched_at
+            model.expires_at = entry.expires_at
+            model.updated_at = datetime.utcnow()
+            
+            session.commit()
+            session.close()
+        except Exception as e:
+            self.logger.error(f"Failed to save robots.txt for {entry.origin}: {e}")
+    
+    def clear(self):
+        """Forget cached rules in memory; stored rules are reloaded until they expire."""
+        self.entries.clear()
+    
+    def close(self):
+        """Nothing to release; the database engine is shared."""
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'cached': len(self.entries)}
+
+
+_robots_cache: Optional[RobotsCache] = None
+
+
+def get_robots_cache() -> RobotsCache:
+    """Get the process-wide robots.txt cache."""
+    global _robots_cache
+    if _robots_cache is None:
+        _robots_cache = RobotsCache()
+    return _robots_cache
+
+
+def close_robots_cache():
+    """Close the robots.txt cache's database connections."""
+    global _robots_cache
+    if _robots_cache is not None:
+        _robots_cache.close()
+        _robots_cache = None
@@ -290,6 +290,9 @@ class ScrapingScheduler:
         try:
             self.logger.info(f"Executing scheduled job: {name}")
             
+            # Repeated runs skip pages that have not changed unless the job opts out
+            metadata = {'detect_changes': self.settings.change_detection.enabled, **(metadata or {})}
+            
             # Add job to queue
             job_id = self.job_queue.add_job(
                 name=name,
@@ -0,0 +1,191 @@
+"""
+Declarative extraction schemas compiled into a single in-page function.
+"""
+
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+from urllib.parse import urljoin
+import yaml
+from pydantic import BaseModel, PrivateAttr, validator
+from .extraction import build_extract_script, clean_item
+from .pagination import PAGINATION_MODES
+
+
+def parse_number(value: str) -> Optional[float]:
+    """Parse the first number in a string, ignoring currency and thousands separators."""
+    match = re.search(r'-?\d[\d,]*(?:\.\d+)?', value or "")
+    if not match:
+        return None
+    return float(match.group(0).replace(',', ''))
+
+
+def parse_int(value: str) -> Optional[int]:
+    """Parse the first number in a string as an integer."""
+    number = parse_number(value)
+    return int(number) if number is not None else None
+
+
+PROCESSORS: Dict[str, Callable[[Any], Any]] = {
+    'strip': lambda value: value.strip(),
+    'lower': lambda value: value.lower(),
+    'upper': lambda value: value.upper(),
+    'number': parse_number,
+    'int': parse_int,
+}
+
+# Processors that need the page URL, applied by CompiledSchema
+URL_PROCESSORS = {'absolute_url'}
+
+
+class FieldSchema(BaseModel):
+    """One extracted field: candidate selectors and post-processing."""
+    selectors: List[str]
+    attribute: Optional[str] = None
+    multiple: bool = False
+    regex: Optional[str] = None  # keep the first group (or whole match) of this pattern
+    process: List[str] = []
+    default: Any = None
+    required: bool = False  # drop items where this field is empty
+    
+    @validator('selectors', pre=True)
+    def validate_selectors(cls, v):
+        if isinstance(v, str):
+            v = [v]
+        if not v:
+            raise ValueError('At least one selector is required')
+        return v
+    
+    @validator('process', each_item=True)
+    def validate_process(cls, v):
+        if v not in PROCESSORS and v not in URL_PROCESSORS:
+            raise ValueError(f'Unknown processor: {v}')
+        return v
+
+
+class PaginationSchema(BaseModel):
+    """How to reach the rest of a listing; see core.pagination."""
+    mode: str = 'next_link'
+    next_selector: Optional[str] = None  # next link or load-more button
+    max_steps: Optional[int] = None
+    max_items: Optional[int] = None
+    
+    @validator('mode')
+    def validate_mode(cls, v):
+        if v not in PAGINATION_MODES:
+            raise ValueError(f'Unknown pagination mode: {v}')
+        return v
+    
+    @validator('next_selector', always=True)
+    def validate_next_selector(cls, v, values):
+        if values.get('mode') != 'scroll' and not v:
+            raise ValueError('next_selector is required unless mode is scroll')
+        return v
+
+
+class ExtractionSchema(BaseModel):
+    """Declarative description of the items on a page."""
+    name: str
+    container: str
+    fields: Dict[str, FieldSchema]
+    ready_selectors: List[str] = []  # defaults to the container selector
+    pagination: Optional[PaginationSchema] = None
+    
+    _compiled: Optional['CompiledSchema'] = PrivateAttr(default=None)
+    
+    @validator('fields', pre=True)
+    def expand_field_shorthand(cls, v):
+        # "name: .title" and "name: {selector: .title}" are shorthand for selectors lists
+        expanded = {}
+        for name, field in (v or {}).items():
+            if isinstance(field, (str, list)):
+                field = {'selectors': field}
+            elif isinstance(field, dict) and 'selector' in field:
+                field = dict(field)
+                field['selectors'] = field.pop('selector')
+            expanded[name] = field
+        return expanded
+    
+    def compile(self) -> 'CompiledSchema':
+        """Compile the schema once; later calls return the cached result."""
+        if self._compiled is None:
+            self._compiled = CompiledSchema(self)
+        return self._compiled
+
+
+class CompiledSchema:
+    """Schema compiled to a page function plus Python post-processing."""
+    
+    def __init__(self, schema: ExtractionSchema):
+        self.schema = schema
+        self.field_specs = [
+            {
+                'name': name,
+                'selectors': field.selectors,
+                'attribute': field.attribute,
+                'multiple': field.multiple
+            }
+            for name, field in schema.fields.items()
+        ]
+        self.script = build_extract_script(schema.container, self.field_specs)
+        self._patterns = {
+            name: re.compile(field.regex)
+            for name, field in schema.fields.items() if field.regex
+        }
+    
+    def process(self, items: List[Dict[str, Any]], base_url: str = "") -> List[Dict[str, Any]]:
+        """Clean and post-process raw extracted items, dropping ones missing required fields."""
+        processed = []
+        for item in items:
+            item = clean_item(item, self.field_specs)
+            for name, field in self.schema.fields.items():
+                if field.multiple:
+                    item[name] = [self._process_value(name, field, value, base_url) for value in item[name]]
+                else:
+                    item[name] = self._process_value(name, field, item[name], base_url)
+            
+            if all(item[name] not in (None, "", []) for name, field in self.schema.fields.items() if field.required):
+                processed.append(item)
+        return processed
+    
+    def _process_value(self, name: str, field: FieldSchema, value: str, base_url: str) -> Any:
+        """Apply regex, processors and default to a single value."""
+        if value and name in self._patterns:
+            match = self._patterns[name].search(value)
+            value = (match.group(1) if match.groups() else match.group(0)) if match else ""
+        
+        for processor in field.process:
+            if value in (None, ""):
+                break
+            if processor == 'absolute_url':
+                value = urljoin(base_url, value)
+            else:
+                value = PROCESSORS[processor](value)
+        
+        if value in (None, "") and field.default is not None:
+            return field.default
+        return value
+
+
+def load_schema(source: Union[str, Path, Dict[str, Any]]) -> ExtractionSchema:
+    """Load a schema from a YAML file or a dict."""
+    if isinstance(source, dict):
+        return ExtractionSchema(**source)
+    
+    with open(source, 'r') as f:
+        data = yaml.safe_load(f)
+    data.setdefault('name', Path(source).stem)
+    return ExtractionSchema(**data)
+
+
+def load_schemas(directory: Union[str, Path]) -> Dict[str, ExtractionSchema]:
+    """Load every YAML schema in a directory, keyed by schema name."""
+    schemas = {}
+    path = Path(directory)
+    if not path.is_dir():
+        return schemas
+    
+    for schema_file in sorted(list(path.glob('*.yaml')) + list(path.glob('*.yml'))):
+        schema = load_schema(schema_file)
+        schemas[schema.name] = schema
+    return schemas
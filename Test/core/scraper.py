@@ -3,30 +3,76 @@ Base scraper class with navigation, retry logic, and data extraction.
 """
 
 import asyncio
+import copy
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple, Union
+)
 from pathlib import Path
-from playwright.async_api import Page, BrowserContext
+from playwright.async_api import Page, BrowserContext, TimeoutError as PlaywrightTimeoutError
 from config.settings import get_settings
 from utils.logger import get_logger
-from utils.helpers import retry_async, clean_text, is_valid_url
-from .browser import BrowserManager
-from .rate_limiter import RateLimiter
+from utils.helpers import clean_text, is_valid_url
+from utils.timing import phase, timed
+from .browser import BrowserManager, get_browser_pool
+from .interception import RequestInterceptor
+from .navigation import ReadyCondition, get_navigation_metrics
+from .extraction import (
+    EXTRACT_MANY_SCRIPT, EXTRACT_NEW_ITEMS_SCRIPT, HAS_NEW_ITEMS_SCRIPT, clean_item, normalize_fields
+)
+from .pagination import Paginator
+from .change_detection import PageCheck
+from .circuit_breaker import get_circuit_breaker
+from .concurrency import get_concurrency_limiter
+from .errors import classify_exception, classify_status, retry_navigation
+from .capture import ResponseCapture
+from .schema import ExtractionSchema
+from .rate_limiter import get_rate_limiter
 from .stealth import StealthManager
 
 
+def result_records(result: Any) -> List[Any]:
+    """Get the records in a scrape result: a list's items, or a single record."""
+    if result is None:
+        return []
+    if isinstance(result, list):
+        return result
+    return [result] if result else []
+
+
 class BaseScraper(ABC):
     """Abstract base class for web scrapers."""
     
+    # Per-scraper overrides of browser.interception settings,
+    # e.g. {'block_resource_types': ['media']} for a scraper that needs images
+    interception_overrides: Dict[str, Any] = {}
+    
+    # Default readiness condition for navigate(); None waits for wait_until
+    ready_condition: Optional[ReadyCondition] = None
+    
     def __init__(self, name: str = None):
         self.name = name or self.__class__.__name__
         self.settings = get_settings()
         self.logger = get_logger(f"scraper.{self.name}")
         self.browser_manager = None
+        self.browser_lease = None
         self.rate_limiter = None
+        # Shared by all scrapers in the process, so one worker's failures protect the others
+        self.circuit_breaker = get_circuit_breaker()
+        self.concurrency = get_concurrency_limiter()
         self.stealth_manager = None
+        self.interceptor = None
         self.context = None
         self.page = None
+        self.page_ready = False
+        self.response_status: Optional[int] = None
+        self.response_headers: Dict[str, str] = {}
+        # Set for jobs that skip unchanged pages; checked on the first navigation to its URL
+        self.change_check: Optional[PageCheck] = None
+        self.captures: List[ResponseCapture] = []
+        # Set for crawl jobs; receives the links on each successfully scraped page
+        self.link_collector: Optional[Callable[[List[str]], Any]] = None
         
     async def __aenter__(self):
         await self.initialize()
@@ -35,21 +81,30 @@ class BaseScraper(ABC):
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.cleanup()
     
+    @timed('setup')
     async def initialize(self):
         """Initialize scraper components."""
         try:
             self.logger.info(f"Initializing scraper: {self.name}")
             
             # Initialize managers
-            self.browser_manager = BrowserManager()
-            self.rate_limiter = RateLimiter()
+            self.rate_limiter = get_rate_limiter()
             self.stealth_manager = StealthManager()
             
-            # Start browser
-            await self.browser_manager.start()
+            if self.settings.browser.pool.enabled:
+                # Lease a context from the process-wide warm browser pool
+                self.browser_lease = await get_browser_pool().acquire()
+                self.browser_manager = self.browser_lease.manager
+                self.context = self.browser_lease.context
+            else:
+                # Start a dedicated browser
+                self.browser_manager = BrowserManager()
+                await self.browser_manager.start()
+                self.context = await self.browser_manager.create_context()
             
-            # Create browser context
-            self.context = await self.browser_manager.create_context()
+            # Block heavy resources and trackers before any navigation
+            self.interceptor = RequestInterceptor(overrides=self.interception_overrides)
+            await self.interceptor.install(self.browser_manager, self.context)
             
             # Create page
             self.page = await self.browser_manager.new_page(self.context)
@@ -64,71 +119,284 @@ class BaseScraper(ABC):
             self.logger.error(f"Failed to initialize scraper {self.name}: {e}")
             raise
     
+    @timed('teardown')
     async def cleanup(self):
         """Cleanup scraper resources."""
         try:
+            if self.interceptor and self.interceptor.stats.requests_blocked:
+                stats = self.interceptor.stats
+                self.logger.info(
+                    f"Blocked {stats.requests_blocked}/{stats.requests_seen} requests, "
+                    f"~{stats.bytes_saved // 1024} KB saved (estimated, "
+                    f"{stats.bytes_saved_from_defaults // 1024} KB from default sizes)"
+                )
+            
+            for capture in self.captures:
+                capture.stop()
+            self.captures.clear()
+            
             if self.page:
                 await self.page.close()
-            if self.context:
-                await self.context.close()
-            if self.browser_manager:
-                await self.browser_manager.close()
+            if self.browser_lease:
+                # Hand the context back; the browser stays warm in the pool
+                await get_browser_pool().release(self.browser_lease)
+                self.browser_lease = None
+            else:
+                if self.context:
+                    await self.context.close()
+                if self.browser_manager:
+                    await self.browser_manager.close()
             
             self.logger.info(f"Scraper {self.name} cleaned up")
             
         except Exception as e:
             self.logger.error(f"Error during cleanup: {e}")
     
-    async def navigate(self, url: str, wait_until: str = "networkidle") -> Page:
-        """Navigate to URL with rate limiting and retry logic."""
+    async def navigate(
+        self,
+        url: str,
+        wait_until: str = "networkidle",
+        ready: Optional[ReadyCondition] = None
+    ) -> Page:
+        """Navigate to URL with rate limiting and retry logic.
+        
+        With a ready condition (or the scraper's ready_condition) navigation
+        returns as soon as it holds, falling back to a capped networkidle wait.
+        Failures raise a NavigationError subclass: permanent ones are not
+        retried, and CircuitOpenError is raised without a request while the
+        domain's circuit breaker is open.
+        """
         if not is_valid_url(url):
             raise ValueError(f"Invalid URL: {url}")
         
-        # Apply rate limiting
-        await self.rate_limiter.wait_for_token(url)
+        ready = ready or self.ready_condition
         
-        # Navigate with retry logic
-        success = await retry_async(
-            self._navigate_with_retry,
-            url,
-            wait_until,
-            max_retries=self.settings.scraping.max_retries,
-            delay=self.settings.scraping.retry_delay,
-            exceptions=(Exception,)
-        )
+        with self.circuit_breaker.guard(url) as circuit:
+            # Apply rate limiting
+            with phase('rate_limit'):
+                await self.rate_limiter.wait_for_token(url, proxy=self._proxy_server())
+            
+            # Navigate with retries chosen by error class, within the domain's concurrency limit
+            async with self.concurrency.slot(url):
+                await retry_navigation(
+                    self._navigate_with_retry,
+                    url,
+                    wait_until,
+                    ready,
+                    max_retries=self.settings.scraping.max_retries,
+                    delay=self.settings.scraping.retry_delay,
+                    max_retry_after=self.settings.scraping.max_retry_after,
+                    circuit=circuit,
+                    concurrency=self.concurrency,
+                    before_retry=lambda: self.rate_limiter.wait_for_token(url, proxy=self._proxy_server())
+                )
         
-        if not success:
-            raise Exception(f"Failed to navigate to {url} after {self.settings.scraping.max_retries} retries")
+        if self.change_check is not None and self.change_check.url == url:
+            # Playwright cannot make only the document request conditional, so compare the rendered page
+            check, self.change_check = self.change_check, None
+            with phase('change_check'):
+                check.observe('browser', self.response_status, self.response_headers, await self.page.content())
         
         return self.page
     
-    async def _navigate_with_retry(self, url: str, wait_until: str) -> bool:
-        """Internal navigation method with retry logic."""
+    async def _navigate_with_retry(self, url: str, wait_until: str, ready: Optional[ReadyCondition] = None) -> bool:
+        """Make one navigation attempt; raises a classified NavigationError on failure."""
+        response_waiter = None
+        started = time.monotonic()
         try:
             self.logger.info(f"Navigating to: {url}")
+            self.page_ready = False
             
-            response = await self.page.goto(
-                url,
-                wait_until=wait_until,
-                timeout=self.settings.browser.timeout
-            )
+            if ready:
+                ready_timeout = ready.timeout or self.settings.scraping.ready_timeout
+                # Arm response matching before the request goes out
+                response_waiter = ready.watch_responses(self.page, ready_timeout)
+                wait_until = "domcontentloaded"
+            
+            with phase('goto'):
+                response = await self.page.goto(
+                    url,
+                    wait_until=wait_until,
+                    timeout=self.settings.browser.timeout
+                )
+            
+            if response:
+                self._record_response(
+                    url, response.status, self._response_latency(response, started), response.headers
+                )
             
             if response and response.status < 400:
-                self.logger.info(f"Successfully navigated to {url}")
+                self.response_status = response.status
+                self.response_headers = response.headers
+                if ready:
+                    with phase('ready_wait'):
+                        mode = await self._wait_until_ready(url, ready, ready_timeout, response_waiter)
+                else:
+                    mode = 'load'
+                    self.page_ready = True
+                
+                elapsed = time.monotonic() - started
+                get_navigation_metrics().record(url, elapsed, mode)
+                self.logger.info(f"Successfully navigated to {url} (ready in {elapsed:.2f}s, {mode})")
                 
                 # Simulate human behavior
                 if self.settings.browser.stealth_mode:
-                    await self.stealth_manager.simulate_human_behavior(self.page)
+                    with phase('human_behavior'):
+                        await self.stealth_manager.simulate_human_behavior(self.page)
                 
                 return True
-            else:
-                self.logger.warning(f"Navigation failed with status: {response.status if response else 'No response'}")
-                return False
-                
+            
+            self.logger.warning(f"Navigation failed with status: {response.status if response else 'No response'}")
+            if response is None:
+                raise classify_exception(url, Exception("No response"))
+            raise classify_status(url, response.status, response.headers)
+        
         except Exception as e:
-            self.logger.warning(f"Navigation failed: {e}")
-            return False
+            if isinstance(e, (asyncio.TimeoutError, PlaywrightTimeoutError)):
+                self._record_response(url, None, time.monotonic() - started)
+            error = classify_exception(url, e)
+            self.logger.warning(f"Navigation failed ({error.kind}): {e}")
+            if error is e:
+                raise
+            raise error from e
+        finally:
+            if response_waiter is not None and not response_waiter.done():
+                response_waiter.cancel()
+    
+    def _record_response(
+        self,
+        url: str,
+        status: Optional[int],
+        seconds: float,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """Feed a response's status and latency to the domain's adaptive rate and concurrency limits."""
+        self.rate_limiter.record_response(url, status, seconds, headers)
+        self.concurrency.record(url, status, seconds)
+    
+    def _proxy_server(self) -> Optional[str]:
+        """Proxy this scraper's browser requests go out through, for per-proxy rate limits."""
+        if self.browser_manager is None:
+            return None
+        return self.browser_manager.get_proxy_server(self.context)
+    
+    @staticmethod
+    def _response_latency(response, started: float) -> float:
+        """Seconds until the document's response headers arrived, without page load time."""
+        try:
+            response_start = response.request.timing.get('responseStart', -1)
+        except Exception:
+            response_start = -1
+        if isinstance(response_start, (int, float)) and response_start > 0:
+            return response_start / 1000.0
+        return time.monotonic() - started
+    
+    async def capture_responses(
+        self,
+        pattern: Union[str, Pattern],
+        resource_types: Optional[Sequence[str]] = ('xhr', 'fetch'),
+        max_body_bytes: Optional[int] = None,
+        max_responses: Optional[int] = None
+    ) -> ResponseCapture:
+        """Buffer JSON responses whose URL matches a glob or regex; call before navigating.
+        
+        The capture keeps listening across navigations until stop() or cleanup.
+        Read parsed bodies from capture.data or wait with capture.wait_for().
+        """
+        capture = ResponseCapture(
+            pattern,
+            max_body_bytes=max_body_bytes or self.settings.scraping.capture_max_body_bytes,
+            max_responses=max_responses or self.settings.scraping.capture_max_responses,
+            resource_types=resource_types
+        )
+        capture.attach(self.page)
+        self.captures.append(capture)
+        return capture
+    
+    async def capture_api(
+        self,
+        url: str,
+        pattern: Union[str, Pattern],
+        count: int = 1,
+        timeout: Optional[float] = None,
+        resource_types: Optional[Sequence[str]] = ('xhr', 'fetch')
+    ) -> List[Any]:
+        """Open a page and return the JSON bodies of its first `count` matching API responses.
+        
+        Returns as soon as they arrive: navigation only waits for the document
+        to commit, not for the page to load or render.
+        """
+        if not is_valid_url(url):
+            raise ValueError(f"Invalid URL: {url}")
+        
+        capture = await self.capture_responses(pattern, resource_types=resource_types, max_responses=count)
+        try:
+            started = time.monotonic()
+            self.page_ready = False
+            with self.circuit_breaker.guard(url) as circuit:
+                with phase('rate_limit'):
+                    await self.rate_limiter.wait_for_token(url, proxy=self._proxy_server())
+                async with self.concurrency.slot(url):
+                    with phase('goto'):
+                        await retry_navigation(
+                            self._commit,
+                            url,
+                            max_retries=self.settings.scraping.max_retries,
+                            delay=self.settings.scraping.retry_delay,
+                            max_retry_after=self.settings.scraping.max_retry_after,
+                            circuit=circuit,
+                            concurrency=self.concurrency,
+                            before_retry=lambda: self.rate_limiter.wait_for_token(url, proxy=self._proxy_server())
+                        )
+            with phase('api_wait'):
+                responses = await capture.wait_for(count, timeout or self.settings.scraping.ready_timeout)
+            
+            elapsed = time.monotonic() - started
+            get_navigation_metrics().record(url, elapsed, 'response')
+            self.logger.info(f"Captured {len(responses)} API responses from {url} in {elapsed:.2f}s")
+            return [response.data for response in responses]
+        finally:
+            capture.stop()
+            self.captures.remove(capture)
     
+    async def _commit(self, url: str):
+        """Navigate until the document response commits; raises on an error status."""
+        started = time.monotonic()
+        try:
+            response = await self.page.goto(url, wait_until="commit", timeout=self.settings.browser.timeout)
+        except PlaywrightTimeoutError:
+            self._record_response(url, None, time.monotonic() - started)
+            raise
+        if response is not None:
+            self._record_response(url, response.status, time.monotonic() - started, response.headers)
+        if response is not None and response.status >= 400:
+            raise classify_status(url, response.status, response.headers)
+    
+    async def _wait_until_ready(
+        self,
+        url: str,
+        ready: ReadyCondition,
+        timeout: float,
+        response_waiter: Optional[asyncio.Task] = None
+    ) -> str:
+        """Wait for the ready condition, falling back to a capped networkidle wait."""
+        try:
+            await ready.wait(self.page, timeout, response_waiter)
+            self.page_ready = True
+            return 'ready'
+        except Exception as e:
+            self.logger.info(f"Ready condition not met for {url}: {e}")
+        
+        try:
+            await self.page.wait_for_load_state(
+                "networkidle",
+                timeout=self.settings.scraping.networkidle_fallback_timeout * 1000
+            )
+        except Exception:
+            self.logger.debug(f"Network not idle for {url} within fallback cap")
+        return 'fallback'
+    
+    @timed('selector_wait')
     async def wait_for_selector(
         self, 
         selector: str, 
@@ -149,8 +417,44 @@ class BaseScraper(ABC):
             self.logger.warning(f"Element {selector} not found: {e}")
             return False
     
+    @timed('selector_wait')
+    async def wait_for_any(
+        self,
+        selectors: List[str],
+        timeout: Optional[int] = None,
+        state: str = "visible"
+    ) -> Optional[str]:
+        """Wait on all candidate selectors at once and return the first one that matched."""
+        timeout = timeout or self.settings.scraping.wait_for_selector_timeout
+        
+        waiters = {
+            asyncio.ensure_future(
+                self.page.wait_for_selector(selector, timeout=timeout * 1000, state=state)
+            ): selector
+            for selector in selectors
+        }
+        pending = set(waiters)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the earliest candidate when several match in the same tick
+                for task in sorted(done, key=lambda task: selectors.index(waiters[task])):
+                    if not task.cancelled() and task.exception() is None:
+                        return waiters[task]
+            
+            self.logger.warning(f"None of {selectors} found within {timeout}s")
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    @timed('selector_wait')
     async def wait_for_load(self, timeout: Optional[int] = None):
         """Wait for page to fully load."""
+        if self.page_ready:
+            # navigate() already waited for the page to be ready
+            return
+        
         timeout = timeout or self.settings.scraping.timeout
         
         try:
@@ -158,6 +462,7 @@ class BaseScraper(ABC):
         except Exception as e:
             self.logger.warning(f"Page load timeout: {e}")
     
+    @timed('extract')
     async def get_text(self, selector: str) -> str:
         """Get text content from element."""
         try:
@@ -170,19 +475,20 @@ class BaseScraper(ABC):
             self.logger.warning(f"Failed to get text from {selector}: {e}")
             return ""
     
+    @timed('extract')
     async def get_texts(self, selector: str) -> List[str]:
         """Get text content from multiple elements."""
         try:
-            elements = await self.page.query_selector_all(selector)
-            texts = []
-            for element in elements:
-                text = await element.inner_text()
-                texts.append(clean_text(text))
-            return texts
+            texts = await self.page.eval_on_selector_all(
+                selector,
+                "elements => elements.map(element => element.innerText)"
+            )
+            return [clean_text(text) for text in texts]
         except Exception as e:
             self.logger.warning(f"Failed to get texts from {selector}: {e}")
             return []
     
+    @timed('extract')
     async def get_attribute(self, selector: str, attribute: str) -> str:
         """Get attribute value from element."""
         try:
@@ -195,19 +501,144 @@ class BaseScraper(ABC):
             self.logger.warning(f"Failed to get attribute {attribute} from {selector}: {e}")
             return ""
     
+    @timed('extract')
     async def get_attributes(self, selector: str, attribute: str) -> List[str]:
         """Get attribute values from multiple elements."""
         try:
-            elements = await self.page.query_selector_all(selector)
-            values = []
-            for element in elements:
-                value = await element.get_attribute(attribute)
-                values.append(value or "")
-            return values
+            values = await self.page.eval_on_selector_all(
+                selector,
+                "(elements, attribute) => elements.map(element => element.getAttribute(attribute))",
+                attribute
+            )
+            return [value or "" for value in values]
         except Exception as e:
             self.logger.warning(f"Failed to get attributes {attribute} from {selector}: {e}")
             return []
     
+    @timed('extract')
+    async def extract_many(
+        self,
+        container_selector: str,
+        fields: Dict[str, Union[str, Tuple[str, str], Dict[str, Any]]]
+    ) -> List[Dict[str, str]]:
+        """Extract fields from every container element in a single page round trip.
+        
+        Each field is a selector (inner text), a (selector, attribute) tuple, or a
+        dict with 'selector' or a list of fallback 'selectors' and an optional
+        'attribute'. Missing fields come back as empty strings.
+        """
+        field_specs = normalize_fields(fields)
+        try:
+            items = await self.page.evaluate(EXTRACT_MANY_SCRIPT, [container_selector, field_specs])
+            return [clean_item(item, field_specs) for item in items]
+        except Exception as e:
+            self.logger.warning(f"Failed to extract items from {container_selector}: {e}")
+            return []
+    
+    @timed('extract')
+    async def extract_schema(self, schema: ExtractionSchema) -> List[Dict[str, Any]]:
+        """Extract a schema's items with its compiled page function in one round trip."""
+        compiled = schema.compile()
+        try:
+            items = await self.page.evaluate(compiled.script)
+            return compiled.process(items, base_url=self.page.url)
+        except Exception as e:
+            self.logger.warning(f"Failed to extract schema {schema.name}: {e}")
+            return []
+    
+    def paginate(
+        self,
+        container_selector: Optional[str] = None,
+        fields: Optional[Dict[str, Any]] = None,
+        schema: Optional[ExtractionSchema] = None,
+        mode: str = 'scroll',
+        next_selector: Optional[str] = None,
+        max_steps: Optional[int] = None,
+        max_items: Optional[int] = None,
+        step_timeout: Optional[float] = None
+    ) -> Paginator:
+        """Page through the current listing, yielding only the items each step adds.
+        
+        Takes extract_many-style fields or a schema. Iterate the returned
+        Paginator with `async for`; its get_stats() reports per-step latency.
+        """
+        if schema is not None:
+            compiled = schema.compile()
+            container_selector = container_selector or schema.container
+            field_specs, process = compiled.field_specs, compiled.process
+        elif fields is not None:
+            field_specs = normalize_fields(fields)
+            process = lambda items, base_url: [clean_item(item, field_specs) for item in items]
+        else:
+            raise ValueError("paginate needs fields or a schema")
+        
+        return Paginator(
+            self,
+            container_selector,
+            field_specs,
+            process,
+            mode=mode,
+            next_selector=next_selector,
+            max_steps=max_steps,
+            max_items=max_items,
+            step_timeout=step_timeout
+        )
+    
+    @timed('extract')
+    async def _extract_new_items(
+        self,
+        container_selector: str,
+        field_specs: List[Dict[str, Any]],
+        key: str
+    ) -> List[Dict[str, Any]]:
+        """Extract raw items from containers not yet extracted under this key."""
+        try:
+            return await self.page.evaluate(EXTRACT_NEW_ITEMS_SCRIPT, [container_selector, field_specs, key])
+        except Exception as e:
+            self.logger.warning(f"Failed to extract new items from {container_selector}: {e}")
+            return []
+    
+    def _forget_new_items(self, key: str):
+        """Called when a paginator is done with its key; the page-side marks go with the page."""
+    
+    @timed('selector_wait')
+    async def _wait_for_new_items(self, container_selector: str, key: str, timeout: float) -> bool:
+        """Wait until a container not yet extracted under this key appears."""
+        try:
+            await self.page.wait_for_function(
+                HAS_NEW_ITEMS_SCRIPT,
+                arg=[container_selector, key],
+                timeout=timeout * 1000,
+                polling=100
+            )
+            return True
+        except Exception:
+            return False
+    
+    def get_url(self) -> str:
+        """Get the URL of the current page."""
+        return self.page.url if self.page else ""
+    
+    @timed('extract')
+    async def discover_links(self) -> List[str]:
+        """Get the absolute URLs of all links on the current page in one round trip."""
+        try:
+            return await self.page.evaluate(
+                "() => Array.from(document.querySelectorAll('a[href]'), link => link.href)"
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to discover links: {e}")
+            return []
+    
+    async def _collect_links(self):
+        """Hand the current page's links to the link collector, if any."""
+        if self.link_collector is None:
+            return
+        try:
+            self.link_collector(await self.discover_links())
+        except Exception as e:
+            self.logger.error(f"Failed to collect links: {e}")
+    
     async def click(self, selector: str, wait_after: bool = True) -> bool:
         """Click element and optionally wait for navigation."""
         try:
@@ -255,6 +686,12 @@ class BaseScraper(ABC):
             self.logger.warning(f"Failed to select option in {selector}: {e}")
             return False
     
+    def get_interception_stats(self) -> Dict[str, Any]:
+        """Get blocked request and bytes saved counters for this scraper."""
+        if not self.interceptor:
+            return {}
+        return self.interceptor.get_stats()
+    
     async def take_screenshot(self, path: str, full_page: bool = True):
         """Take screenshot of current page."""
         try:
@@ -304,11 +741,134 @@ class BaseScraper(ABC):
         """Main scraping method to be implemented by subclasses."""
         pass
     
+    async def scrape_iter(self, url: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield records as they are extracted.
+        
+        The default yields the records of scrape(); scrapers that extract in
+        steps override this so records can be persisted before the page is done.
+        """
+        for record in result_records(await self.scrape(url)):
+            yield record
+    
+    async def run_iter(self, url: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream records from scrape_iter with error handling and logging."""
+        count = 0
+        try:
+            self.logger.info(f"Starting streaming scrape of {url}")
+            async for record in self.scrape_iter(url):
+                count += 1
+                yield record
+            await self._collect_links()
+            self.logger.info(f"Streaming scrape completed for {url} ({count} records)")
+        except Exception as e:
+            self.logger.error(f"Streaming scrape failed for {url} after {count} records: {e}")
+            raise
+    
+    async def run_many(
+        self,
+        urls: Union[Iterable[str], AsyncIterable[str]],
+        concurrency: int = 4
+    ) -> AsyncIterator[Tuple[str, Any, Optional[Exception]]]:
+        """Scrape many URLs with up to `concurrency` pages open in this scraper's context.
+        
+        URLs are consumed lazily and results are yielded as (url, result, error)
+        in completion order, so memory does not grow with the number of URLs.
+        """
+        url_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        done = object()
+        tabs = {'opening': concurrency, 'open': 0}
+        
+        async def produce():
+            try:
+                if hasattr(urls, '__aiter__'):
+                    async for url in urls:
+                        await url_queue.put(url)
+                else:
+                    for url in urls:
+                        await url_queue.put(url)
+            finally:
+                # Let every worker finish even if reading URLs failed
+                for _ in range(concurrency):
+                    await url_queue.put(None)
+        
+        async def work():
+            tab = None
+            try:
+                try:
+                    tab = await self._open_tab()
+                    tabs['open'] += 1
+                finally:
+                    tabs['opening'] -= 1
+                while True:
+                    url = await url_queue.get()
+                    if url is None:
+                        break
+                    try:
+                        await results.put((url, await tab.run(url), None))
+                    except Exception as e:
+                        await results.put((url, None, e))
+            except Exception as e:
+                self.logger.error(f"Failed to open tab: {e}")
+                if not tabs['open'] and not tabs['opening']:
+                    # No tab could be opened, so report every URL as failed rather than dropping it
+                    while True:
+                        url = await url_queue.get()
+                        if url is None:
+                            break
+                        await results.put((url, None, e))
+            finally:
+                if tab is not None:
+                    await self._close_tab(tab)
+                await results.put(done)
+        
+        tasks = [asyncio.ensure_future(produce())]
+        tasks.extend(asyncio.ensure_future(work()) for _ in range(concurrency))
+        try:
+            remaining = concurrency
+            while remaining:
+                item = await results.get()
+                if item is done:
+                    remaining -= 1
+                else:
+                    yield item
+            # Surface producer errors, e.g. an unreadable URL file
+            if tasks[0].done() and not tasks[0].cancelled():
+                tasks[0].result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _open_tab(self) -> 'BaseScraper':
+        """Create a copy of this scraper with its own page in the shared context."""
+        tab = copy.copy(self)
+        tab.page_ready = False
+        # Per-page state; the copy would otherwise share it with this scraper
+        tab.captures = []
+        tab.change_check = None
+        if self.page is not None:
+            tab.page = await self.browser_manager.new_page(self.context)
+            if self.settings.browser.stealth_mode:
+                await self.stealth_manager.apply_stealth_features(tab.page)
+        return tab
+    
+    async def _close_tab(self, tab: 'BaseScraper'):
+        """Close a tab's page, or everything it started on its own (e.g. an HTTP fallback)."""
+        if tab.browser_manager is not self.browser_manager:
+            await tab.cleanup()
+        elif tab.page is not None and tab.page is not self.page:
+            try:
+                await tab.page.close()
+            except Exception as e:
+                self.logger.debug(f"Failed to close tab: {e}")
+    
     async def run(self, url: str) -> Any:
         """Run scraper with error handling and logging."""
         try:
             self.logger.info(f"Starting scrape of {url}")
             result = await self.scrape(url)
+            await self._collect_links()
             self.logger.info(f"Scrape completed successfully for {url}")
             return result
         except Exception as e:
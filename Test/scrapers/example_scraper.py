@@ -4,12 +4,16 @@ Example scraper demonstrating all features.
 
 from typing import List, Dict, Any
 from core.scraper import BaseScraper
+from core.navigation import ReadyCondition
 from utils.logger import get_logger
 
 
 class ExampleScraper(BaseScraper):
     """Example scraper for demonstration purposes."""
     
+    # Ready as soon as products render; pages without them use the capped fallback
+    ready_condition = ReadyCondition(selectors=['.product-item'])
+    
     def __init__(self):
         super().__init__("ExampleScraper")
         self.logger = get_logger(__name__)
@@ -28,33 +32,18 @@ class ExampleScraper(BaseScraper):
             
             # Wait for product list to appear
             if await self.wait_for_selector('.product-item', timeout=10):
-                # Get all product elements
-                product_elements = await self.page.query_selector_all('.product-item')
+                # Extract every product in one round trip
+                items = await self.extract_many('.product-item', {
+                    'name': '.product-name',
+                    'price': '.product-price',
+                    'description': '.product-description',
+                    'image_url': ('.product-image img', 'src')
+                })
                 
-                for element in product_elements:
-                    try:
-                        # Extract product data
-                        product = {
-                            'name': await element.query_selector('.product-name') and 
-                                   await element.query_selector('.product-name').inner_text() or '',
-                            'price': await element.query_selector('.product-price') and 
-                                    await element.query_selector('.product-price').inner_text() or '',
-                            'description': await element.query_selector('.product-description') and 
-                                          await element.query_selector('.product-description').inner_text() or '',
-                            'image_url': await element.query_selector('.product-image img') and 
-                                        await element.query_selector('.product-image img').get_attribute('src') or '',
-                            'url': url
-                        }
-                        
-                        # Clean the data
-                        product = {k: v.strip() if isinstance(v, str) else v for k, v in product.items()}
-                        
-                        if product['name']:  # Only add products with names
-                            products.append(product)
-                            
-                    except Exception as e:
-                        self.logger.warning(f"Failed to extract product data: {e}")
-                        continue
+                for product in items:
+                    product['url'] = url
+                    if product['name']:  # Only add products with names
+                        products.append(product)
             
             # If no products found, try alternative selectors
             if not products:
@@ -83,6 +72,11 @@ class ExampleScraper(BaseScraper):
 class NewsScraper(BaseScraper):
     """Example news scraper."""
     
+    ready_condition = ReadyCondition(
+        selectors=['article', '.article', '.news-item', '.post', '.entry'],
+        require_all=False
+    )
+    
     def __init__(self):
         super().__init__("NewsScraper")
         self.logger = get_logger(__name__)
@@ -104,33 +98,21 @@ class NewsScraper(BaseScraper):
                 '.entry'
             ]
             
-            for selector in article_selectors:
-                if await self.wait_for_selector(selector, timeout=5):
-                    article_elements = await self.page.query_selector_all(selector)
+            # Wait on every candidate at once, then try the first match before the rest
+            matched = await self.wait_for_any(article_selectors, timeout=5)
+            if matched:
+                for selector in [matched] + [s for s in article_selectors if s != matched]:
+                    items = await self.extract_many(selector, {
+                        'title': 'h1, h2, h3, .title, .headline',
+                        'content': '.content, .body, .text, p',
+                        'author': '.author, .byline',
+                        'date': '.date, .published, time'
+                    })
                     
-                    for element in article_elements:
-                        try:
-                            article = {
-                                'title': await element.query_selector('h1, h2, h3, .title, .headline') and 
-                                        await element.query_selector('h1, h2, h3, .title, .headline').inner_text() or '',
-                                'content': await element.query_selector('.content, .body, .text, p') and 
-                                          await element.query_selector('.content, .body, .text, p').inner_text() or '',
-                                'author': await element.query_selector('.author, .byline') and 
-                                         await element.query_selector('.author, .byline').inner_text() or '',
-                                'date': await element.query_selector('.date, .published, time') and 
-                                       await element.query_selector('.date, .published, time').inner_text() or '',
-                                'url': url
-                            }
-                            
-                            # Clean the data
-                            article = {k: v.strip() if isinstance(v, str) else v for k, v in article.items()}
-                            
-                            if article['title']:
-                                articles.append(article)
-                                
-                        except Exception as e:
-                            self.logger.warning(f"Failed to extract article data: {e}")
-                            continue
+                    for article in items:
+                        article['url'] = url
+                        if article['title']:
+                            articles.append(article)
                     
                     if articles:
                         break  # Found articles with this selector
@@ -146,6 +128,11 @@ class NewsScraper(BaseScraper):
 class EcommerceScraper(BaseScraper):
     """Example e-commerce scraper."""
     
+    ready_condition = ReadyCondition(
+        selectors=['.product', '.item', '.card', '[data-product]'],
+        require_all=False
+    )
+    
     def __init__(self):
         super().__init__("EcommerceScraper")
         self.logger = get_logger(__name__)
@@ -166,43 +153,26 @@ class EcommerceScraper(BaseScraper):
                 '[data-product]'
             ]
             
-            for selector in product_selectors:
-                if await self.wait_for_selector(selector, timeout=5):
-                    product_elements = await self.page.query_selector_all(selector)
+            matched = await self.wait_for_any(product_selectors, timeout=5)
+            if matched:
+                for selector in [matched] + [s for s in product_selectors if s != matched]:
+                    # Fallback selectors are tried in order inside the page
+                    items = await self.extract_many(selector, {
+                        'name': {'selectors': ['.product-name', '.title', 'h1', 'h2', 'h3', '.name']},
+                        'price': {'selectors': ['.price', '.cost', '.amount', '[data-price]']},
+                        'description': {'selectors': ['.description', '.summary', '.details', 'p']},
+                        'image': {
+                            'selectors': ['.product-image img', '.thumbnail img', 'img'],
+                            'attribute': 'src'
+                        },
+                        'rating': {'selectors': ['.rating', '.stars', '.score']},
+                        'availability': {'selectors': ['.availability', '.stock', '.status']}
+                    })
                     
-                    for element in product_elements:
-                        try:
-                            product = {
-                                'name': await self._get_text_from_selectors(element, [
-                                    '.product-name', '.title', 'h1', 'h2', 'h3', '.name'
-                                ]),
-                                'price': await self._get_text_from_selectors(element, [
-                                    '.price', '.cost', '.amount', '[data-price]'
-                                ]),
-                                'description': await self._get_text_from_selectors(element, [
-                                    '.description', '.summary', '.details', 'p'
-                                ]),
-                                'image': await self._get_attribute_from_selectors(element, [
-                                    '.product-image img', '.thumbnail img', 'img'
-                                ], 'src'),
-                                'rating': await self._get_text_from_selectors(element, [
-                                    '.rating', '.stars', '.score'
-                                ]),
-                                'availability': await self._get_text_from_selectors(element, [
-                                    '.availability', '.stock', '.status'
-                                ]),
-                                'url': url
-                            }
-                            
-                            # Clean and validate data
-                            product = {k: v.strip() if isinstance(v, str) else v for k, v in product.items()}
-                            
-                            if product['name']:
-                                products.append(product)
-                                
-                        except Exception as e:
-                            self.logger.warning(f"Failed to extract product data: {e}")
-                            continue
+                    for product in items:
+                        product['url'] = url
+                        if product['name']:
+                            products.append(product)
                     
                     if products:
                         break
@@ -213,36 +183,3 @@ class EcommerceScraper(BaseScraper):
         except Exception as e:
             self.logger.error(f"E-commerce scraping failed for {url}: {e}")
             raise
-    
-    async def _get_text_from_selectors(self, element, selectors: List[str]) -> str:
-        """Try multiple selectors to get text content."""
-        for selector in selectors:
-            try:
-                sub_element = await element.query_selector(selector)
-                if sub_element:
-                    text = await sub_element.inner_text()
-                    if text.strip():
-                        return text.strip()
-            except Exception:
-                continue
-        return ""
-    
-    async def _get_attribute_from_selectors(self, element, selectors: List[str], attribute: str) -> str:
-        """Try multiple selectors to get attribute value."""
-        for selector in selectors:
-            try:
-                sub_element = await element.query_selector(selector)
-                if sub_element:
-                    value = await sub_element.get_attribute(attribute)
-                    if value:
-                        return value
-            except Exception:
-                continue
-        return ""
-
-
-
-
-
-
-
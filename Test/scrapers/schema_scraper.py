@@ -0,0 +1,76 @@
+"""
+Scraper driven entirely by a declarative extraction schema.
+"""
+
+from typing import AsyncIterator, List, Dict, Any, Optional
+from core.scraper import BaseScraper
+from core.navigation import ReadyCondition
+from core.schema import ExtractionSchema
+from utils.logger import get_logger
+
+
+class SchemaScraper(BaseScraper):
+    """Scraper that extracts the items described by a schema."""
+    
+    schema: Optional[ExtractionSchema] = None
+    
+    def __init__(self, schema: Optional[ExtractionSchema] = None):
+        self.schema = schema or self.schema
+        if self.schema is None:
+            raise ValueError("SchemaScraper needs a schema")
+        
+        super().__init__(self.schema.name)
+        self.logger = get_logger(__name__)
+        self.ready_condition = ReadyCondition(
+            selectors=self.schema.ready_selectors or [self.schema.container],
+            require_all=False
+        )
+        # Compile up front so every page reuses the same script
+        self.schema.compile()
+    
+    @classmethod
+    def for_schema(cls, schema: ExtractionSchema) -> type:
+        """Create a named scraper class for a schema, e.g. for the scraper registry."""
+        class_name = ''.join(part.capitalize() for part in schema.name.replace('-', '_').split('_'))
+        return type(
+            f"{class_name}SchemaScraper",
+            (cls,),
+            {
+                'schema': schema,
+                '__module__': cls.__module__,
+                '__doc__': f"Schema scraper for {schema.name} ({schema.container})."
+            }
+        )
+    
+    async def scrape(self, url: str) -> List[Dict[str, Any]]:
+        """Scrape the schema's items from a webpage."""
+        items = [item async for item in self.scrape_iter(url)]
+        self.logger.info(f"Scraped {len(items)} {self.schema.name} items from {url}")
+        return items
+    
+    async def scrape_iter(self, url: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the schema's items from a webpage, following its pagination if any."""
+        try:
+            await self.navigate(url)
+            
+            if self.schema.pagination:
+                pagination = self.schema.pagination
+                items = self.paginate(
+                    schema=self.schema,
+                    mode=pagination.mode,
+                    next_selector=pagination.next_selector,
+                    max_steps=pagination.max_steps,
+                    max_items=pagination.max_items
+                )
+                async for item in items:
+                    item['url'] = url
+                    yield item
+                return
+            
+            for item in await self.extract_schema(self.schema):
+                item['url'] = url
+                yield item
+        
+        except Exception as e:
+            self.logger.error(f"Schema scraping failed for {url}: {e}")
+            raise
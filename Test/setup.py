@@ -40,7 +40,7 @@ setup(
     },
     include_package_data=True,
     package_data={
-        "": ["*.yaml", "*.yml", "*.txt"],
+        "": ["*.yaml", "*.yml", "*.txt", "*.dat"],
     },
 )
 
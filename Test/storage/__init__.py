@@ -3,9 +3,10 @@ Data storage and export functionality.
 """
 
 from .database import DatabaseManager
+from .engine import Base, get_engine, get_session_factory, close_engines
 from .exporters import DataExporter
 
-__all__ = ['DatabaseManager', 'DataExporter']
+__all__ = ['DatabaseManager', 'DataExporter', 'Base', 'get_engine', 'get_session_factory', 'close_engines']
 
 
 
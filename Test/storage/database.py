@@ -5,14 +5,10 @@ Database management for storing scraped data.
 import json
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Boolean, JSON
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean, JSON
 from config.settings import get_settings
 from utils.logger import get_logger
-
-
-Base = declarative_base()
+from .engine import Base, get_session_factory
 
 
 class ScrapedData(Base):
@@ -24,7 +20,7 @@ class ScrapedData(Base):
     url = Column(String, nullable=False)
     data = Column(JSON, nullable=False)
     scraped_at = Column(DateTime, default=datetime.utcnow)
-    metadata = Column(JSON)
+    metadata_ = Column('metadata', JSON)
 
 
 class DatabaseManager:
@@ -33,28 +29,7 @@ class DatabaseManager:
     def __init__(self):
         self.settings = get_settings()
         self.logger = get_logger(__name__)
-        self.engine = None
-        self.Session = None
-        self._setup_database()
-    
-    def _setup_database(self):
-        """Setup database connection and create tables."""
-        try:
-            self.engine = create_engine(
-                self.settings.database.url,
-                echo=self.settings.database.echo,
-                pool_size=self.settings.database.pool_size
-            )
-            self.Session = sessionmaker(bind=self.engine)
-            
-            # Create tables
-            Base.metadata.create_all(self.engine)
-            
-            self.logger.info("Database setup completed")
-            
-        except Exception as e:
-            self.logger.error(f"Failed to setup database: {e}")
-            raise
+        self.Session = get_session_factory(self.settings.database)
     
     def save_data(
         self,
@@ -75,7 +50,7 @@ class DatabaseManager:
                 scraper_name=scraper_name,
                 url=url,
                 data=data,
-                metadata=metadata or {}
+                metadata_=metadata or {}
             )
             
             session.add(scraped_data)
@@ -125,7 +100,7 @@ class DatabaseManager:
                     'url': result.url,
                     'data': result.data,
                     'scraped_at': result.scraped_at.isoformat(),
-                    'metadata': result.metadata
+                    'metadata': result.metadata_
                 }
                 for result in results
             ]
@@ -148,7 +123,7 @@ class DatabaseManager:
                     'url': result.url,
                     'data': result.data,
                     'scraped_at': result.scraped_at.isoformat(),
-                    'metadata': result.metadata
+                    'metadata': result.metadata_
                 }
             return None
             
@@ -0,0 +1,75 @@
+"""
+Shared database engines and the declarative base for every table.
+"""
+
+import threading
+from typing import Dict, Optional, Set
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+from config.settings import DatabaseConfig
+from utils.logger import get_logger
+
+
+Base = declarative_base()
+
+_engines: Dict[str, Engine] = {}
+_session_factories: Dict[str, sessionmaker] = {}
+_created_tables: Dict[str, Set[str]] = {}
+_lock = threading.Lock()
+
+
+def get_engine(database: DatabaseConfig, url: Optional[str] = None) -> Engine:
+    """Get this process's engine for a database and create the tables it lacks.
+    
+    Engines are cached per URL, so every component talking to the same
+    database shares one connection pool; echo and pool_size apply when the
+    engine is first created. `url` overrides database.url.
+    """
+    url = url or database.url
+    with _lock:
+        engine = _engines.get(url)
+        if engine is None:
+            try:
+                engine = create_engine(url, echo=database.echo, pool_size=database.pool_size)
+            except Exception as e:
+                get_logger(__name__).error(f"Failed to setup database: {e}")
+                raise
+            _engines[url] = engine
+            _created_tables[url] = set()
+        
+        # Models imported since the last call may have added tables
+        created = _created_tables[url]
+        tables = [table for table in Base.metadata.sorted_tables if table.name not in created]
+        if tables:
+            try:
+                Base.metadata.create_all(engine, tables=tables)
+            except Exception as e:
+                get_logger(__name__).error(f"Failed to create database tables: {e}")
+                raise
+            created.update(table.name for table in tables)
+    return engine
+
+
+def get_session_factory(database: DatabaseConfig, url: Optional[str] = None) -> sessionmaker:
+    """Get the session factory bound to the shared engine for a database."""
+    url = url or database.url
+    engine = get_engine(database, url)
+    with _lock:
+        factory = _session_factories.get(url)
+        if factory is None:
+            factory = sessionmaker(bind=engine)
+            _session_factories[url] = factory
+    return factory
+
+
+def close_engines():
+    """Dispose every shared engine; the next get_engine call opens a new one."""
+    with _lock:
+        engines = list(_engines.values())
+        _engines.clear()
+        _session_factories.clear()
+        _created_tables.clear()
+    
+    for engine in engines:
+        engine.dispose()
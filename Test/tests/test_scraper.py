@@ -4,12 +4,20 @@ Basic tests for the web scraping tool.
 
 import pytest
 import asyncio
-from unittest.mock import Mock, patch
+import json
+from unittest.mock import Mock, AsyncMock, patch
 from core.scraper import BaseScraper
-from core.browser import BrowserManager
+from core.browser import BrowserManager, BrowserPool, PooledBrowser
 from core.proxy import ProxyManager
 from core.rate_limiter import RateLimiter
+from core.interception import RequestInterceptor
+from core.http_scraper import HttpScraper, make_http_scraper
+from core.engine_selector import EngineSelector
+from core.navigation import ReadyCondition, get_navigation_metrics
+from core.schema import load_schema
+from config.settings import Settings, DatabaseConfig, ScrapingConfig, StorageConfig
 from scrapers.example_scraper import ExampleScraper
+from scrapers.schema_scraper import SchemaScraper
 
 
 class TestBaseScraper:
@@ -27,17 +35,794 @@ class TestBaseScraper:
         """Test scraper as context manager."""
         scraper = ExampleScraper()
         
-        # Mock browser manager
-        with patch('core.scraper.BrowserManager') as mock_browser:
-            mock_browser.return_value.__aenter__ = Mock(return_value=mock_browser.return_value)
-            mock_browser.return_value.__aexit__ = Mock(return_value=None)
-            mock_browser.return_value.start = Mock(return_value=None)
-            mock_browser.return_value.close = Mock(return_value=None)
-            mock_browser.return_value.create_context = Mock(return_value=Mock())
-            mock_browser.return_value.new_page = Mock(return_value=Mock())
+        # Mock the shared browser pool
+        with patch('core.scraper.get_browser_pool') as mock_pool:
+            lease = Mock()
+            lease.manager.new_page = AsyncMock(return_value=AsyncMock())
+            lease.manager.add_route = AsyncMock()
+            mock_pool.return_value.acquire = AsyncMock(return_value=lease)
+            mock_pool.return_value.release = AsyncMock()
             
             async with scraper:
-                assert scraper.browser_manager is not None
+                assert scraper.browser_manager is lease.manager
+            
+            mock_pool.return_value.release.assert_awaited_once_with(lease)
+    
+    @pytest.mark.asyncio
+    async def test_extract_many_single_round_trip(self):
+        """Test bulk extraction runs one evaluate call and cleans the results."""
+        scraper = ExampleScraper()
+        scraper.page = AsyncMock()
+        scraper.page.evaluate = AsyncMock(return_value=[
+            {'name': '  Widget \n Pro ', 'image': ' /w.png '}
+        ])
+        
+        items = await scraper.extract_many('.product', {
+            'name': {'selectors': ['.name', 'h2']},
+            'image': ('img', 'src')
+        })
+        
+        assert items == [{'name': 'Widget Pro', 'image': '/w.png'}]
+        scraper.page.evaluate.assert_awaited_once()
+        container, specs = scraper.page.evaluate.call_args.args[1]
+        assert container == '.product'
+        assert specs == [
+            {'name': 'name', 'selectors': ['.name', 'h2'], 'attribute': None, 'multiple': False},
+            {'name': 'image', 'selectors': ['img'], 'attribute': 'src', 'multiple': False}
+        ]
+
+
+class TestBrowserPool:
+    """Test browser pool leasing and recycling."""
+    
+    def _fake_browser(self):
+        manager = Mock()
+        manager.acquire_context = AsyncMock(side_effect=lambda **kwargs: Mock())
+        manager.release_context = AsyncMock()
+        manager.close = AsyncMock()
+        return PooledBrowser(manager=manager)
+    
+    @pytest.mark.asyncio
+    async def test_contexts_spread_across_browsers(self):
+        """Test leases respect the per-browser context cap."""
+        pool = BrowserPool(size=2, max_contexts_per_browser=2, max_uses_per_browser=10, max_rss_mb=0)
+        
+        with patch.object(BrowserPool, '_launch_browser', AsyncMock(side_effect=lambda: self._fake_browser())):
+            leases = [await pool.acquire() for _ in range(4)]
+            
+            assert len(pool.browsers) == 2
+            assert all(browser.active_contexts == 2 for browser in pool.browsers)
+            
+            # Pool is full, so the next acquire waits for a release
+            waiter = asyncio.create_task(pool.acquire())
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            
+            await pool.release(leases[0])
+            lease = await asyncio.wait_for(waiter, 1)
+            assert lease.browser is leases[0].browser
+    
+    @pytest.mark.asyncio
+    async def test_browser_recycled_after_max_uses(self):
+        """Test a browser is closed and replaced after K uses."""
+        pool = BrowserPool(size=1, max_contexts_per_browser=1, max_uses_per_browser=2, max_rss_mb=0)
+        
+        with patch.object(BrowserPool, '_launch_browser', AsyncMock(side_effect=lambda: self._fake_browser())):
+            first = await pool.acquire()
+            await pool.release(first)
+            second = await pool.acquire()
+            assert second.browser is first.browser
+            await pool.release(second)
+            
+            first.manager.close.assert_awaited_once()
+            third = await pool.acquire()
+            assert third.browser is not first.browser
+            assert pool.stats['recycles'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_launch_does_not_block_leases(self):
+        """Test a cold start runs outside the lock and a failed launch frees its slot."""
+        pool = BrowserPool(size=2, max_contexts_per_browser=2, max_uses_per_browser=10, max_rss_mb=0)
+        launched = asyncio.Event()
+        finish = asyncio.Event()
+        
+        async def slow_launch(_):
+            launched.set()
+            await finish.wait()
+            raise RuntimeError("launch failed")
+        
+        with patch.object(BrowserPool, '_launch_browser', AsyncMock(side_effect=lambda: self._fake_browser())):
+            first = await pool.acquire()
+        
+        with patch.object(BrowserPool, '_launch_browser', slow_launch):
+            await pool.acquire()
+            # The warm browser is full, so this acquire launches the second one
+            launching = asyncio.create_task(pool.acquire())
+            await launched.wait()
+            assert pool.get_pool_stats()['launching'] == 1
+            
+            # Releases and leases on the warm browser go through meanwhile
+            await asyncio.wait_for(pool.release(first), 1)
+            lease = await asyncio.wait_for(pool.acquire(), 1)
+            assert lease.browser is first.browser
+            
+            finish.set()
+            with pytest.raises(RuntimeError):
+                await launching
+            assert pool.get_pool_stats()['launching'] == 0
+        
+        with patch.object(BrowserPool, '_launch_browser', AsyncMock(side_effect=lambda: self._fake_browser())):
+            lease = await asyncio.wait_for(pool.acquire(), 1)
+            assert lease.browser is not first.browser
+            assert len(pool.browsers) == 2
+    
+    def test_explicit_size_is_kept(self):
+        """Test an explicit size of zero is rejected rather than replaced by the default."""
+        with pytest.raises(ValueError):
+            BrowserPool(size=0)
+
+
+class TestContextLeasing:
+    """Test context lease reuse, reset and eviction."""
+    
+    def _manager(self, max_contexts=2):
+        manager = BrowserManager(max_contexts=max_contexts)
+        manager.browser = Mock()
+        
+        def new_context(**kwargs):
+            context = Mock()
+            context.pages = []
+            context.add_init_script = AsyncMock()
+            context.clear_cookies = AsyncMock()
+            context.unroute = AsyncMock()
+            context.route = AsyncMock()
+            context.close = AsyncMock()
+            return context
+        
+        manager.browser.new_context = AsyncMock(side_effect=new_context)
+        return manager
+    
+    @pytest.mark.asyncio
+    async def test_released_context_is_reset_and_reused(self):
+        """Test a released context is cleaned and handed out again."""
+        manager = self._manager()
+        context = await manager.acquire_context()
+        handler = Mock()
+        await manager.add_route(context, "**/*", handler)
+        
+        await manager.release_context(context)
+        
+        context.clear_cookies.assert_awaited_once()
+        context.unroute.assert_awaited_once_with("**/*", handler)
+        assert await manager.acquire_context() is context
+        assert manager.browser.new_context.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_least_recently_used_context_evicted(self):
+        """Test the LRU idle context is closed when the cap is reached."""
+        manager = self._manager(max_contexts=2)
+        first = await manager.acquire_context(locale='en-US')
+        second = await manager.acquire_context(locale='de-DE')
+        await manager.release_context(first)
+        await manager.release_context(second)
+        
+        # Different options cannot reuse either context, so the LRU one goes
+        third = await manager.acquire_context(locale='fr-FR')
+        
+        first.close.assert_awaited_once()
+        second.close.assert_not_awaited()
+        assert len(manager._leases) == 2
+        assert third not in (first, second)
+
+
+class TestRequestInterceptor:
+    """Test request blocking rules."""
+    
+    def test_blocks_by_type_domain_and_pattern(self):
+        """Test each blocking rule and per-scraper overrides."""
+        interceptor = RequestInterceptor(overrides={
+            'block_resource_types': ['image'],
+            'block_domains': ['tracker.com'],
+            'block_url_patterns': ['*/beacon/*']
+        })
+        
+        assert interceptor.should_block('https://shop.com/a.png', 'image') == 'resource_type'
+        assert interceptor.should_block('https://cdn.tracker.com/t.js', 'script') == 'domain'
+        assert interceptor.should_block('https://shop.com/beacon/1', 'xhr') == 'url_pattern'
+        assert interceptor.should_block('https://shop.com/app.js', 'script') is None
+        assert interceptor.should_block('https://nottracker.com/app.js', 'script') is None
+    
+    def test_third_party_blocking(self):
+        """Test third-party requests are blocked relative to the page."""
+        interceptor = RequestInterceptor(overrides={'block_third_party': True, 'block_resource_types': []})
+        page_url = 'https://www.shop.com/products'
+        
+        assert interceptor.should_block('https://img.shop.com/app.js', 'script', page_url) is None
+        assert interceptor.should_block('https://widgets.other.com/w.js', 'script', page_url) == 'third_party'
+        # Sites under a multi-label public suffix are told apart
+        assert interceptor.should_block('https://cdn.shop.co.uk/a.js', 'script', 'https://www.shop.co.uk/') is None
+        assert interceptor.should_block('https://ads.other.co.uk/a.js', 'script', 'https://www.shop.co.uk/') == 'third_party'
+    
+    def test_bytes_saved_estimate(self):
+        """Test blocked bytes use the observed average size and report what came from defaults."""
+        from core.interception import DEFAULT_RESOURCE_SIZES
+        
+        interceptor = RequestInterceptor()
+        response = Mock()
+        response.headers = {'content-length': '1000'}
+        response.request.resource_type = 'image'
+        interceptor._record_response(response)
+        
+        interceptor._record_block('resource_type', 'image')
+        interceptor._record_block('resource_type', 'font')
+        
+        stats = interceptor.get_stats()
+        assert stats['requests_blocked'] == 2
+        assert stats['bytes_saved_estimate'] == 1000 + DEFAULT_RESOURCE_SIZES['font']
+        assert stats['bytes_saved_from_defaults'] == DEFAULT_RESOURCE_SIZES['font']
+
+
+class TestHttpScraper:
+    """Test the HTTP engine extraction API and browser fallback."""
+    
+    HTML = """
+    <html><head><title>Shop</title></head><body>
+      <div class="product"><h2 class="name">One <script>var x;</script></h2><img src="/1.png"></div>
+      <div class="product"><h2 class="name">Two</h2><img src="/2.png"></div>
+    </body></html>
+    """
+    
+    class ProductScraper(HttpScraper):
+        required_selectors = ['.product']
+        
+        async def scrape(self, url):
+            await self.navigate(url)
+            return await self.get_texts('.product .name')
+    
+    def _scraper(self, html):
+        scraper = self.ProductScraper()
+        scraper.rate_limiter = Mock(wait_for_token=AsyncMock())
+        scraper._fetch = AsyncMock(return_value=(200, html, {}, 'https://shop.com/'))
+        return scraper
+    
+    @pytest.mark.asyncio
+    async def test_extraction_api(self):
+        """Test text and attribute extraction from fetched HTML."""
+        scraper = self._scraper(self.HTML)
+        
+        assert await scraper.run('https://shop.com/') == ['One', 'Two']
+        assert await scraper.get_text('title') == 'Shop'
+        assert await scraper.get_attribute('.product img', 'src') == '/1.png'
+        assert await scraper.get_attributes('.product img', 'src') == ['/1.png', '/2.png']
+        assert await scraper.wait_for_selector('.missing') is False
+        assert not scraper.uses_browser
+    
+    @pytest.mark.asyncio
+    async def test_extract_many(self):
+        """Test bulk extraction with fallback selectors from fetched HTML."""
+        scraper = self._scraper(self.HTML)
+        await scraper.run('https://shop.com/')
+        
+        items = await scraper.extract_many('.product', {
+            'name': {'selectors': ['.title', '.name']},
+            'image': ('img', 'src'),
+            'price': '.price'
+        })
+        
+        assert items == [
+            {'name': 'One', 'image': '/1.png', 'price': ''},
+            {'name': 'Two', 'image': '/2.png', 'price': ''}
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_to_browser(self):
+        """Test missing required selectors switch the scraper to the browser."""
+        scraper = self._scraper("<html><body><div id='app'></div></body></html>")
+        
+        with patch.object(BaseScraper, 'initialize', AsyncMock()) as initialize, \
+             patch.object(BaseScraper, 'navigate', AsyncMock()) as navigate, \
+             patch.object(BaseScraper, 'get_texts', AsyncMock(return_value=['Rendered'])):
+            assert await scraper.run('https://shop.com/') == ['Rendered']
+            
+            initialize.assert_awaited_once()
+            navigate.assert_awaited_once()
+            assert scraper.uses_browser
+
+
+class TestNavigationErrors:
+    """Test error classification, classified retries and the per-domain circuit breaker."""
+    
+    def _scraper(self, fetch, breaker=None):
+        scraper = TestHttpScraper.ProductScraper()
+        scraper.settings = Settings(scraping=ScrapingConfig(max_retries=2, retry_delay=0))
+        scraper.rate_limiter = Mock(wait_for_token=AsyncMock())
+        scraper._fetch = fetch
+        if breaker is not None:
+            scraper.circuit_breaker = breaker
+        return scraper
+    
+    def test_classification(self):
+        """Test statuses and network errors map to retryable, permanent or throttled."""
+        import aiohttp
+        from core.errors import classify_exception, classify_status
+        
+        url = 'https://shop.com/p'
+        assert classify_status(url, 404).kind == 'permanent' and not classify_status(url, 404).domain_down
+        assert classify_status(url, 403).kind == 'permanent' and classify_status(url, 403).domain_down
+        assert classify_status(url, 502).kind == 'retryable'
+        throttled = classify_status(url, 429, {'Retry-After': '7'})
+        assert throttled.kind == 'throttled' and throttled.retry_after == 7 and not throttled.domain_down
+        assert classify_status(url, 503).domain_down
+        
+        dns = classify_exception(url, Exception("page.goto: net::ERR_NAME_NOT_RESOLVED at https://shop.com/p"))
+        assert dns.kind == 'permanent' and dns.domain_down
+        assert classify_exception(url, Exception("Timeout 30000ms exceeded.")).kind == 'retryable'
+        assert classify_exception(url, aiohttp.ServerDisconnectedError()).kind == 'retryable'
+    
+    @pytest.mark.asyncio
+    async def test_retries_by_error_kind(self):
+        """Test permanent errors are not retried while throttled responses are."""
+        from core.circuit_breaker import CircuitBreaker
+        from core.errors import PermanentError
+        
+        not_found = AsyncMock(return_value=(404, '', {}, 'https://shop.com/'))
+        with pytest.raises(PermanentError):
+            await self._scraper(not_found, CircuitBreaker()).run('https://shop.com/')
+        assert not_found.await_count == 1
+        
+        throttled = AsyncMock(side_effect=[
+            (429, '', {'Retry-After': '0'}, 'https://shop.com/'),
+            (200, TestHttpScraper.HTML, {}, 'https://shop.com/')
+        ])
+        scraper = self._scraper(throttled, CircuitBreaker())
+        assert await scraper.run('https://shop.com/') == ['One', 'Two']
+        assert throttled.await_count == 2
+        # The retry waited for a token like the first request
+        assert scraper.rate_limiter.wait_for_token.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_circuit_breaker(self):
+        """Test a dead domain's circuit opens, fast-fails and closes after a successful probe."""
+        import aiohttp
+        from core.circuit_breaker import CircuitBreaker
+        from core.errors import CircuitOpenError, RetryableError
+        
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+        down = AsyncMock(side_effect=aiohttp.ClientConnectionError("Connection refused"))
+        for _ in range(2):
+            with pytest.raises(RetryableError):
+                await self._scraper(down, breaker).run('https://down.com/')
+        assert down.await_count == 6
+        
+        # Every host of the site shares its circuit
+        with pytest.raises(CircuitOpenError):
+            await self._scraper(down, breaker).run('https://www.down.com/other')
+        assert down.await_count == 6
+        
+        # After the cooldown one probe goes out and closes the circuit
+        breaker.get_circuit('down.com').opened_at -= 61
+        up = AsyncMock(return_value=(200, TestHttpScraper.HTML, {}, 'https://down.com/'))
+        assert await self._scraper(up, breaker).run('https://down.com/') == ['One', 'Two']
+        
+        stats = breaker.get_stats()
+        assert stats['domains']['down.com']['state'] == 'closed'
+        assert stats['trips'] == 1 and stats['rejected'] == 1 and stats['open'] == []
+
+
+class TestEngineSelector:
+    """Test per-domain engine selection."""
+    
+    def _selector(self, tmp_path):
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/engines.db"))
+        with patch('core.engine_selector.get_settings', return_value=settings):
+            return EngineSelector()
+    
+    def test_http_variant_keeps_scraper_methods(self):
+        """Test the HTTP variant uses the scraper's own scrape method."""
+        variant = make_http_scraper(ExampleScraper)
+        
+        assert issubclass(variant, HttpScraper)
+        assert variant.scrape is ExampleScraper.scrape
+        assert make_http_scraper(ExampleScraper) is variant
+    
+    @pytest.mark.asyncio
+    async def test_switches_to_http_after_matching_probes(self, tmp_path):
+        """Test matching probes move a domain to HTTP and an empty yield moves it back."""
+        selector = self._selector(tmp_path)
+        http_results = [[1, 2], [1, 2], [1, 2], [1], []]
+        engines = []
+        
+        async def run_engine(scraper, url):
+            engines.append(scraper)
+            return (http_results.pop(0) if scraper == 'http' else [1, 2]), False
+        
+        selector._run_engine = run_engine
+        url = 'https://shop.com/item'
+        
+        for _ in range(3):
+            assert selector.choose(url, 'ExampleScraper') == EngineSelector.PROBE
+            await selector.run(url, 'ExampleScraper', lambda engine: engine)
+        assert selector.choose(url, 'ExampleScraper') == EngineSelector.HTTP
+        
+        # A page with fewer records than the probed one is not an HTTP failure
+        engines.clear()
+        assert await selector.run('https://shop.com/last-page', 'ExampleScraper', lambda engine: engine) == [1]
+        assert engines == ['http']
+        assert selector.choose(url, 'ExampleScraper') == EngineSelector.HTTP
+        
+        engines.clear()
+        assert await selector.run(url, 'ExampleScraper', lambda engine: engine) == [1, 2]
+        assert engines == ['http', 'browser']
+        assert selector.choose(url, 'ExampleScraper') == EngineSelector.BROWSER
+    
+    def test_queue_factory_builds_each_engine(self, tmp_path):
+        """Test queued jobs get the scraper the factory built for the engine, not a rebuilt copy."""
+        from core.queue import JobQueue
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"))
+        with patch('core.queue.get_settings', return_value=settings):
+            queue = JobQueue()
+        built = []
+        
+        def factory(scraper_class, engine):
+            scraper = make_http_scraper(ExampleScraper)() if engine == 'http' else ExampleScraper()
+            built.append(scraper)
+            return scraper
+        
+        http = queue._build_scraper('ExampleScraper', factory, 'http')
+        browser = queue._build_scraper('ExampleScraper', factory, 'browser')
+        queue.notifier.close()
+        
+        assert built == [http, browser]
+        assert isinstance(http, HttpScraper) and not isinstance(browser, HttpScraper)
+    
+    @pytest.mark.asyncio
+    async def test_streamed_empty_http_yield_falls_back(self, tmp_path):
+        """Test a streamed HTTP run that emits nothing is served by the browser."""
+        selector = self._selector(tmp_path)
+        selector.record_probe('shop.com', 'ExampleScraper', 2, 2)
+        selector.choose = lambda url, scraper_class: EngineSelector.HTTP
+        
+        class Engine:
+            def __init__(self, records):
+                self.records = records
+            
+            async def __aenter__(self):
+                return self
+            
+            async def __aexit__(self, *exc):
+                return False
+            
+            async def run_iter(self, url):
+                for record in self.records:
+                    yield record
+        
+        create = lambda engine: Engine([] if engine == 'http' else [1, 2])
+        records = [record async for record in selector.run_iter('https://shop.com/a', 'ExampleScraper', create)]
+        
+        assert records == [1, 2]
+        assert selector._get_stats('shop.com', 'ExampleScraper')['http_failures'] == 1
+
+
+class TestRunMany:
+    """Test multi-URL runs in one scraper instance."""
+    
+    class TabScraper(BaseScraper):
+        active = 0
+        peak = 0
+        
+        async def scrape(self, url):
+            type(self).active += 1
+            type(self).peak = max(type(self).peak, type(self).active)
+            await asyncio.sleep(0.01)
+            type(self).active -= 1
+            if url.endswith('/bad'):
+                raise ValueError("bad page")
+            return [{'url': url, 'page': id(self.page)}]
+    
+    @pytest.mark.asyncio
+    async def test_bounded_tabs_share_context(self):
+        """Test URLs run on at most N pages of the same context and errors are reported per URL."""
+        scraper = self.TabScraper()
+        scraper.settings.browser.stealth_mode = False
+        scraper.page = AsyncMock()
+        scraper.context = Mock()
+        scraper.browser_manager = Mock(new_page=AsyncMock(side_effect=lambda context: AsyncMock()))
+        
+        urls = (f"https://shop.com/{i}" for i in range(10))
+        results = [item async for item in scraper.run_many(list(urls) + ['https://shop.com/bad'], concurrency=3)]
+        
+        assert len(results) == 11
+        errors = [url for url, result, error in results if error]
+        assert errors == ['https://shop.com/bad']
+        assert self.TabScraper.peak == 3
+        assert scraper.browser_manager.new_page.await_count == 3
+        assert all(call.args == (scraper.context,) for call in scraper.browser_manager.new_page.await_args_list)
+        pages = {result[0]['page'] for url, result, error in results if not error}
+        assert id(scraper.page) not in pages and len(pages) <= 3
+    
+    @pytest.mark.asyncio
+    async def test_urls_reported_when_no_tab_opens(self):
+        """Test every URL comes back with the error when no tab can be opened, and tabs get their own captures."""
+        scraper = self.TabScraper()
+        scraper.settings.browser.stealth_mode = False
+        scraper.page = AsyncMock()
+        scraper.context = Mock()
+        scraper.browser_manager = Mock(new_page=AsyncMock(side_effect=RuntimeError("browser closed")))
+        
+        urls = [f"https://shop.com/{i}" for i in range(10)]
+        results = [item async for item in scraper.run_many(urls, concurrency=3)]
+        
+        assert sorted(url for url, result, error in results) == sorted(urls)
+        assert all(isinstance(error, RuntimeError) for url, result, error in results)
+        
+        scraper.browser_manager.new_page = AsyncMock(side_effect=lambda context: AsyncMock())
+        tab = await scraper._open_tab()
+        assert tab.captures is not scraper.captures and tab.change_check is None
+
+
+class TestWaitForAny:
+    """Test racing candidate selectors."""
+    
+    @pytest.mark.asyncio
+    async def test_returns_first_match_without_sequential_timeouts(self):
+        """Test the last candidate matching does not wait out the earlier ones."""
+        scraper = ExampleScraper()
+        
+        async def wait_for_selector(selector, timeout, state):
+            if selector == '.entry':
+                await asyncio.sleep(0.01)
+                return Mock()
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError(selector)
+        
+        scraper.page = Mock(wait_for_selector=wait_for_selector)
+        
+        start = asyncio.get_event_loop().time()
+        matched = await scraper.wait_for_any(['article', '.post', '.entry'], timeout=5)
+        
+        assert matched == '.entry'
+        assert asyncio.get_event_loop().time() - start < 1
+    
+    @pytest.mark.asyncio
+    async def test_returns_none_when_nothing_matches(self):
+        """Test all candidates failing returns None."""
+        scraper = ExampleScraper()
+        scraper.page = Mock(wait_for_selector=AsyncMock(side_effect=TimeoutError("timeout")))
+        
+        assert await scraper.wait_for_any(['article', '.post'], timeout=1) is None
+
+
+class TestResponseCapture:
+    """Test capturing API JSON responses."""
+    
+    class FakePage:
+        """Page stand-in that emits response events."""
+        
+        def __init__(self):
+            self.handlers = []
+            self.goto = AsyncMock()
+        
+        def on(self, event, handler):
+            self.handlers.append(handler)
+        
+        def remove_listener(self, event, handler):
+            self.handlers.remove(handler)
+        
+        def emit(self, url, body, resource_type='xhr', headers=None):
+            response = Mock(url=url, status=200, headers=headers or {}, body=AsyncMock(return_value=body))
+            response.request = Mock(resource_type=resource_type, method='GET')
+            for handler in list(self.handlers):
+                handler(response)
+    
+    @pytest.mark.asyncio
+    async def test_capture_api_returns_on_matching_response(self):
+        """Test capture_api returns parsed JSON as soon as the API answers and skips other responses."""
+        scraper = ExampleScraper()
+        scraper.rate_limiter = Mock(wait_for_token=AsyncMock())
+        scraper.page = page = self.FakePage()
+        
+        def commit(*args, **kwargs):
+            # The document commits immediately; the page calls its API afterwards
+            loop = asyncio.get_event_loop()
+            loop.call_later(0.01, page.emit, 'https://shop.com/logo.png', b'{}', 'image')
+            loop.call_later(0.01, page.emit, 'https://shop.com/api/products?page=1', b'<html>', 'fetch')
+            loop.call_later(0.02, page.emit, 'https://shop.com/api/products?page=1', b'{"items": [1, 2]}')
+        
+        page.goto.side_effect = commit
+        
+        data = await scraper.capture_api('https://shop.com/', '*/api/products*', timeout=5)
+        
+        assert data == [{'items': [1, 2]}]
+        assert page.goto.await_args.kwargs['wait_until'] == 'commit'
+        assert page.handlers == [] and scraper.captures == []
+    
+    @pytest.mark.asyncio
+    async def test_capture_caps_body_size_and_count(self):
+        """Test oversized and surplus responses are counted, not buffered."""
+        scraper = ExampleScraper()
+        scraper.page = page = self.FakePage()
+        capture = await scraper.capture_responses('*/api/*', max_body_bytes=20, max_responses=2)
+        
+        page.emit('https://shop.com/api/big', b'{}', headers={'content-length': '5000'})
+        page.emit('https://shop.com/api/big2', b'{"data": "' + b'x' * 50 + b'"}')
+        for i in range(3):
+            page.emit(f'https://shop.com/api/{i}', b'{"n": %d}' % i)
+        
+        responses = await capture.wait_for(2, timeout=1)
+        await asyncio.sleep(0)
+        
+        assert [response.data for response in responses] == [{'n': 0}, {'n': 1}]
+        assert capture.skipped['too_large'] == 2 and capture.skipped['over_limit'] == 1
+
+
+class TestReadyNavigation:
+    """Test early-return navigation on ready conditions."""
+    
+    def _scraper(self):
+        scraper = ExampleScraper()
+        scraper.rate_limiter = Mock(wait_for_token=AsyncMock())
+        scraper.page = AsyncMock()
+        scraper.page.goto = AsyncMock(return_value=Mock(status=200))
+        scraper.settings.browser.stealth_mode = False
+        return scraper
+    
+    @pytest.mark.asyncio
+    async def test_returns_when_condition_holds(self):
+        """Test navigation skips networkidle once the ready selector is attached."""
+        scraper = self._scraper()
+        
+        await scraper.navigate('https://shop.com/ready')
+        await scraper.wait_for_load()
+        
+        assert scraper.page.goto.call_args.kwargs['wait_until'] == 'domcontentloaded'
+        scraper.page.wait_for_selector.assert_awaited_once()
+        scraper.page.wait_for_load_state.assert_not_awaited()
+        assert get_navigation_metrics().get_url_metrics('https://shop.com/ready')['mode'] == 'ready'
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_to_capped_networkidle(self):
+        """Test an unmet condition falls back to networkidle with the fallback cap."""
+        scraper = self._scraper()
+        scraper.page.wait_for_selector = AsyncMock(side_effect=TimeoutError("timeout"))
+        
+        await scraper.navigate('https://shop.com/slow', ready=ReadyCondition(selectors=['.missing'], timeout=1))
+        
+        cap = scraper.settings.scraping.networkidle_fallback_timeout * 1000
+        scraper.page.wait_for_load_state.assert_awaited_once_with("networkidle", timeout=cap)
+        assert not scraper.page_ready
+        assert get_navigation_metrics().get_url_metrics('https://shop.com/slow')['mode'] == 'fallback'
+    
+    def test_response_url_matching(self):
+        """Test condition validation and response URL globbing."""
+        condition = ReadyCondition(response_url='*/api/products*')
+        
+        assert condition.matches_response('https://shop.com/api/products?page=2')
+        assert not condition.matches_response('https://shop.com/api/cart')
+        with pytest.raises(ValueError):
+            ReadyCondition()
+
+
+class TestExtractionSchema:
+    """Test declarative extraction schemas."""
+    
+    SCHEMA = {
+        'name': 'listing',
+        'container': '.product',
+        'fields': {
+            'name': {'selectors': ['.title', '.name'], 'required': True},
+            'price': {'selector': '.price', 'process': ['number']},
+            'image': {'selectors': 'img', 'attribute': 'src', 'process': ['absolute_url']},
+            'tags': {'selectors': '.tag', 'multiple': True, 'process': ['lower']}
+        }
+    }
+    
+    HTML = """
+    <div class="product"><span class="name">Lamp</span><span class="price">$1,299.00</span>
+      <img src="/lamp.png"><i class="tag">Home</i><i class="tag">Sale</i></div>
+    <div class="product"><span class="price">$5</span></div>
+    """
+    
+    def test_compiles_once_and_post_processes(self):
+        """Test the schema compiles to one cached script and post-processes values."""
+        schema = load_schema(self.SCHEMA)
+        compiled = schema.compile()
+        
+        assert schema.compile() is compiled
+        assert compiled.script.startswith('() =>') and '.title' in compiled.script
+        
+        items = compiled.process(
+            [{'name': ' Lamp ', 'price': '$1,299.00', 'image': '/lamp.png', 'tags': ['Home']},
+             {'name': '', 'price': '$5', 'image': '', 'tags': []}],
+            base_url='https://shop.com/c/1'
+        )
+        assert items == [{'name': 'Lamp', 'price': 1299.0, 'image': 'https://shop.com/lamp.png', 'tags': ['home']}]
+    
+    def test_rejects_unknown_processor(self):
+        """Test schema validation of processor names."""
+        with pytest.raises(ValueError):
+            load_schema({'name': 'bad', 'container': 'li', 'fields': {'x': {'selectors': 'a', 'process': ['nope']}}})
+    
+    @pytest.mark.asyncio
+    async def test_schema_scraper_on_http_engine(self):
+        """Test a schema scraper runs as data on the HTTP engine."""
+        scraper_class = make_http_scraper(SchemaScraper.for_schema(load_schema(self.SCHEMA)))
+        scraper = scraper_class()
+        scraper.rate_limiter = Mock(wait_for_token=AsyncMock())
+        scraper._fetch = AsyncMock(return_value=(200, self.HTML, {}, 'https://shop.com/c/1'))
+        
+        items = await scraper.run('https://shop.com/c/1')
+        
+        assert items == [{
+            'name': 'Lamp',
+            'price': 1299.0,
+            'image': 'https://shop.com/lamp.png',
+            'tags': ['home', 'sale'],
+            'url': 'https://shop.com/c/1'
+        }]
+
+
+class TestPagination:
+    """Test incremental pagination and stop detection."""
+    
+    class ListingScraper(BaseScraper):
+        async def scrape(self, url):
+            return []
+    
+    @pytest.mark.asyncio
+    async def test_scroll_extracts_only_new_items_until_exhausted(self):
+        """Test infinite scroll yields each step's new items and stops on an empty step."""
+        from core.extraction import EXTRACT_NEW_ITEMS_SCRIPT
+        
+        batches = [[{'name': 'A'}, {'name': 'B'}], [{'name': 'C'}], []]
+        scrolls = []
+        
+        async def evaluate(script, arg=None):
+            if script == EXTRACT_NEW_ITEMS_SCRIPT:
+                return batches.pop(0)
+            scrolls.append(script)
+        
+        scraper = self.ListingScraper()
+        scraper.page = Mock(url='https://shop.com/feed', evaluate=AsyncMock(side_effect=evaluate))
+        scraper.page.wait_for_function = AsyncMock(side_effect=[None, TimeoutError()])
+        
+        paginator = scraper.paginate('.item', {'name': '.name'}, mode='scroll')
+        items = [item async for item in paginator]
+        stats = paginator.get_stats()
+        
+        assert items == [{'name': 'A'}, {'name': 'B'}, {'name': 'C'}]
+        assert len(scrolls) == 2
+        assert stats['stop_reason'] == 'no_new_items'
+        assert [step['new_items'] for step in stats['step_details']] == [2, 1, 0]
+    
+    @pytest.mark.asyncio
+    async def test_schema_next_link_pagination_over_http(self):
+        """Test a schema follows next links page by page and respects max_items."""
+        pages = {
+            'https://shop.com/c?page=1': '<li class="p">A</li><li class="p">B</li><a rel="next" href="?page=2">Next</a>',
+            'https://shop.com/c?page=2': '<li class="p">C</li><li class="p">D</li><a rel="next" href="?page=3">Next</a>',
+            'https://shop.com/c?page=3': '<li class="p">E</li>',
+        }
+        schema = load_schema({
+            'name': 'paged',
+            'container': '.p',
+            'fields': {'name': ''},
+            'pagination': {'mode': 'next_link', 'next_selector': 'a[rel=next]'}
+        })
+        scraper = make_http_scraper(SchemaScraper.for_schema(schema))()
+        scraper.rate_limiter = Mock(wait_for_token=AsyncMock())
+        scraper._fetch = AsyncMock(side_effect=lambda url, headers=None: (200, pages[url], {}, url))
+        
+        items = await scraper.run('https://shop.com/c?page=1')
+        assert [item['name'] for item in items] == ['A', 'B', 'C', 'D', 'E']
+        assert scraper._paginated_documents == {}
+        
+        await scraper.navigate('https://shop.com/c?page=1')
+        paginator = scraper.paginate(schema=schema, mode='next_link', next_selector='a[rel=next]', max_items=3)
+        assert [item['name'] async for item in paginator] == ['A', 'B', 'C']
+        assert paginator.stop_reason == 'max_items'
+        # Finished paginators do not keep their documents alive
+        assert scraper._paginated_documents == {}
 
 
 class TestProxyManager:
@@ -104,6 +889,387 @@ class TestRateLimiter:
         
         # Should not be able to consume more
         assert bucket.consume(1) == False
+    
+    def test_reservations_book_future_slots(self):
+        """Test reservations queue behind each other per domain but not across domains."""
+        from config.settings import DelayConfig, RateLimitingConfig
+        
+        limiter = RateLimiter()
+        limiter.settings = Settings(rate_limiting=RateLimitingConfig(
+            default_rate=60, burst_limit=1, global_rate=6000, global_burst=100,
+            delay=DelayConfig(min=0.5, max=0.5)
+        ))
+        
+        # One request per second per domain: the second and third wait 1s and 2s
+        waits = [limiter.reserve('a.com') for _ in range(3)]
+        assert waits[0] == 0
+        assert waits[1] == pytest.approx(1.0, abs=0.05)
+        assert waits[2] == pytest.approx(2.0, abs=0.05)
+        
+        # Other domains are not queued behind a.com
+        assert [limiter.reserve(f'{name}.com') for name in 'bcd'] == [0, 0, 0]
+        
+        # A crawl-delay longer than the human-like delay spaces requests further
+        limiter.reserve('e.com', min_interval=5)
+        assert limiter.get_rate_stats()['e.com']['reserved_seconds'] == pytest.approx(5, abs=0.05)
+    
+    @pytest.mark.asyncio
+    async def test_waits_do_not_serialize_domains(self):
+        """Test concurrent waits for different domains sleep in parallel."""
+        from config.settings import AdaptiveRateConfig, DelayConfig, RateLimitingConfig
+        
+        limiter = RateLimiter()
+        limiter.settings = Settings(rate_limiting=RateLimitingConfig(
+            default_rate=600, burst_limit=1, respect_robots_txt=False, delay=DelayConfig(min=0.1, max=0.1),
+            adaptive=AdaptiveRateConfig(enabled=False)
+        ))
+        
+        urls = [f'https://site{i}.com/page/{page}' for i in range(10) for page in range(3)]
+        started = asyncio.get_event_loop().time()
+        await asyncio.gather(*(limiter.wait_for_token(url) for url in urls))
+        elapsed = asyncio.get_event_loop().time() - started
+        
+        # Three requests per domain, 0.1s apart; a serializing limiter would need 30 x 0.1s
+        assert elapsed < 1.0
+
+
+class TestSharedRateLimits:
+    """Test rate limit budgets shared through a backend."""
+    
+    def test_lease_schedule(self):
+        """Test leased tokens are spaced exactly as single-token round trips would be."""
+        from core.limiter_backends import MemoryBackend, TokenLease
+        
+        lease = TokenLease(MemoryBackend(), 'domain:a.com', rate=1.0, capacity=2, size=2, ttl=10)
+        waits = [lease.reserve() for _ in range(4)]
+        
+        assert waits == pytest.approx([0, 0, 1, 2], abs=0.05)
+        assert lease.round_trips == 2
+    
+    def test_database_backend_shares_budget(self, tmp_path):
+        """Test two limiters, as in two worker processes, draw from one per-domain budget."""
+        import time
+        from config.settings import DelayConfig, RateLimitingConfig
+        
+        settings = Settings(
+            database=DatabaseConfig(url=f"sqlite:///{tmp_path}/limits.db"),
+            rate_limiting=RateLimitingConfig(
+                backend='database', default_rate=60, burst_limit=2, delay=DelayConfig(min=0, max=0)
+            )
+        )
+        with patch('core.rate_limiter.get_settings', return_value=settings), \
+             patch('core.limiter_backends.get_settings', return_value=settings):
+            first, second = RateLimiter(), RateLimiter()
+            
+            # The first limiter leases the whole burst in one round trip
+            leased_at = time.time()
+            assert [first.reserve('shop.com'), first.reserve('shop.com')] == [0, 0]
+            assert first.leases['domain:shop.com'].round_trips == 1
+            
+            # The second one has to wait for the shared bucket to refill, less the time
+            # the database round trips took
+            wait = second.reserve('shop.com')
+            assert 1.0 - (time.time() - leased_at) - 0.05 <= wait <= 1.0
+            assert second.reserve('other.com') == 0
+            
+            first.close()
+            second.close()
+
+
+class TestHierarchicalLimits:
+    """Test limits keyed by registrable domain, server IP and proxy."""
+    
+    def _limiter(self, **limits):
+        from config.settings import DelayConfig, RateLimitingConfig
+        
+        limiter = RateLimiter()
+        limiter.settings = Settings(rate_limiting=RateLimitingConfig(
+            default_rate=60, burst_limit=1, respect_robots_txt=False, delay=DelayConfig(min=0, max=0), **limits
+        ))
+        return limiter
+    
+    def test_hosts_share_registrable_domain(self):
+        """Test subdomains and ports of one site share a bucket under the public suffix list."""
+        from utils.public_suffix import registrable_domain
+        
+        assert RateLimiter.domain_key('https://m.shop.com:443/a') == 'shop.com'
+        assert registrable_domain('www.shop.co.uk') == 'shop.co.uk'
+        assert registrable_domain('alice.github.io') == 'alice.github.io'
+        assert registrable_domain('10.0.0.1:8080') == '10.0.0.1'
+        
+        limiter = self._limiter()
+        assert limiter.reserve(RateLimiter.domain_key('https://www.shop.com/')) == 0
+        assert limiter.reserve(RateLimiter.domain_key('https://m.shop.com/')) == pytest.approx(1.0, abs=0.05)
+    
+    def test_ip_and_proxy_levels(self):
+        """Test distinct domains are throttled together when they share a server IP or a proxy."""
+        limiter = self._limiter(ip_rate=60, ip_burst=1, proxy_rate=60, proxy_burst=1)
+        
+        assert limiter.reserve('a.com', ip='10.0.0.1') == 0
+        assert limiter.reserve('b.com', ip='10.0.0.1') == pytest.approx(1.0, abs=0.05)
+        assert limiter.reserve('c.com', proxy='http://proxy:8080') == 0
+        assert limiter.reserve('d.com', proxy='http://proxy:8080') == pytest.approx(1.0, abs=0.05)
+        assert limiter.reserve('e.com', ip='10.0.0.2', proxy='http://other:8080') == 0
+    
+    def test_idle_buckets_evicted(self):
+        """Test the domain level stays bounded by evicting idle buckets, never throttling ones."""
+        limiter = self._limiter()
+        limiter.domain_buckets.max_size = 2
+        
+        limiter.reserve('busy.com')
+        for i in range(5):
+            limiter.domain_buckets[f'idle{i}.com']
+        
+        # busy.com is still refilling, so it survives while idle buckets make room
+        assert 'busy.com' in limiter.domain_buckets
+        assert len(limiter.domain_buckets) == 2
+        assert limiter.get_rate_stats()['global']['evicted_buckets'] == 4
+
+
+class TestAdaptiveRate:
+    """Test AIMD adaptation of per-domain rates."""
+    
+    def _settings(self, tmp_path, **adaptive):
+        from config.settings import AdaptiveRateConfig, DelayConfig, RateLimitingConfig
+        
+        return Settings(
+            database=DatabaseConfig(url=f"sqlite:///{tmp_path}/rates.db"),
+            rate_limiting=RateLimitingConfig(
+                default_rate=60, respect_robots_txt=False, delay=DelayConfig(min=0, max=0),
+                adaptive=AdaptiveRateConfig(**adaptive)
+            )
+        )
+    
+    def test_throttling_decreases_once_per_window(self, tmp_path):
+        """Test a burst of 429s halves the rate once and clean responses raise it again."""
+        from core.rate_control import AdaptiveRateControl
+        
+        control = AdaptiveRateControl(self._settings(tmp_path, persist=False))
+        
+        assert control.observe('shop.com', 60, 429, 0.2) == 30
+        # Responses to requests already in flight before the decrease are ignored
+        assert control.observe('shop.com', 60, 429, 0.2) is None
+        assert control.get('shop.com', 60).decreases == 1
+        
+        # A minute of clean responses at 30/min adds additive_increase
+        for _ in range(30):
+            control.observe('shop.com', 60, 200, 0.0)
+        assert control.get('shop.com', 60).rate == pytest.approx(32, abs=0.1)
+    
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_domain_and_rate_persists(self, tmp_path):
+        """Test a 429 with Retry-After books the domain out and the lowered rate survives a restart."""
+        settings = self._settings(tmp_path)
+        with patch('core.rate_limiter.get_settings', return_value=settings):
+            limiter = RateLimiter()
+            await limiter.wait_for_token('https://shop.com/a')
+            limiter.record_response('https://shop.com/b', 429, 0.1, {'Retry-After': '30'})
+            
+            assert limiter.domain_buckets['shop.com'].refill_rate * 60 == 30
+            assert limiter.reserve('shop.com') == pytest.approx(30, abs=1)
+            limiter.close()
+            
+            restarted = RateLimiter()
+            await restarted.wait_for_token('https://shop.com/a')
+            assert restarted.get_rate_stats()['shop.com']['rate_per_minute'] == 30
+            restarted.close()
+
+
+class TestAdaptiveConcurrency:
+    """Test per-domain concurrency limits driven by the latency gradient."""
+    
+    def _limiter(self, **concurrency):
+        from config.settings import ConcurrencyConfig
+        from core.concurrency import ConcurrencyLimiter
+        
+        return ConcurrencyLimiter(Settings(concurrency=ConcurrencyConfig(**concurrency)))
+    
+    @pytest.mark.asyncio
+    async def test_limit_follows_latency_gradient(self):
+        """Test the limit grows under flat latency and shrinks on inflation and 429s."""
+        limiter = self._limiter(initial_limit=4, smoothing=1.0)
+        state = limiter.get_domain('shop.com')
+        state.in_flight = 4
+        
+        limiter.record('https://www.shop.com/', 200, 0.2)
+        assert state.limit == pytest.approx(6.0)
+        
+        state.in_flight = 6
+        limiter.record('https://www.shop.com/', 200, 2.0)
+        assert state.limit < 6.0
+        
+        before = state.limit
+        limiter.record('https://www.shop.com/', 429, 0.1)
+        assert state.limit == pytest.approx(before * 0.9)
+        assert state.drops == 1
+        
+        # A lightly loaded domain learns nothing from its latency
+        idle = limiter.get_domain('idle.com')
+        limiter.record('https://idle.com/', 200, 0.2)
+        assert idle.limit == 4
+    
+    @pytest.mark.asyncio
+    async def test_slots_cap_concurrent_requests(self):
+        """Test holders beyond the limit wait and take over released slots in order."""
+        limiter = self._limiter(initial_limit=2)
+        freed = Mock()
+        limiter.add_release_callback(freed)
+        # Acquired in their own tasks: tasks started here would otherwise inherit the held slot
+        first = await asyncio.create_task(limiter.acquire('https://a.com/1'))
+        
+        async def hold():
+            # A nested acquire in the holding task reuses its slot instead of deadlocking
+            async with limiter.slot('https://a.com/2'):
+                async with limiter.slot('https://www.a.com/3'):
+                    await asyncio.sleep(0.05)
+        
+        second = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert limiter.get_domain('a.com').in_flight == 2
+        assert not limiter.has_capacity('https://a.com/4')
+        assert limiter.has_capacity('https://b.com/')
+        
+        waiter = asyncio.create_task(limiter.acquire('https://a.com/4'))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        
+        first.release()
+        third = await asyncio.wait_for(waiter, 1)
+        # The freed slot went straight to the waiter, so idle workers are not woken for it
+        freed.assert_not_called()
+        await second
+        third.release()
+        assert limiter.get_domain('a.com').in_flight == 0
+        assert freed.called
+
+    
+    @pytest.mark.asyncio
+    async def test_retry_wait_gives_up_slot(self):
+        """Test a holder backing off between retries lets another request to the domain run."""
+        from core.errors import RetryableError, retry_navigation
+        
+        limiter = self._limiter(initial_limit=1)
+        attempts = []
+        
+        async def flaky(url):
+            attempts.append(limiter.get_domain('a.com').in_flight)
+            if len(attempts) == 1:
+                raise RetryableError(url, "connection reset")
+            return "ok"
+        
+        async def retried():
+            async with limiter.slot('https://a.com/1'):
+                return await retry_navigation(flaky, 'https://a.com/1', delay=0.05, concurrency=limiter)
+        
+        holder = asyncio.create_task(retried())
+        await asyncio.sleep(0.01)
+        # The holder is backing off, so its slot is free for another request meanwhile
+        other = await asyncio.wait_for(asyncio.create_task(limiter.acquire('https://a.com/2')), 0.03)
+        other.release()
+        
+        assert await holder == "ok"
+        assert attempts == [1, 1]
+        assert limiter.get_domain('a.com').in_flight == 0
+
+class TestRobots:
+    """Test robots.txt matching and caching."""
+    
+    ROBOTS_TXT = """
+User-agent: *
+Disallow: /private
+Allow: /private/public$
+Disallow: /*.pdf$
+Crawl-delay: 5
+
+User-agent: other
+User-agent: Scraper/2.0
+Disallow: /search
+Crawl-delay: 1
+
+Sitemap: https://shop.com/sitemap.xml
+"""
+    
+    def test_rules_matching(self):
+        """Test group selection, wildcards, anchors and longest-match precedence."""
+        from core.robots import RobotsRules
+        
+        generic = RobotsRules.parse(self.ROBOTS_TXT, 'anybot')
+        assert not generic.is_allowed('https://shop.com/private/orders')
+        assert generic.is_allowed('https://shop.com/private/public')
+        assert not generic.is_allowed('https://shop.com/private/public/more')
+        assert not generic.is_allowed('https://shop.com/docs/manual.pdf')
+        assert generic.is_allowed('https://shop.com/docs/manual.pdf?download=1')
+        assert generic.crawl_delay == 5
+        assert generic.sitemaps == ['https://shop.com/sitemap.xml']
+        
+        # A group naming our product token replaces the '*' group entirely
+        specific = RobotsRules.parse(self.ROBOTS_TXT, 'scraper')
+        assert specific.is_allowed('https://shop.com/private/orders')
+        assert not specific.is_allowed('https://shop.com/search?q=shoes')
+        assert specific.crawl_delay == 1
+    
+    @pytest.mark.asyncio
+    async def test_cache_coalesces_fetches_and_persists(self, tmp_path):
+        """Test concurrent lookups share one fetch and a restarted cache reuses the stored file."""
+        from core.robots import RobotsCache
+        
+        fetched = []
+        
+        class Response:
+            status = 200
+            content = Mock(read=AsyncMock(return_value=self.ROBOTS_TXT.encode()))
+            
+            async def __aenter__(self):
+                await asyncio.sleep(0.01)
+                return self
+            
+            async def __aexit__(self, *args):
+                return False
+        
+        def get(url, **kwargs):
+            fetched.append(url)
+            return Response()
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/robots.db"))
+        with patch('core.http_scraper.get_http_session', AsyncMock(return_value=Mock(get=get))):
+            cache = RobotsCache(settings)
+            allowed = await asyncio.gather(*(cache.is_allowed(f'https://shop.com/search?q={i}') for i in range(5)))
+            cache.close()
+            
+            restarted = RobotsCache(settings)
+            assert await restarted.get_crawl_delay('https://shop.com/') == 1
+            restarted.close()
+        
+        assert allowed == [False] * 5
+        assert fetched == ['https://shop.com/robots.txt']
+        assert restarted.get_stats()['loaded'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_disallowed_job_fails_before_scraper(self, tmp_path):
+        """Test the queue fails a disallowed job permanently without building a scraper."""
+        from core.queue import JobQueue, JobStatus
+        from core.robots import RobotsCache, RobotsRules
+        
+        settings = Settings(
+            database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"),
+            storage=StorageConfig(data_dir=str(tmp_path), export_formats=["json"])
+        )
+        factory = Mock()
+        robots = RobotsCache(settings)
+        robots.get_rules = AsyncMock(return_value=RobotsRules(disallow_all=True))
+        
+        with patch('core.queue.get_settings', return_value=settings), \
+             patch('storage.database.get_settings', return_value=settings), \
+             patch('core.queue.get_robots_cache', return_value=robots):
+            queue = JobQueue()
+            job_id = queue.add_job("blocked", "https://shop.com/private", "example")
+            await queue._process_job(queue.get_job(job_id), "worker-0", factory)
+            job = queue.get_job(job_id)
+        
+        factory.assert_not_called()
+        assert job.status == JobStatus.FAILED
+        assert job.retry_count == 0
+        assert job.metadata['error_kind'] == 'robots_disallowed'
 
 
 class TestDataPipeline:
@@ -154,6 +1320,512 @@ class TestDataPipeline:
         assert len(deduplicated) == 2
         assert deduplicated[0]["id"] == "1"
         assert deduplicated[1]["id"] == "2"
+    
+    def test_streaming_export(self, tmp_path):
+        """Test batches appended to an export stream produce complete files."""
+        from core.pipeline import DataPipeline
+        
+        pipeline = DataPipeline()
+        pipeline.data_dir = tmp_path
+        
+        stream = pipeline.open_stream("stream", formats=["json", "csv", "xml"])
+        stream.write([{"name": "Product 1"}, {"name": "Product 2"}])
+        stream.write([{"name": "Product 3"}])
+        results = stream.close()
+        
+        assert [result.record_count for result in results] == [3, 3, 3]
+        records = json.loads((tmp_path / "stream.json").read_text())
+        assert [record["name"] for record in records] == ["Product 1", "Product 2", "Product 3"]
+        assert (tmp_path / "stream.csv").read_text().count("Product") == 3
+        assert (tmp_path / "stream.xml").read_text().endswith("</data>")
+
+
+class TestStreamingResults:
+    """Test workers persisting streamed records in batches."""
+    
+    @pytest.mark.asyncio
+    async def test_stream_results_flushes_batches(self, tmp_path):
+        """Test records are saved batch by batch and the job keeps only a summary."""
+        from core.queue import Job, JobQueue, JobStatus
+        
+        settings = Settings(
+            database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"),
+            storage=StorageConfig(data_dir=str(tmp_path), export_formats=["json"])
+        )
+        settings.scraping.stream_batch_size = 2
+        
+        with patch('core.queue.get_settings', return_value=settings), \
+             patch('storage.database.get_settings', return_value=settings), \
+             patch('core.pipeline.get_settings', return_value=settings):
+            queue = JobQueue()
+            job = Job(id="job-1", name="stream", url="https://shop.com/", scraper_class="ExampleScraper",
+                      status=JobStatus.RUNNING)
+            saved_batches = []
+            
+            async def records():
+                for i in range(5):
+                    # Earlier batches are already stored by the time later records exist
+                    saved_batches.append(len(queue.database.get_data()) if queue.database else 0)
+                    yield {"name": f"Product {i}"}
+            
+            summary = await queue._stream_results(job, records())
+        
+        assert summary['records'] == 5
+        assert summary['batches'] == 3
+        assert saved_batches == [0, 0, 1, 1, 2]
+        assert len(json.loads((tmp_path / "job_job-1.json").read_text())) == 5
+
+
+
+class TestSharedEngine:
+    """Test components share one engine per database."""
+    
+    def test_one_engine_per_database_url(self, tmp_path):
+        """Test every component reuses the same engine and all tables are created."""
+        from sqlalchemy import inspect
+        from core.queue import JobQueue
+        from storage.database import DatabaseManager
+        from storage.engine import close_engines, get_engine
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"))
+        other = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/other.db"))
+        try:
+            with patch('core.queue.get_settings', return_value=settings), \
+                 patch('core.engine_selector.get_settings', return_value=settings), \
+                 patch('storage.database.get_settings', return_value=settings):
+                queue = JobQueue()
+                selector = EngineSelector()
+                database = DatabaseManager()
+            
+            assert queue.engine is get_engine(settings.database)
+            assert selector.Session.kw['bind'] is queue.engine
+            assert database.Session is queue.Session
+            assert get_engine(other.database) is not queue.engine
+            assert {'jobs', 'engine_stats', 'scraped_data', 'crawls', 'page_states'} <= set(inspect(queue.engine).get_table_names())
+            queue.notifier.close()
+        finally:
+            close_engines()
+
+
+class TestJobClaims:
+    """Test atomic job claims with leases."""
+    
+    def test_concurrent_claims_never_overlap(self, tmp_path):
+        """Test workers with their own connections each get distinct jobs, highest priority first."""
+        from concurrent.futures import ThreadPoolExecutor
+        from core.queue import JobQueue, JobStatus
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"))
+        with patch('core.queue.get_settings', return_value=settings):
+            queue = JobQueue()
+            queue.add_jobs([
+                {'name': f"job-{i}", 'url': f"https://shop.com/{i}", 'scraper_class': 'example', 'priority': i % 2}
+                for i in range(40)
+            ])
+            first = queue.claim_jobs("worker-a", limit=2)
+            assert [job.priority for job in first] == [1, 1]
+            assert first[0].status == JobStatus.RUNNING and first[0].worker_id == "worker-a"
+            
+            def drain(worker_id):
+                worker_queue = JobQueue()
+                claimed = []
+                while worker_queue.get_pending_jobs(limit=1):
+                    claimed.extend(job.id for job in worker_queue.claim_jobs(worker_id))
+                return claimed
+            
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                claimed = [job_id for ids in pool.map(drain, [f"worker-{i}" for i in range(8)]) for job_id in ids]
+        
+        assert len(claimed) == len(set(claimed)) == 38
+    
+    def test_expired_lease_is_reclaimed(self, tmp_path):
+        """Test a job whose worker stopped renewing its lease goes to another worker."""
+        from datetime import datetime, timedelta
+        from core.queue import JobModel, JobQueue, JobStatus
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"))
+        with patch('core.queue.get_settings', return_value=settings):
+            queue = JobQueue()
+            job_id = queue.add_job("job", "https://shop.com/", "example")
+            assert queue.claim_jobs("worker-a")[0].id == job_id
+            assert queue.claim_jobs("worker-b") == []
+            assert queue.renew_lease(job_id, "worker-a")
+            
+            session = queue.Session()
+            session.query(JobModel).filter_by(id=job_id).update(
+                {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)}
+            )
+            session.commit()
+            session.close()
+            
+            assert [job.id for job in queue.get_pending_jobs(include_expired=True)] == [job_id]
+            assert queue.claim_jobs("worker-b")[0].worker_id == "worker-b"
+            assert not queue.renew_lease(job_id, "worker-a")
+            
+            # The stale worker's outcome is dropped; only the new owner's is recorded
+            assert not queue.update_job_status(job_id, JobStatus.FAILED, error_message="stale", worker_id="worker-a")
+            assert not queue.increment_retry_count(job_id, worker_id="worker-a")
+            assert queue.update_job_status(job_id, JobStatus.COMPLETED, result={'ok': True}, worker_id="worker-b")
+            job = queue.get_job(job_id)
+            assert job.status == JobStatus.COMPLETED and job.error_message is None and job.retry_count == 0
+    
+    def test_upgrades_existing_jobs_table(self, tmp_path):
+        """Test a jobs table from before claims gets the lease columns and the claim index."""
+        import sqlite3
+        from core.queue import JobQueue
+        
+        connection = sqlite3.connect(tmp_path / "jobs.db")
+        connection.execute(
+            "CREATE TABLE jobs (id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, url VARCHAR NOT NULL, "
+            "scraper_class VARCHAR NOT NULL, status VARCHAR NOT NULL, priority INTEGER, created_at DATETIME NOT NULL, "
+            "started_at DATETIME, completed_at DATETIME, retry_count INTEGER, max_retries INTEGER, "
+            "error_message TEXT, result TEXT, metadata TEXT)"
+        )
+        connection.close()
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"))
+        with patch('core.queue.get_settings', return_value=settings):
+            queue = JobQueue()
+            queue.add_job("job", "https://shop.com/", "example")
+            assert queue.claim_jobs("worker-a")[0].worker_id == "worker-a"
+        
+        connection = sqlite3.connect(tmp_path / "jobs.db")
+        indexes = [row[1] for row in connection.execute("PRAGMA index_list(jobs)")]
+        connection.close()
+        assert 'ix_jobs_claim' in indexes
+    
+    @pytest.mark.asyncio
+    async def test_lost_lease_stops_job(self, tmp_path):
+        """Test a worker whose lease renewal fails stops the job instead of finishing it."""
+        from core.queue import JobQueue, JobStatus
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"))
+        settings.scraping.job_lease = 0.03
+        with patch('core.queue.get_settings', return_value=settings):
+            queue = JobQueue()
+            job_id = queue.add_job("job", "https://shop.com/", "example")
+            job = queue.claim_jobs("worker-a")[0]
+            queue.renew_lease = Mock(return_value=False)
+            finished = []
+            
+            async def run_job(*args, **kwargs):
+                await asyncio.sleep(1)
+                finished.append(job_id)
+            
+            queue._run_job = run_job
+            await asyncio.wait_for(queue._process_job(job, "worker-a", Mock()), 0.5)
+        
+        assert queue.renew_lease.called
+        assert finished == []
+
+
+class TestJobWakeup:
+    """Test idle workers are woken by new jobs instead of polling."""
+    
+    @pytest.mark.asyncio
+    async def test_notify_wakes_waiters_without_lost_wakeups(self):
+        """Test a notification before the wait returns at once and one from a thread wakes a waiter."""
+        import threading
+        from core.job_notify import JobNotifier
+        
+        notifier = JobNotifier()
+        version = notifier.version
+        notifier.notify()
+        await asyncio.wait_for(notifier.wait(version, 30), 0.1)
+        
+        version = notifier.version
+        waiter = asyncio.create_task(notifier.wait(version, 30))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        threading.Thread(target=notifier.notify).start()
+        await asyncio.wait_for(waiter, 0.5)
+    
+    @pytest.mark.asyncio
+    async def test_add_job_wakes_other_process(self, tmp_path):
+        """Test a job added through another queue on the same SQLite file wakes an idle worker at once."""
+        from core.job_notify import SocketNotifier
+        from core.queue import JobQueue
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"))
+        with patch('core.queue.get_settings', return_value=settings):
+            worker_queue, producer_queue = JobQueue(), JobQueue()
+        assert isinstance(worker_queue.notifier, SocketNotifier)
+        
+        try:
+            version = worker_queue.notifier.version
+            waiter = asyncio.create_task(worker_queue.notifier.wait(version, 30))
+            await asyncio.sleep(0.01)
+            assert worker_queue.notifier.listening and not waiter.done()
+            
+            producer_queue.add_job("job", "https://shop.com/", "example")
+            await asyncio.wait_for(waiter, 0.5)
+            assert worker_queue.get_pending_jobs()[0].name == "job"
+        finally:
+            worker_queue.notifier.close()
+            producer_queue.notifier.close()
+
+
+class TestCrawler:
+    """Test URL canonicalization, the seen-set and crawl link feedback."""
+    
+    def test_canonicalize_url(self):
+        """Test equivalent URLs canonicalize to the same string."""
+        from core.crawler import canonicalize_url
+        
+        tracking = ["utm_*", "gclid"]
+        canonical = canonicalize_url("https://shop.com/a/b", tracking)
+        
+        assert canonical == "https://shop.com/a/b"
+        assert canonicalize_url("HTTPS://Shop.COM:443/a/./c/../b#reviews", tracking) == canonical
+        assert canonicalize_url("https://shop.com/a/b?utm_source=x&gclid=1", tracking) == canonical
+        assert canonicalize_url("http://shop.com/?b=2&a=1", tracking) == "http://shop.com/?a=1&b=2"
+        assert canonicalize_url("http://shop.com:8080", tracking) == "http://shop.com:8080/"
+        assert canonicalize_url("mailto:sales@shop.com", tracking) is None
+        assert canonicalize_url("javascript:void(0)", tracking) is None
+    
+    def test_seen_set_survives_restart(self, tmp_path):
+        """Test the seen-set grows past its capacity and recovers URLs added after the last checkpoint."""
+        from core.crawler import SeenSet
+        
+        seen = SeenSet(tmp_path, capacity=10, error_rate=0.01, checkpoint_every=1000)
+        urls = [f"https://shop.com/p/{i}" for i in range(50)]
+        assert seen.add_new(urls[:30]) == urls[:30]
+        seen.checkpoint()
+        seen.add_new(urls[30:])
+        assert len(seen.bloom.layers) > 1
+        # Simulate a crash: the last 20 URLs never made it into a Bloom snapshot
+        seen.db.close()
+        
+        restarted = SeenSet(tmp_path, capacity=10, error_rate=0.01)
+        assert all(url in restarted for url in urls)
+        assert restarted.add_new(urls + ["https://shop.com/p/new"]) == ["https://shop.com/p/new"]
+        restarted.close()
+    
+    def test_crawl_enqueues_in_scope_links_once(self, tmp_path):
+        """Test discovered links are canonicalized, scoped, deduplicated and enqueued breadth-first."""
+        from core.queue import JobQueue
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"))
+        settings.crawl.state_dir = str(tmp_path / "crawls")
+        
+        with patch('core.queue.get_settings', return_value=settings), \
+             patch('core.crawler.get_settings', return_value=settings):
+            queue = JobQueue()
+            crawl_id = queue.get_crawl_manager().start_crawl(
+                "ExampleScraper", ["https://shop.com/"], max_depth=1
+            )
+            seed_job = queue.get_pending_jobs()[0]
+            
+            links = [
+                "https://shop.com/",
+                "https://shop.com/products?page=2&utm_medium=email",
+                "https://shop.com/products?page=2#top",
+                "https://other.com/products",
+            ]
+            assert queue.get_crawl_manager().enqueue_links(seed_job, links) == 1
+            queue.get_crawl_manager().close()
+            
+            # A restarted worker reloads the crawl and its seen-set
+            restarted = JobQueue()
+            crawls = restarted.get_crawl_manager()
+            child_job = [job for job in restarted.get_pending_jobs() if job.metadata['depth'] == 1][0]
+            assert crawls.enqueue_links(seed_job, links) == 0
+            # Depth 2 is beyond max_depth
+            assert crawls.enqueue_links(child_job, ["https://shop.com/deeper"]) == 0
+            stats = crawls.get_crawl_stats(crawl_id)
+            crawls.close()
+        
+        assert child_job.url == "https://shop.com/products?page=2"
+        assert child_job.priority == -1
+        assert stats['pages_enqueued'] == 2
+        assert stats['scope']['allowed_hosts'] == ["shop.com"]
+    
+    def test_failed_insert_keeps_urls_and_budget(self, tmp_path):
+        """Test links whose jobs fail to insert stay unseen and the page budget is shared across workers."""
+        from core.queue import JobQueue
+        
+        settings = Settings(database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"))
+        settings.crawl.state_dir = str(tmp_path / "crawls")
+        links = ["https://shop.com/a", "https://shop.com/b", "https://shop.com/c"]
+        
+        with patch('core.queue.get_settings', return_value=settings), \
+             patch('core.crawler.get_settings', return_value=settings):
+            queue = JobQueue()
+            crawls = queue.get_crawl_manager()
+            crawl_id = crawls.start_crawl("ExampleScraper", ["https://shop.com/"], max_pages=3)
+            seed_job = queue.get_pending_jobs()[0]
+            
+            # A second worker loads the crawl while its budget is still mostly unspent
+            other = JobQueue()
+            other_crawls = other.get_crawl_manager()
+            other_crawls.get_crawl(crawl_id)
+            
+            with patch.object(queue, 'add_jobs', side_effect=RuntimeError("database is locked")):
+                with pytest.raises(RuntimeError):
+                    crawls.enqueue_links(seed_job, links)
+            assert crawls.get_crawl_stats(crawl_id)['pages_enqueued'] == 1
+            
+            assert crawls.enqueue_links(seed_job, links[:1]) == 1
+            assert other_crawls.enqueue_links(seed_job, links) == 1
+            assert crawls.enqueue_links(seed_job, links) == 0
+            urls = sorted(job.url for job in queue.get_pending_jobs())
+            crawls.close()
+            other_crawls.close()
+        
+        assert urls == ["https://shop.com/", "https://shop.com/a", "https://shop.com/b"]
+
+
+
+class TestChangeDetection:
+    """Test skipping unchanged pages on repeated runs."""
+    
+    def test_content_hash_ignores_volatile_markup(self):
+        """Test scripts, comments, nonces and whitespace do not count as changes."""
+        from core.change_detection import PageCheck, PageUnchanged, content_hash
+        
+        html = '<ul>\n  <li>Lamp $5</li>\n</ul><script nonce="a1">var t = 1;</script>'
+        rerendered = '<ul><li>Lamp $5</li> </ul><!-- 12:01 --><script nonce="b2">var t = 2;</script>'
+        assert content_hash(html) == content_hash(rerendered)
+        assert content_hash(html) != content_hash(html.replace('$5', '$6'))
+        
+        # Each engine is compared with its own previous hash
+        check = PageCheck(url='https://shop.com/', scraper_class='X', browser_hash=content_hash(html))
+        check.observe('http', 200, {}, html)
+        assert check.unchanged_reason is None and check.new_hash == content_hash(html)
+        
+        check = PageCheck(url='https://shop.com/', scraper_class='X', http_hash=content_hash(html))
+        with pytest.raises(PageUnchanged):
+            check.observe('http', 200, {}, rerendered)
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_job_skips_storage(self, tmp_path):
+        """Test a 304 on a repeated job marks it completed and unchanged without storing records."""
+        from core.queue import JobQueue, JobStatus
+        from config.settings import RateLimitingConfig
+        
+        settings = Settings(
+            database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"),
+            rate_limiting=RateLimitingConfig(respect_robots_txt=False),
+            storage=StorageConfig(data_dir=str(tmp_path), export_formats=["json"])
+        )
+        schema = load_schema({'name': 'prices', 'container': '.p', 'fields': {'price': ''}})
+        requests = []
+        
+        async def fetch(url, headers=None):
+            requests.append(headers or {})
+            if (headers or {}).get('If-None-Match') == '"v1"':
+                return 304, '', {'ETag': '"v1"'}, url
+            return 200, '<li class="p">$5</li><li class="p">$6</li>', {'ETag': '"v1"'}, url
+        
+        def factory(scraper_class, engine):
+            scraper = make_http_scraper(SchemaScraper.for_schema(schema))()
+            scraper.initialize = AsyncMock()
+            scraper.rate_limiter = Mock(wait_for_token=AsyncMock())
+            scraper._fetch = fetch
+            return scraper
+        
+        with patch('core.queue.get_settings', return_value=settings), \
+             patch('core.change_detection.get_settings', return_value=settings), \
+             patch('storage.database.get_settings', return_value=settings), \
+             patch('core.pipeline.get_settings', return_value=settings):
+            queue = JobQueue()
+            job_ids = []
+            for _ in range(2):
+                job_id = queue.add_job("prices", "https://shop.com/p", "prices", metadata={'detect_changes': True})
+                await queue._process_job(queue.get_job(job_id), "worker-0", factory)
+                job_ids.append(job_id)
+            
+            first, second = [queue.get_job(job_id) for job_id in job_ids]
+            stored = queue.database.get_data()
+            stats = queue.get_change_detector().get_stats()
+        
+        assert first.result['records'] == 2 and first.metadata['unchanged'] is False
+        assert second.status == JobStatus.COMPLETED
+        assert second.result == {'unchanged': True, 'reason': 'not_modified'}
+        assert second.metadata['unchanged'] is True and second.metadata['unchanged_reason'] == 'not_modified'
+        assert requests == [{}, {'If-None-Match': '"v1"'}]
+        assert len(stored) == 1
+        assert stats['checks'] == 2 and stats['unchanged_checks'] == 1
+
+
+
+class TestTiming:
+    """Test per-phase latency instrumentation."""
+    
+    @pytest.mark.asyncio
+    async def test_phases_without_double_counting(self):
+        """Test nested phases are taken out of the enclosing phase and phases are free outside a job timer."""
+        from utils.timing import PhaseHistograms, job_timer, phase, timed
+        
+        @timed('extract')
+        async def extract():
+            with phase('parse'):
+                await asyncio.sleep(0.01)
+        
+        # No timer: nothing is recorded and nothing fails
+        await extract()
+        
+        with job_timer() as timer:
+            with phase('goto'):
+                await asyncio.sleep(0.01)
+                with phase('retry_wait'):
+                    await asyncio.sleep(0.05)
+            await extract()
+            await extract()
+        
+        breakdown = timer.breakdown()
+        phases = breakdown['phases']
+        assert set(phases) == {'goto', 'retry_wait', 'extract', 'parse'}
+        assert phases['extract']['count'] == 2 and phases['parse']['count'] == 2
+        assert phases['parse']['seconds'] >= 0.02
+        assert phases['retry_wait']['seconds'] >= 0.05
+        # The backoff is not also reported as goto time
+        assert phases['goto']['seconds'] < 0.05
+        assert breakdown['total'] >= sum(totals['seconds'] for totals in phases.values())
+        
+        histograms = PhaseHistograms()
+        histograms.record_breakdown(breakdown)
+        summary = histograms.get_summary()
+        assert summary['total']['count'] == 1 and summary['total']['share'] == 1.0
+        assert 0 < summary['extract']['share'] < 1
+    
+    @pytest.mark.asyncio
+    async def test_job_timings_in_metadata(self, tmp_path):
+        """Test a finished job stores its phase breakdown in metadata and feeds the phase stats."""
+        from core.queue import JobQueue
+        from config.settings import RateLimitingConfig
+        
+        settings = Settings(
+            database=DatabaseConfig(url=f"sqlite:///{tmp_path}/jobs.db"),
+            rate_limiting=RateLimitingConfig(respect_robots_txt=False),
+            storage=StorageConfig(data_dir=str(tmp_path), export_formats=["json"])
+        )
+        schema = load_schema({'name': 'prices', 'container': '.p', 'fields': {'price': ''}})
+        
+        async def fetch(url, headers=None):
+            return 200, '<li class="p">$5</li><li class="p">$6</li>', {}, url
+        
+        def factory(scraper_class, engine):
+            scraper = make_http_scraper(SchemaScraper.for_schema(schema))()
+            scraper.initialize = AsyncMock()
+            scraper.rate_limiter = Mock(wait_for_token=AsyncMock())
+            scraper._fetch = fetch
+            return scraper
+        
+        with patch('core.queue.get_settings', return_value=settings), \
+             patch('storage.database.get_settings', return_value=settings), \
+             patch('core.pipeline.get_settings', return_value=settings):
+            queue = JobQueue()
+            job_id = queue.add_job("prices", "https://shop.com/p", "prices", metadata={'source': 'test'})
+            await queue._process_job(queue.get_job(job_id), "worker-0", factory)
+            job = queue.get_job(job_id)
+            phase_stats = queue.get_phase_stats()
+        
+        assert job.metadata['source'] == 'test'
+        timings = job.metadata['timings']
+        assert {'rate_limit', 'fetch', 'parse', 'extract', 'store'} <= set(timings['phases'])
+        assert phase_stats['total']['count'] == 1
+        assert phase_stats['fetch']['count'] == 1
 
 
 if __name__ == "__main__":
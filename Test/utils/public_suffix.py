@@ -0,0 +1,107 @@
+"""
+Registrable domains (eTLD+1) from the bundled Mozilla Public Suffix List.
+"""
+
+import ipaddress
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Set
+
+
+# https://publicsuffix.org/list/public_suffix_list.dat, MPL 2.0
+DEFAULT_LIST_PATH = Path(__file__).with_name('public_suffix_list.dat')
+
+
+class PublicSuffixList:
+    """Public suffix rules: plain, wildcard (*.ck) and exception (!www.ck)."""
+    
+    def __init__(self, path: Optional[Path] = None):
+        self.rules: Set[str] = set()
+        self.wildcards: Set[str] = set()
+        self.exceptions: Set[str] = set()
+        self._load(Path(path or DEFAULT_LIST_PATH))
+    
+    def _load(self, path: Path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                rule = line.strip().split(' ', 1)[0].lower()
+                if not rule or rule.startswith('//'):
+                    continue
+                # Hosts arrive punycoded, the list is in Unicode; index both forms
+                for form in {rule, self._to_ascii(rule)}:
+                    if form.startswith('!'):
+                        self.exceptions.add(form[1:])
+                    elif form.startswith('*.'):
+                        self.wildcards.add(form[2:])
+                    else:
+                        self.rules.add(form)
+    
+    @staticmethod
+    def _to_ascii(rule: str) -> str:
+        try:
+            return '.'.join(
+                label if label in ('*', '') or label.isascii() else label.encode('idna').decode('ascii')
+                for label in rule.split('.')
+            )
+        except UnicodeError:
+            return rule
+    
+    def public_suffix(self, host: str) -> str:
+        """Longest public suffix of host; an exception rule cuts one label off its match."""
+        labels = host.split('.')
+        for index in range(len(labels)):
+            candidate = '.'.join(labels[index:])
+            if candidate in self.exceptions:
+                return '.'.join(labels[index + 1:])
+            if candidate in self.rules or '.'.join(labels[index + 1:]) in self.wildcards:
+                return candidate
+        # The implicit '*' rule: any unlisted TLD is a public suffix
+        return labels[-1]
+    
+    def registrable_domain(self, host: str) -> str:
+        """The public suffix plus one label, e.g. www.shop.co.uk -> shop.co.uk.
+        
+        IP addresses, bare suffixes and single-label hosts are returned as given.
+        """
+        host = normalize_host(host)
+        if not host or '.' not in host or _is_ip(host):
+            return host
+        suffix = self.public_suffix(host)
+        if suffix == host:
+            return host
+        return '.'.join(host[:-len(suffix) - 1].split('.')[-1:] + [suffix])
+
+
+def normalize_host(host: str) -> str:
+    """Lowercase a host or netloc and drop credentials, port and trailing dot."""
+    host = host.lower().rsplit('@', 1)[-1]
+    if host.startswith('['):
+        return host[1:host.find(']')] if ']' in host else host[1:]
+    if host.count(':') == 1:
+        host = host.split(':', 1)[0]
+    return host.rstrip('.')
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+_public_suffix_list: Optional[PublicSuffixList] = None
+
+
+def get_public_suffix_list() -> PublicSuffixList:
+    """Get the bundled list, loaded on first use."""
+    global _public_suffix_list
+    if _public_suffix_list is None:
+        _public_suffix_list = PublicSuffixList()
+    return _public_suffix_list
+
+
+@lru_cache(maxsize=65536)
+def registrable_domain(host: str) -> str:
+    """Registrable domain (eTLD+1) of a host or netloc using the bundled list."""
+    return get_public_suffix_list().registrable_domain(host)
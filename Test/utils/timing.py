@@ -0,0 +1,187 @@
+"""
+Per-phase latency timing for jobs, with histograms of per-job breakdowns.
+"""
+
+import bisect
+import functools
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+_current_timer: ContextVar[Optional['PhaseTimer']] = ContextVar('phase_timer', default=None)
+_active_phase: ContextVar[Optional['_ActivePhase']] = ContextVar('active_phase', default=None)
+
+_NO_TIMING = nullcontext()
+
+
+class PhaseTimer:
+    """Accumulates time per phase for one job."""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, Dict[str, float]] = {}
+    
+    def add(self, name: str, seconds: float):
+        totals = self.phases.setdefault(name, {'count': 0, 'seconds': 0.0})
+        totals['count'] += 1
+        totals['seconds'] += seconds
+    
+    def breakdown(self) -> Dict[str, Any]:
+        """Job total, seconds and call count per phase, and time outside any phase."""
+        total = time.perf_counter() - self.started
+        timed = sum(totals['seconds'] for totals in self.phases.values())
+        return {
+            'total': round(total, 6),
+            # Concurrent tabs can make phases sum past the wall-clock total
+            'other': round(max(total - timed, 0.0), 6),
+            'phases': {
+                name: {'count': totals['count'], 'seconds': round(totals['seconds'], 6)}
+                for name, totals in self.phases.items()
+            }
+        }
+
+
+@contextmanager
+def job_timer() -> Iterator[PhaseTimer]:
+    """Time the phases run in this context (and tasks started from it) for one job."""
+    timer = PhaseTimer()
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+class _ActivePhase:
+    """A running phase and the time spent in phases nested in it."""
+    
+    __slots__ = ('name', 'nested')
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.nested = 0.0
+
+
+@contextmanager
+def _timed_phase(timer: PhaseTimer, name: str, parent: Optional[_ActivePhase]):
+    active = _ActivePhase(name)
+    token = _active_phase.set(active)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _active_phase.reset(token)
+        # Nested phases are reported on their own, so only this phase's own time counts here
+        timer.add(name, max(elapsed - active.nested, 0.0))
+        if parent is not None:
+            parent.nested += elapsed
+
+
+def phase(name: str):
+    """Context manager timing a phase of the current job.
+    
+    Outside a job timer this is a shared no-op. A phase nested in a different
+    phase is recorded on its own and its time is taken out of the enclosing
+    one (e.g. retry_wait inside fetch), so a job's phases never double count
+    the same time. A phase nested in one of the same name is part of it.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        return _NO_TIMING
+    parent = _active_phase.get()
+    if parent is not None and parent.name == name:
+        return _NO_TIMING
+    return _timed_phase(timer, name, parent)
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing an async method as a phase of the current job."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _current_timer.get() is None:
+                return await func(*args, **kwargs)
+            with phase(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+    
+    BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+    
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.BUCKETS[index] if index < len(self.BUCKETS) else self.max
+        return self.max
+    
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'avg_seconds': self.total / self.count if self.count else 0.0,
+            'p50_seconds': self.quantile(0.5),
+            'p95_seconds': self.quantile(0.95),
+            'max_seconds': self.max,
+            'total_seconds': self.total
+        }
+
+
+class PhaseHistograms:
+    """Histograms of per-job seconds for each phase."""
+    
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+    
+    def record_breakdown(self, breakdown: Dict[str, Any]):
+        """Add one job's breakdown from PhaseTimer.breakdown()."""
+        self._record('total', breakdown.get('total', 0.0))
+        self._record('other', breakdown.get('other', 0.0))
+        for name, totals in breakdown.get('phases', {}).items():
+            self._record(name, totals['seconds'])
+    
+    def _record(self, name: str, seconds: float):
+        self.histograms.setdefault(name, Histogram()).record(seconds)
+    
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """Summary per phase, with each phase's share of total job time."""
+        job_seconds = self.histograms['total'].total if 'total' in self.histograms else 0.0
+        summary = {}
+        for name, histogram in sorted(self.histograms.items(), key=lambda item: -item[1].total):
+            summary[name] = histogram.summary()
+            summary[name]['share'] = histogram.total / job_seconds if job_seconds else 0.0
+        return summary
+
+
+_phase_histograms: Optional[PhaseHistograms] = None
+
+
+def get_phase_histograms() -> PhaseHistograms:
+    """Get the histograms of jobs finished in this process."""
+    global _phase_histograms
+    if _phase_histograms is None:
+        _phase_histograms = PhaseHistograms()
+    return _phase_histograms